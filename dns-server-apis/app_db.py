@@ -1,15 +1,34 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import oracledb
+import asyncio
+import base64
+import contextvars
+import functools
+import hashlib
 import json
+import math
+import os
+import random
 import re
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import logging
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
-import requests
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+import latency_sketch
+from output_codec import CodecUnavailable, compress_output, decompress_output, resolve_codec
+import stage_timing
+from stage_timing import stage
 
 
 # Run the following SQL query to check if the sequence exists and in which schema:
@@ -32,6 +51,36 @@ import requests
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics, served on /metrics. Labels are route templates, function
+# names and backend paths, so series counts stay fixed.
+REQUEST_SECONDS = Histogram(
+    "dns_api_request_duration_seconds", "Time to response headers per route",
+    ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge("dns_api_requests_in_flight", "Requests being handled")
+DB_ACQUIRE_SECONDS = Histogram("dns_api_db_acquire_seconds", "Wait for a pooled Oracle connection")
+DB_STATEMENT_SECONDS = Histogram(
+    "dns_api_db_statement_duration_seconds", "Database work per data-access function",
+    ["statement", "outcome"]
+)
+BACKEND_REQUEST_SECONDS = Histogram(
+    "dns_api_backend_request_duration_seconds", "Backend (app_v1) calls including queueing for a slot",
+    ["path", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+CACHE_LOOKUPS = Counter("dns_api_cache_lookups_total", "Read cache lookups", ["cache", "result"])
+SINGLE_FLIGHT_CALLS = Counter(
+    "dns_api_single_flight_calls_total", "Coalesced calls by how they were served", ["name", "served"]
+)
+WRITE_BEHIND_SESSIONS = Counter(
+    "dns_api_write_behind_sessions_total", "Write-behind sessions by how they were persisted", ["result"]
+)
+MONITOR_RUNS = Counter("dns_api_monitor_runs_total", "Scheduled target probes by outcome", ["outcome"])
+MONITOR_LAG_SECONDS = Histogram(
+    "dns_api_monitor_lag_seconds", "Delay between a target falling due and its probe starting",
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+)
+
 # Database configuration
 
 class DNSTestInput(BaseModel):
@@ -61,41 +110,164 @@ class NetworkConfigInput(BaseModel):
 
 class TestResult(BaseModel):
     command: str
-    returncode: int
-    stderr: str
-    stdout: str
+    # Probes that time out or fail to start only report an error
+    returncode: int = -1
+    stderr: str = ""
+    stdout: str = ""
     success: bool
+    error: Optional[str] = None
 
 class DNSTestResults(BaseModel):
     success: bool
     test_results: Dict[str, TestResult]
 
+class ProcessedTestResult(BaseModel):
+    """A probe result parsed and summarized once, shared by the DB write and the response"""
+    test_type: str
+    result: TestResult
+    parsed_data: Dict[str, Any]
+    rich_summary: str
+
+    def to_response(self) -> Dict[str, Any]:
+        return {
+            "command": self.result.command,
+            "success": self.result.success,
+            "return_code": self.result.returncode,
+            "rich_summary": self.rich_summary,
+            "parsed_data": self.parsed_data,
+            "raw_stdout": self.result.stdout,
+            "stderr": self.result.stderr or self.result.error or ""
+        }
+
+class TestSession(BaseModel):
+    """A completed test run ready to be persisted"""
+    input_data: DNSTestInput
+    results: DNSTestResults
+    processed: Dict[str, ProcessedTestResult]
+    # Set for write-behind sessions, whose id is handed out before the row exists
+    session_id: Optional[int] = None
+    tested_at: Optional[datetime] = None
+
+class DNSConfigBulkInput(BaseModel):
+    configs: List[DNSConfigInput]
+
+class DNSTestBatchInput(BaseModel):
+    targets: List[DNSTestInput]
+    max_concurrency: Optional[int] = None
+    per_server_concurrency: Optional[int] = None
+
+class MonitorTargetInput(DNSTestInput):
+    interval_seconds: int = 300
+    enabled: bool = True
+
+class MonitorTargetUpdate(BaseModel):
+    interval_seconds: Optional[int] = None
+    enabled: Optional[bool] = None
+
+# DDL errors that only mean the object is already in place
+IGNORED_DDL_ERRORS = (
+    "ORA-00955",  # name is already used by an existing object
+    "ORA-01430",  # column being added already exists in table
+    "ORA-01408",  # such column list already indexed
+)
+
 class DatabaseManager:
+    """Owns the Oracle session pool and the worker threads that use it
+
+    Blocking oracledb calls never run on the event loop: handlers pass a
+    function to run(), which executes it in a worker thread with a pooled
+    connection that is released as soon as the function returns.
+    """
+
     def __init__(self):
-        self.connection = None
+        self.pool = None
+        self.executor = None
+        self.user = os.getenv("DB_USER", "SYS")
+        self.password = os.getenv("DB_PASSWORD", "oracle")
+        self.dsn = os.getenv("DB_DSN", "10.42.0.243:1521/FREE")
+        self.pool_min = int(os.getenv("DB_POOL_MIN", "2"))
+        self.pool_max = int(os.getenv("DB_POOL_MAX", "10"))
+        self.pool_increment = int(os.getenv("DB_POOL_INCREMENT", "1"))
+        self.pool_timeout = int(os.getenv("DB_POOL_WAIT_TIMEOUT", "10000"))
     
     async def connect(self):
         try:
             
-            self.connection = oracledb.connect(
-                user="SYS",
-                password="oracle",
-                dsn="10.42.0.243:1521/FREE",
-                mode=oracledb.SYSDBA
+            self.pool = oracledb.create_pool(
+                user=self.user,
+                password=self.password,
+                dsn=self.dsn,
+                mode=oracledb.SYSDBA,
+                min=self.pool_min,
+                max=self.pool_max,
+                increment=self.pool_increment,
+                getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                wait_timeout=self.pool_timeout
             )
-            logger.info("Connected to Oracle Database")
+            # One worker per pooled connection so acquire() never queues behind the loop
+            self.executor = ThreadPoolExecutor(max_workers=self.pool_max, thread_name_prefix="oracle")
+            logger.info(f"Connected to Oracle Database (pool min={self.pool_min}, max={self.pool_max})")
             await self.create_tables()
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
     
     async def disconnect(self):
-        if self.connection:
-            self.connection.close()
+        if self.executor:
+            self.executor.shutdown(wait=True)
+        if self.pool:
+            self.pool.close(force=True)
             logger.info("Disconnected from Oracle Database")
+
+    def standalone_connection(self):
+        """Open a dedicated connection for maintenance jobs that run outside the API"""
+        return oracledb.connect(user=self.user, password=self.password, dsn=self.dsn, mode=oracledb.SYSDBA)
+
+    def _run_with_connection(self, func, args, kwargs):
+        started = time.perf_counter()
+        with stage("db-acquire"):
+            connection = self.pool.acquire()
+        DB_ACQUIRE_SECONDS.observe(time.perf_counter() - started)
+        with connection, stage(f"db-{func.__name__}"):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = func(connection, *args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                DB_STATEMENT_SECONDS.labels(func.__name__, outcome).observe(time.perf_counter() - started)
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(connection, *args, **kwargs) on a pooled connection in a worker thread"""
+        loop = asyncio.get_running_loop()
+        # Carry the request's stage timings into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(context.run, self._run_with_connection, func, args, kwargs)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Current pool sizing and usage"""
+        if not self.pool:
+            return {"connected": False}
+        return {
+            "connected": True,
+            "min": self.pool.min,
+            "max": self.pool.max,
+            "increment": self.pool.increment,
+            "opened": self.pool.opened,
+            "busy": self.pool.busy,
+            "idle": self.pool.opened - self.pool.busy,
+            "wait_timeout_ms": self.pool.wait_timeout
+        }
     
     async def create_tables(self):
         """Create necessary tables if they don't exist"""
+        await self.run(self._create_tables)
+
+    def _create_tables(self, connection):
         create_queries = [
             """
             CREATE TABLE IF NOT EXISTS dns_test_sessions (
@@ -120,11 +292,22 @@ class DatabaseManager:
                 stderr_output CLOB,
                 success NUMBER(1) CHECK (success IN (0,1)),
                 parsed_summary CLOB,
+                parsed_json CLOB CHECK (parsed_json IS JSON),
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (session_id) REFERENCES dns_test_sessions(session_id)
             )
             """,
             """
+            ALTER TABLE dns_test_results ADD (parsed_json CLOB CHECK (parsed_json IS JSON))
+            """,
+            """
+            ALTER TABLE dns_test_results ADD (
+                stdout_blob BLOB,
+                stderr_blob BLOB,
+                output_codec VARCHAR2(10)
+            )
+            """,
+            """
             CREATE TABLE IF NOT EXISTS dns_configurations (
                 config_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
                 dns_ip VARCHAR2(45),
@@ -145,28 +328,491 @@ class DatabaseManager:
                 INCREMENT BY 1
                 NOCACHE
                 NOCYCLE
+            """,
+            # Indexes for the keyset-paginated history listings and the joins behind them
+            "CREATE INDEX IF NOT EXISTS dns_test_results_session_ix ON dns_test_results (session_id)",
+            "CREATE INDEX IF NOT EXISTS dns_test_sessions_time_ix ON dns_test_sessions (test_timestamp, session_id)",
+            "CREATE INDEX IF NOT EXISTS dns_test_sessions_domain_ix ON dns_test_sessions (domain, test_timestamp, session_id)",
+            "CREATE INDEX IF NOT EXISTS dns_test_sessions_dns_ip_ix ON dns_test_sessions (dns_ip, test_timestamp, session_id)",
+            "CREATE INDEX IF NOT EXISTS dns_configurations_time_ix ON dns_configurations (created_at, config_id)",
+            "CREATE INDEX IF NOT EXISTS dns_configurations_iface_ix ON dns_configurations (dns_interface, created_at, config_id)",
+            "CREATE INDEX IF NOT EXISTS dns_configurations_domain_ix ON dns_configurations (domain, created_at, config_id)",
+            """
+            CREATE TABLE IF NOT EXISTS dns_zone_versions (
+                version_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                domain VARCHAR2(255) NOT NULL,
+                serial NUMBER(10) NOT NULL,
+                version_kind VARCHAR2(5) CHECK (version_kind IN ('FULL', 'DELTA')),
+                config_id NUMBER REFERENCES dns_configurations(config_id),
+                records_json CLOB CHECK (records_json IS JSON),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                CONSTRAINT dns_zone_versions_serial_uk UNIQUE (domain, serial)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS dns_config_blobs (
+                content_hash VARCHAR2(64) PRIMARY KEY,
+                content CLOB,
+                byte_length NUMBER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            ALTER TABLE dns_configurations ADD (
+                forward_zone_hash VARCHAR2(64),
+                reverse_zone_hash VARCHAR2(64),
+                named_conf_zones_hash VARCHAR2(64),
+                options_config_hash VARCHAR2(64)
+            )
+            """,
+            # Hourly latency rollups behind /trends; percentiles come from the sketch bins
+            """
+            CREATE TABLE IF NOT EXISTS dns_latency_rollups (
+                bucket_start TIMESTAMP NOT NULL,
+                domain VARCHAR2(255) NOT NULL,
+                dns_ip VARCHAR2(45) NOT NULL,
+                test_type VARCHAR2(50) NOT NULL,
+                run_count NUMBER NOT NULL,
+                success_count NUMBER NOT NULL,
+                latency_count NUMBER NOT NULL,
+                latency_sum NUMBER NOT NULL,
+                latency_min NUMBER,
+                latency_max NUMBER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                CONSTRAINT dns_latency_rollups_pk PRIMARY KEY (bucket_start, domain, dns_ip, test_type)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS dns_latency_rollup_bins (
+                bucket_start TIMESTAMP NOT NULL,
+                domain VARCHAR2(255) NOT NULL,
+                dns_ip VARCHAR2(45) NOT NULL,
+                test_type VARCHAR2(50) NOT NULL,
+                bin NUMBER NOT NULL,
+                bin_count NUMBER NOT NULL,
+                CONSTRAINT dns_latency_rollup_bins_pk PRIMARY KEY (bucket_start, domain, dns_ip, test_type, bin)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS dns_latency_rollups_domain_ix ON dns_latency_rollups (domain, bucket_start)",
+            "CREATE INDEX IF NOT EXISTS dns_latency_rollups_dns_ip_ix ON dns_latency_rollups (dns_ip, bucket_start)",
+            """
+            CREATE TABLE IF NOT EXISTS dns_monitor_targets (
+                target_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                dns_ip VARCHAR2(45) NOT NULL,
+                host_ip VARCHAR2(45) NOT NULL,
+                domain VARCHAR2(255) NOT NULL,
+                host1_prefix VARCHAR2(50) NOT NULL,
+                host2_prefix VARCHAR2(50) NOT NULL,
+                interval_seconds NUMBER NOT NULL,
+                enabled NUMBER(1) DEFAULT 1 CHECK (enabled IN (0,1)),
+                consecutive_failures NUMBER DEFAULT 0,
+                last_run_at TIMESTAMP,
+                last_success NUMBER(1),
+                last_session_id NUMBER,
+                last_error VARCHAR2(1000),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                CONSTRAINT dns_monitor_targets_uk UNIQUE (dns_ip, host_ip, domain, host1_prefix, host2_prefix)
+            )
             """
         ]
         
-        cursor = self.connection.cursor()
+        cursor = connection.cursor()
         for query in create_queries:
             try:
                 cursor.execute(query)
-                self.connection.commit()
+                connection.commit()
             except Exception as e:
-                if "ORA-00955" not in str(e):  # Table already exists error
+                if not any(code in str(e) for code in IGNORED_DDL_ERRORS):
                     logger.error(f"Error creating table: {e}")
         cursor.close()
 
 # Initialize database manager
 db_manager = DatabaseManager()
 
+class TTLCache:
+    """Bounded LRU cache with a per-entry TTL and a byte budget
+
+    Entries are evicted least recently used first once either `max_entries`
+    or `max_bytes` (estimated from the JSON size of the value) is exceeded.
+
+    Invalidations are stamped with a counter so a fill that started before
+    one is dropped. Stamps are kept for at most `max_entries` keys and are
+    pruned when their entry is evicted or expires; a pruned stamp raises
+    `_floor`, which conservatively rejects any fill that was older than it.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._clock = 0
+        self._invalidated = {}  # key -> clock at its last invalidation, oldest first
+        self._floor = 0  # newest stamp pruned from _invalidated
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._hit_counter = CACHE_LOOKUPS.labels(name, "hit")
+        self._miss_counter = CACHE_LOOKUPS.labels(name, "miss")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                self._miss_counter.inc()
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self._prune(key)
+                self.expirations += 1
+                self.misses += 1
+                self._miss_counter.inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._hit_counter.inc()
+            return entry[2]
+
+    def peek(self, key):
+        """Current value without counting a lookup or refreshing its LRU position"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[2]
+
+    def generation(self, key) -> int:
+        """Token to pass to set() so a fill that raced an invalidation is dropped"""
+        with self._lock:
+            return self._clock
+
+    def set(self, key, value, size: Optional[int] = None, generation: Optional[int] = None):
+        if size is None:
+            size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation < self._invalidated.get(key, self._floor):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                evicted = next(iter(self._entries))
+                self._remove(evicted)
+                self._prune(evicted)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._clock += 1
+            self._invalidated.pop(key, None)
+            self._invalidated[key] = self._clock
+            while len(self._invalidated) > self.max_entries:
+                self._prune(next(iter(self._invalidated)))
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _prune(self, key):
+        stamp = self._invalidated.pop(key, None)
+        if stamp is not None:
+            self._floor = max(self._floor, stamp)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+# Stored sessions never change, so they can live long; config searches are
+# invalidated whenever a configuration is added for the interface
+session_results_cache = TTLCache(
+    "session_results",
+    max_entries=int(os.getenv("SESSION_CACHE_ENTRIES", "1000")),
+    max_bytes=int(os.getenv("SESSION_CACHE_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("SESSION_CACHE_TTL", "3600"))
+)
+config_search_cache = TTLCache(
+    "config_search",
+    max_entries=int(os.getenv("CONFIG_CACHE_ENTRIES", "200")),
+    max_bytes=int(os.getenv("CONFIG_CACHE_BYTES", str(32 * 1024 * 1024))),
+    ttl=float(os.getenv("CONFIG_CACHE_TTL", "300"))
+)
+
+# Blobs are immutable and addressed by their hash, so entries only leave on eviction
+config_blob_cache = TTLCache(
+    "config_blobs",
+    max_entries=int(os.getenv("BLOB_CACHE_ENTRIES", "5000")),
+    max_bytes=int(os.getenv("BLOB_CACHE_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("BLOB_CACHE_TTL", str(7 * 24 * 3600)))
+)
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution
+
+    Callers that arrive while a call for their key is running await the same
+    task instead of starting another. With `reuse_ttl` > 0, a successful
+    result is also handed to callers arriving up to that many seconds after
+    it finished. Runs on the event loop only, so it needs no locking.
+    """
+
+    def __init__(self, name: str, reuse_ttl: float = 0):
+        self.name = name
+        self.reuse_ttl = reuse_ttl
+        self._in_flight: Dict[Any, asyncio.Task] = {}
+        self._recent: Dict[Any, tuple] = {}  # key -> (expires_at, result)
+        self.executed = 0
+        self.coalesced = 0
+        self.reused = 0
+
+    async def run(self, key, factory):
+        """Return (result, shared) where shared is True if another caller's run served it"""
+        recent = self._recent.get(key)
+        if recent is not None and recent[0] > time.monotonic():
+            self.reused += 1
+            SINGLE_FLIGHT_CALLS.labels(self.name, "reused").inc()
+            return recent[1], True
+        
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+            self.executed += 1
+            SINGLE_FLIGHT_CALLS.labels(self.name, "executed").inc()
+            # Shielded so a disconnecting caller does not cancel the run for the others
+            return await asyncio.shield(task), False
+        
+        self.coalesced += 1
+        SINGLE_FLIGHT_CALLS.labels(self.name, "coalesced").inc()
+        with stage("single-flight-wait"):
+            return await asyncio.shield(task), True
+
+    def _finished(self, key, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.reuse_ttl > 0:
+            now = time.monotonic()
+            for expired in [k for k, (expires_at, _) in self._recent.items() if expires_at <= now]:
+                del self._recent[expired]
+            self._recent[key] = (now + self.reuse_ttl, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "reuse_ttl": self.reuse_ttl,
+            "recent_results": len(self._recent),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "reused": self.reused
+        }
+
+# Identical /test-dns requests share one probe run; TEST_DNS_REUSE_SECONDS also
+# reuses a finished run for that long
+TEST_DNS_COALESCE = os.getenv("TEST_DNS_COALESCE", "1") == "1"
+test_dns_flight = SingleFlight("test_dns", reuse_ttl=float(os.getenv("TEST_DNS_REUSE_SECONDS", "0")))
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://10.42.0.1:5000")
+
+class BackendClient:
+    """Long-lived pooled HTTP client for calls to the probe backend (app_v1)
+
+    Connections are kept alive between requests, every call is bounded by
+    connect/read timeouts plus an overall deadline, and at most
+    `max_in_flight` backend requests run at once.
+    """
+
+    def __init__(self, base_url: str = BACKEND_URL):
+        self.base_url = base_url
+        self.client = None
+        self.semaphore = None
+        self.in_flight = 0
+        self.connect_timeout = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "5"))
+        self.read_timeout = float(os.getenv("BACKEND_READ_TIMEOUT", "60"))
+        self.total_timeout = float(os.getenv("BACKEND_TOTAL_TIMEOUT", "90"))
+        self.max_in_flight = int(os.getenv("BACKEND_MAX_IN_FLIGHT", "20"))
+        self.batch_timeout = float(os.getenv("BACKEND_BATCH_TIMEOUT", "600"))
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(
+                self.read_timeout,
+                connect=self.connect_timeout,
+                pool=self.total_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight
+            )
+        )
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        logger.info(f"Backend client ready for {self.base_url} (max in flight={self.max_in_flight})")
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+
+    async def post(self, path: str, payload: Dict[str, Any],
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
+        """POST JSON to the backend and return the decoded response
+
+        `timeout` overrides both the read timeout and the overall deadline,
+        for calls such as batches that legitimately run longer. The deadline
+        covers the wait for an in-flight slot as well as the request.
+        """
+        total_timeout = timeout or self.total_timeout
+        request_timeout = httpx.Timeout(timeout, connect=self.connect_timeout) if timeout else None
+        started = time.perf_counter()
+        outcome = "error"
+
+        async def send():
+            async with self.semaphore:
+                self.in_flight += 1
+                try:
+                    with stage("backend"):
+                        return await self.client.post(
+                            path, json=payload,
+                            **({"timeout": request_timeout} if request_timeout else {})
+                        )
+                finally:
+                    self.in_flight -= 1
+
+        try:
+            try:
+                response = await asyncio.wait_for(send(), timeout=total_timeout)
+            except asyncio.TimeoutError:
+                raise httpx.TimeoutException(
+                    f"Backend request to {path} exceeded {total_timeout}s"
+                )
+            timings = stage_timing.current()
+            if timings is not None:
+                timings.merge_header(response.headers.get("Server-Timing"), "v1-")
+            response.raise_for_status()
+            outcome = "ok"
+            with stage("backend-decode"):
+                return response.json()
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        except httpx.HTTPStatusError:
+            outcome = "http_error"
+            raise
+        finally:
+            BACKEND_REQUEST_SECONDS.labels(path, outcome).observe(time.perf_counter() - started)
+
+    async def stream_lines(self, path: str, payload: Dict[str, Any]):
+        """POST JSON to the backend and yield the non-empty lines of a streamed response
+
+        The read timeout applies to each chunk and the overall deadline to the
+        whole stream: the wait for an in-flight slot, the response headers and
+        every read are bounded by what is left of it.
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.total_timeout
+
+        async def within_deadline(awaitable):
+            try:
+                return await asyncio.wait_for(awaitable, timeout=max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise httpx.TimeoutException(
+                    f"Backend stream from {path} exceeded {self.total_timeout}s"
+                )
+
+        try:
+            await within_deadline(self.semaphore.acquire())
+            self.in_flight += 1
+            try:
+                request = self.client.build_request("POST", path, json=payload)
+                response = await within_deadline(self.client.send(request, stream=True))
+                try:
+                    response.raise_for_status()
+                    lines = response.aiter_lines()
+                    while True:
+                        try:
+                            line = await within_deadline(lines.__anext__())
+                        except StopAsyncIteration:
+                            break
+                        if line:
+                            yield line
+                finally:
+                    await response.aclose()
+            finally:
+                self.in_flight -= 1
+                self.semaphore.release()
+            outcome = "ok"
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        except httpx.HTTPStatusError:
+            outcome = "http_error"
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            # The client went away before the stream finished
+            outcome = "cancelled"
+            raise
+        finally:
+            BACKEND_REQUEST_SECONDS.labels(path, outcome).observe(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limits and usage"""
+        return {
+            "base_url": self.base_url,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "total_timeout": self.total_timeout
+        }
+
+backend_client = BackendClient()
+
+Gauge("dns_api_backend_in_flight", "Backend requests in flight").set_function(lambda: backend_client.in_flight)
+Gauge("dns_api_db_pool_opened", "Open pooled Oracle connections").set_function(
+    lambda: db_manager.pool.opened if db_manager.pool else 0
+)
+Gauge("dns_api_db_pool_busy", "Pooled Oracle connections in use").set_function(
+    lambda: db_manager.pool.busy if db_manager.pool else 0
+)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await db_manager.connect()
+    await write_behind.start()
+    await backend_client.start()
+    await monitor_scheduler.start()
     yield
     # Shutdown
+    await monitor_scheduler.stop()
+    await write_behind.stop()
+    await backend_client.close()
     await db_manager.disconnect()
 
 app = FastAPI(
@@ -188,6 +834,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Observe per-route latency and report stage timings in a Server-Timing header
+
+    Streamed responses are timed to their headers.
+    """
+    started = time.perf_counter()
+    status = 500
+    route_path = "unmatched"
+    REQUESTS_IN_FLIGHT.inc()
+    timing = stage_timing.start_request(f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if stage_timing.SERVER_TIMING:
+            response.headers["Server-Timing"] = timing[0].header()
+            response.headers["Timing-Allow-Origin"] = ", ".join(origins)
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        if route:
+            route_path = route.path
+        stage_timing.finish_request(timing, f"{request.method} {route_path}", status)
+        REQUEST_SECONDS.labels(request.method, route_path, str(status)).observe(time.perf_counter() - started)
+
+# Precompiled patterns for the probe output parsers
+DIG_STATUS_RE = re.compile(r'status: (\w+)')
+DIG_FLAGS_RE = re.compile(r'flags: ([^;]+)')
+DIG_QUERY_TIME_RE = re.compile(r'Query time: (\d+) msec')
+DIG_SERVER_RE = re.compile(r'SERVER: ([^#]+)#(\d+)')
+DIG_MSG_SIZE_RE = re.compile(r'MSG SIZE.*rcvd: (\d+)')
+# dig pads record columns with runs of tabs and spaces
+DIG_RECORD_RE = re.compile(r'(\S+)\s+(\d+)\s+(\S+)\s+(\S+)(?:\s+(.*))?')
+
+PING_TARGET_RE = re.compile(r'PING .+? \(([^)]+)\)')
+PING_TIME_RE = re.compile(r'time=([0-9.]+) ms')
+PING_SUMMARY_RE = re.compile(r'(\d+) packets transmitted, (\d+) (?:packets )?received,.*?([0-9.]+)% packet loss')
+PING_RTT_RE = re.compile(r'(?:rtt|round-trip) min/avg/max/(?:mdev|stddev) = ([0-9.]+)/([0-9.]+)/([0-9.]+)/([0-9.]+) ms')
+
 def parse_dig_output(stdout: str) -> Dict[str, Any]:
     """Parse dig command output and extract meaningful information"""
     parsed_data = {
@@ -199,51 +885,49 @@ def parse_dig_output(stdout: str) -> Dict[str, Any]:
         "message_size": None
     }
     
-    lines = stdout.split('\n')
-    
-    for line in lines:
+    in_answer = False
+    for line in stdout.splitlines():
         line = line.strip()
+        if not line:
+            in_answer = False
+            continue
         
-        # Extract query time
-        if "Query time:" in line:
-            match = re.search(r'Query time: (\d+) msec', line)
-            if match:
-                parsed_data["query_time"] = int(match.group(1))
-        
-        # Extract server information
-        if "SERVER:" in line:
-            match = re.search(r'SERVER: ([^#]+)#(\d+)', line)
-            if match:
-                parsed_data["server"] = {"ip": match.group(1), "port": match.group(2)}
-        
-        # Extract status
-        if "status:" in line:
-            match = re.search(r'status: (\w+)', line)
-            if match:
-                parsed_data["status"] = match.group(1)
-        
-        # Extract flags
-        if "flags:" in line:
-            match = re.search(r'flags: ([^;]+)', line)
-            if match:
-                parsed_data["flags"] = match.group(1).strip()
-        
-        # Extract message size
-        if "MSG SIZE" in line:
-            match = re.search(r'MSG SIZE.*rcvd: (\d+)', line)
-            if match:
-                parsed_data["message_size"] = int(match.group(1))
+        if line.startswith(';'):
+            if line.startswith(';; ANSWER SECTION'):
+                in_answer = True
+            elif line.startswith(';; ->>HEADER<<-'):
+                match = DIG_STATUS_RE.search(line)
+                if match:
+                    parsed_data["status"] = match.group(1)
+            elif line.startswith(';; flags:'):
+                match = DIG_FLAGS_RE.search(line)
+                if match:
+                    parsed_data["flags"] = match.group(1).strip()
+            elif line.startswith(';; Query time:'):
+                match = DIG_QUERY_TIME_RE.search(line)
+                if match:
+                    parsed_data["query_time"] = int(match.group(1))
+            elif line.startswith(';; SERVER:'):
+                match = DIG_SERVER_RE.search(line)
+                if match:
+                    parsed_data["server"] = {"ip": match.group(1), "port": match.group(2)}
+            elif line.startswith(';; MSG SIZE'):
+                match = DIG_MSG_SIZE_RE.search(line)
+                if match:
+                    parsed_data["message_size"] = int(match.group(1))
+            continue
         
         # Extract answer section (A records, PTR records)
-        if line and not line.startswith(';') and '\t' in line:
-            parts = line.split('\t')
-            if len(parts) >= 4:
+        if in_answer:
+            match = DIG_RECORD_RE.fullmatch(line)
+            if match:
+                name, ttl, rclass, rtype, value = match.groups()
                 parsed_data["answer_section"].append({
-                    "name": parts[0].rstrip('.'),
-                    "ttl": parts[1].strip() if parts[1].strip().isdigit() else None,
-                    "class": parts[2].strip(),
-                    "type": parts[3].strip(),
-                    "value": parts[4].strip() if len(parts) > 4 else None
+                    "name": name.rstrip('.'),
+                    "ttl": ttl,
+                    "class": rclass,
+                    "type": rtype,
+                    "value": value.strip() if value else None
                 })
     
     return parsed_data
@@ -259,34 +943,32 @@ def parse_ping_output(stdout: str) -> Dict[str, Any]:
         "individual_pings": []
     }
     
-    lines = stdout.split('\n')
-    
-    for line in lines:
+    for line in stdout.splitlines():
         line = line.strip()
         
-        # Extract target IP from first ping line
-        if "PING" in line and "bytes of data" in line:
-            match = re.search(r'PING .+ \(([^)]+)\)', line)
+        # Individual ping results are the bulk of the output, so check them first
+        if "bytes from" in line:
+            match = PING_TIME_RE.search(line)
             if match:
-                parsed_data["target_ip"] = match.group(1)
+                parsed_data["individual_pings"].append(float(match.group(1)))
         
-        # Extract individual ping results
-        if "bytes from" in line and "time=" in line:
-            match = re.search(r'time=([0-9.]+) ms', line)
+        # Extract target IP from first ping line
+        elif line.startswith("PING "):
+            match = PING_TARGET_RE.match(line)
             if match:
-                parsed_data["individual_pings"].append(float(match.group(1)))
+                parsed_data["target_ip"] = match.group(1)
         
         # Extract summary statistics
-        if "packets transmitted" in line:
-            match = re.search(r'(\d+) packets transmitted, (\d+) received, ([0-9.]+)% packet loss', line)
+        elif "packets transmitted" in line:
+            match = PING_SUMMARY_RE.search(line)
             if match:
                 parsed_data["packets_transmitted"] = int(match.group(1))
                 parsed_data["packets_received"] = int(match.group(2))
                 parsed_data["packet_loss"] = float(match.group(3))
         
         # Extract RTT statistics
-        if "rtt min/avg/max/mdev" in line:
-            match = re.search(r'= ([0-9.]+)/([0-9.]+)/([0-9.]+)/([0-9.]+) ms', line)
+        elif "min/avg/max" in line:
+            match = PING_RTT_RE.search(line)
             if match:
                 parsed_data["rtt_stats"] = {
                     "min": float(match.group(1)),
@@ -346,131 +1028,621 @@ def generate_rich_paragraph(test_type: str, test_result: TestResult, parsed_data
     
     return f"Test {test_type} completed with return code {test_result.returncode}."
 
-async def save_dns_test_results(input_data: DNSTestInput, results: DNSTestResults) -> int:
-    """Save DNS test results to Oracle database"""
-    cursor = db_manager.connection.cursor()
-    
+def parse_test_output(test_type: str, stdout: str) -> Dict[str, Any]:
+    """Parse a probe's stdout based on its test type"""
+    if test_type.startswith(('dig_', 'reverse_lookup')):
+        return parse_dig_output(stdout)
+    if test_type.startswith('ping_'):
+        return parse_ping_output(stdout)
+    return {}
+
+def process_test_result(test_type: str, test_result: TestResult) -> ProcessedTestResult:
+    """Parse and summarize one probe result"""
+    with stage("parse"):
+        parsed_data = parse_test_output(test_type, test_result.stdout)
+    with stage("summary"):
+        rich_summary = generate_rich_paragraph(test_type, test_result, parsed_data)
+    return ProcessedTestResult(
+        test_type=test_type,
+        result=test_result,
+        parsed_data=parsed_data,
+        rich_summary=rich_summary
+    )
+
+def process_test_results(results: DNSTestResults) -> Dict[str, ProcessedTestResult]:
+    """Parse and summarize every probe result exactly once"""
+    return {
+        test_type: process_test_result(test_type, test_result)
+        for test_type, test_result in results.test_results.items()
+    }
+
+def session_id_column_state(connection) -> Tuple[bool, bool]:
+    """(still an identity, defaults to DNS_TEST_SESSIONS_SEQ) for dns_test_sessions.session_id
+
+    migrate_session_ids.py moves the column from the first state to the
+    second; write-behind needs the sequence.
+    """
+    cursor = connection.cursor()
     try:
-        logger.info(results)
-        # Insert session record
-        session_query = """
-        INSERT INTO dns_test_sessions 
-        (dns_ip, host_ip, domain, host1_prefix, host2_prefix, success)
-        VALUES (:dns_ip, :host_ip, :domain, :host1_prefix, :host2_prefix, :success)
-        """
+        cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM user_tab_identity_cols
+             WHERE table_name = 'DNS_TEST_SESSIONS' AND column_name = 'SESSION_ID'),
+            (SELECT default_on_null FROM user_tab_columns
+             WHERE table_name = 'DNS_TEST_SESSIONS' AND column_name = 'SESSION_ID')
+        FROM dual
+        """)
+        identity, default_on_null = cursor.fetchone()
+        return bool(identity), default_on_null == "YES"
+    finally:
+        cursor.close()
+
+def allocate_session_ids(connection, count: int) -> List[int]:
+    """Reserve a block of session ids from DNS_TEST_SESSIONS_SEQ in one round trip"""
+    cursor = connection.cursor()
+    cursor.arraysize = count
+    try:
+        cursor.execute(
+            "SELECT DNS_TEST_SESSIONS_SEQ.NEXTVAL FROM dual CONNECT BY LEVEL <= :count", {"count": count}
+        )
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def write_pending_sessions(connection, sessions: List[TestSession]) -> List[int]:
+    """Write buffered sessions, skipping any that an interrupted earlier attempt already committed"""
+    binds = {f"id{i}": session.session_id for i, session in enumerate(sessions)}
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            f"SELECT session_id FROM dns_test_sessions WHERE session_id IN ({', '.join(':' + b for b in binds)})",
+            binds
+        )
+        stored = {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    remaining = [session for session in sessions if session.session_id not in stored]
+    if remaining:
+        write_dns_test_sessions(connection, remaining)
+    return [session.session_id for session in remaining]
+
+class WriteBehindQueue:
+    """Saves completed test sessions in the background instead of on the request path
+
+    submit() hands out a session id reserved from DNS_TEST_SESSIONS_SEQ
+    (`id_block` ids per round trip) and queues the session; a flusher writes
+    whatever has queued up, up to `batch_size` sessions per transaction, and
+    retries a failed batch with exponential backoff. When the queue is full a
+    caller waits up to `put_timeout` for room, then the session goes to the
+    spill file if one is configured, or is saved synchronously as before.
+    Spilled sessions are replayed at startup and whenever the queue runs dry.
+    On shutdown the queue gets `drain_timeout` to empty; what is left is
+    spilled, or logged as lost without a spill file.
+    """
+
+    def __init__(self):
+        self.max_pending = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "1000"))
+        # Also bounds the IN list used to skip already-written sessions
+        self.batch_size = min(int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100")), 1000)
+        self.put_timeout = float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT", "2"))
+        self.retry_max = float(os.getenv("WRITE_BEHIND_RETRY_MAX_SECONDS", "30"))
+        self.drain_timeout = float(os.getenv("WRITE_BEHIND_DRAIN_TIMEOUT", "30"))
+        self.id_block = int(os.getenv("WRITE_BEHIND_ID_BLOCK", "100"))
+        self.spill_path = os.getenv("WRITE_BEHIND_SPILL_FILE") or None
+        self.running = False
+        self.queue = None
+        self.pending: Dict[int, TestSession] = {}  # queued or being written
+        self._ids = deque()
+        self._id_lock = None
+        self._spill_lock = threading.Lock()
+        self._flusher = None
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.synchronous = 0
+        self.failed_flushes = 0
+
+    async def start(self):
+        if not WRITE_BEHIND:
+            return
+        identity, from_sequence = await db_manager.run(session_id_column_state)
+        if identity or not from_sequence:
+            logger.error(
+                "WRITE_BEHIND=1 needs session ids from DNS_TEST_SESSIONS_SEQ; run migrate_session_ids.py "
+                "once. Saving sessions synchronously until then."
+            )
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self._id_lock = asyncio.Lock()
+        self.running = True
+        await self._replay_spill()
+        self._flusher = asyncio.ensure_future(self._flush_loop())
+        self._flusher.add_done_callback(self._flusher_exited)
+        logger.info(f"Write-behind persistence enabled (queue {self.max_pending}, batch {self.batch_size})")
+
+    async def stop(self):
+        """Drain the queue within drain_timeout, then spill or report whatever is left"""
+        if not self.running:
+            return
+        self.running = False
+        try:
+            await asyncio.wait_for(self.queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Write-behind drain timed out with {len(self.pending)} sessions unsaved")
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        if self.pending:
+            leftover = sorted(self.pending.values(), key=lambda session: session.session_id)
+            if self.spill_path:
+                await self._spill(leftover)
+            else:
+                logger.error(f"Write-behind shutdown lost {len(leftover)} sessions: "
+                             f"{[session.session_id for session in leftover]}")
+            self.pending.clear()
+
+    def get(self, session_id: int) -> Optional[TestSession]:
+        return self.pending.get(session_id)
+
+    async def submit(self, session: TestSession) -> int:
+        """Assign the session an id and queue it; returns once it is queued, spilled or saved"""
+        session.session_id = await self._next_session_id()
+        session.tested_at = session.tested_at or datetime.now()
+        self.pending[session.session_id] = session
+        try:
+            await asyncio.wait_for(self.queue.put(session), self.put_timeout)
+            return session.session_id
+        except asyncio.TimeoutError:
+            pass
         
-        cursor.execute(session_query, {
-            'dns_ip': input_data.dns_ip,
-            'host_ip': input_data.host_ip,
-            'domain': input_data.domain,
-            'host1_prefix': input_data.host1_prefix,
-            'host2_prefix': input_data.host2_prefix,
-            'success': 1 if results.success else 0
+        # Still full: keep the session outside the queue
+        del self.pending[session.session_id]
+        if self.spill_path:
+            await self._spill([session])
+        else:
+            self.synchronous += 1
+            WRITE_BEHIND_SESSIONS.labels("synchronous").inc()
+            await db_manager.run(write_dns_test_sessions, [session])
+        return session.session_id
+
+    async def _next_session_id(self) -> int:
+        if not self._ids:
+            async with self._id_lock:
+                if not self._ids:
+                    self._ids.extend(await db_manager.run(allocate_session_ids, self.id_block))
+        return self._ids.popleft()
+
+    async def _flush_loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if self.queue.empty() and self.spill_path:
+                await self._replay_spill()
+
+    def _flusher_exited(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Write-behind flusher stopped: {task.exception()!r}", exc_info=task.exception())
+
+    async def _write(self, batch: List[TestSession]):
+        """Write one batch, retrying until it succeeds or the flusher is cancelled"""
+        delay = 0.5
+        while True:
+            try:
+                await db_manager.run(write_pending_sessions, batch)
+                break
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.warning(f"Write-behind flush of {len(batch)} sessions failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max)
+        for session in batch:
+            self.pending.pop(session.session_id, None)
+        self.written += len(batch)
+        WRITE_BEHIND_SESSIONS.labels("written").inc(len(batch))
+
+    def _append_spill(self, lines: List[str]):
+        with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as spill:
+            spill.writelines(lines)
+            spill.flush()
+            os.fsync(spill.fileno())
+
+    def _take_spill(self) -> List[str]:
+        """Return the lines of the replay file, first moving the spill file there if none is left over
+
+        New spills start a fresh file. The replay file is only removed by
+        _finish_replay() once all of it is in the database, so a replay cut
+        short by a crash is picked up again on the next start.
+        """
+        replay_path = self.spill_path + ".replay"
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return []
+                os.replace(self.spill_path, replay_path)
+        with open(replay_path, encoding="utf-8") as replay:
+            return replay.readlines()
+
+    def _finish_replay(self, rejected: List[str]):
+        if rejected:
+            with open(self.spill_path + ".rejected", "a", encoding="utf-8") as rejects:
+                rejects.writelines(line if line.endswith("\n") else line + "\n" for line in rejected)
+        os.remove(self.spill_path + ".replay")
+
+    async def _spill(self, sessions: List[TestSession]):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._append_spill, [session.json() + "\n" for session in sessions])
+        self.spilled += len(sessions)
+        WRITE_BEHIND_SESSIONS.labels("spilled").inc(len(sessions))
+        logger.warning(f"Spilled {len(sessions)} sessions to {self.spill_path}")
+
+    async def _replay_spill(self):
+        """Write spilled sessions straight to the database
+
+        On any failure the replay file stays in place and is retried later;
+        batches that did commit are skipped by write_pending_sessions then.
+        Lines that do not parse, such as one torn by a crash mid-write, are
+        moved to `<spill file>.rejected`.
+        """
+        if not self.spill_path:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            lines = await loop.run_in_executor(None, self._take_spill)
+            sessions = []
+            rejected = []
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    sessions.append(TestSession.parse_raw(line))
+                except Exception as e:
+                    logger.error(f"Skipping unreadable spilled session: {e}")
+                    rejected.append(line)
+            for offset in range(0, len(sessions), self.batch_size):
+                batch = sessions[offset:offset + self.batch_size]
+                await db_manager.run(write_pending_sessions, batch)
+                self.replayed += len(batch)
+                WRITE_BEHIND_SESSIONS.labels("replayed").inc(len(batch))
+            if lines:
+                await loop.run_in_executor(None, self._finish_replay, rejected)
+                logger.info(f"Replayed {len(sessions)} spilled sessions")
+        except Exception as e:
+            logger.error(f"Replaying spilled sessions failed, keeping them for later: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": WRITE_BEHIND,
+            "running": self.running,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "unsaved": len(self.pending),
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "spill_file": self.spill_path,
+            "reserved_ids": len(self._ids),
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "synchronous": self.synchronous,
+            "failed_flushes": self.failed_flushes
+        }
+
+# With WRITE_BEHIND=1, /test-dns responds before its session is saved
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "0") == "1"
+write_behind = WriteBehindQueue()
+Gauge("dns_api_write_behind_unsaved", "Write-behind sessions not yet saved").set_function(
+    lambda: len(write_behind.pending)
+)
+
+async def save_dns_test_results(input_data: DNSTestInput, results: DNSTestResults,
+                                processed: Dict[str, ProcessedTestResult]) -> int:
+    """Save DNS test results to Oracle database, or queue them when write-behind is on"""
+    session = TestSession(input_data=input_data, results=results, processed=processed)
+    if write_behind.running:
+        return await write_behind.submit(session)
+    return (await db_manager.run(write_dns_test_sessions, [session]))[0]
+
+async def save_dns_test_sessions(sessions: List[TestSession]) -> List[int]:
+    """Save several test sessions in one transaction"""
+    return await db_manager.run(write_dns_test_sessions, sessions)
+
+def configured_output_codec() -> Optional[str]:
+    try:
+        return resolve_codec(os.getenv("RESULT_OUTPUT_CODEC", "none"))
+    except CodecUnavailable as e:
+        logger.warning(f"{e}; storing probe output uncompressed")
+        return None
+
+# When set, stdout/stderr go to the BLOB columns compressed with this codec
+RESULT_OUTPUT_CODEC = configured_output_codec()
+
+# Hourly rollups are updated in the same transaction as the sessions they count
+LATENCY_ROLLUPS = os.getenv("LATENCY_ROLLUPS", "1") == "1"
+
+ROLLUP_MERGE = """
+MERGE INTO dns_latency_rollups r
+USING (
+    SELECT :bucket_start bucket_start, :domain domain, :dns_ip dns_ip, :test_type test_type,
+           :run_count run_count, :success_count success_count, :latency_count latency_count,
+           :latency_sum latency_sum, :latency_min latency_min, :latency_max latency_max
+    FROM dual
+) s
+ON (r.bucket_start = s.bucket_start AND r.domain = s.domain AND r.dns_ip = s.dns_ip AND r.test_type = s.test_type)
+WHEN MATCHED THEN UPDATE SET
+    r.run_count = r.run_count + s.run_count,
+    r.success_count = r.success_count + s.success_count,
+    r.latency_count = r.latency_count + s.latency_count,
+    r.latency_sum = r.latency_sum + s.latency_sum,
+    r.latency_min = LEAST(COALESCE(r.latency_min, s.latency_min), COALESCE(s.latency_min, r.latency_min)),
+    r.latency_max = GREATEST(COALESCE(r.latency_max, s.latency_max), COALESCE(s.latency_max, r.latency_max)),
+    r.updated_at = CURRENT_TIMESTAMP
+WHEN NOT MATCHED THEN INSERT
+    (bucket_start, domain, dns_ip, test_type, run_count, success_count,
+     latency_count, latency_sum, latency_min, latency_max)
+VALUES
+    (s.bucket_start, s.domain, s.dns_ip, s.test_type, s.run_count, s.success_count,
+     s.latency_count, s.latency_sum, s.latency_min, s.latency_max)
+"""
+
+ROLLUP_BIN_MERGE = """
+MERGE INTO dns_latency_rollup_bins b
+USING (
+    SELECT :bucket_start bucket_start, :domain domain, :dns_ip dns_ip, :test_type test_type,
+           :bin bin, :bin_count bin_count
+    FROM dual
+) s
+ON (b.bucket_start = s.bucket_start AND b.domain = s.domain AND b.dns_ip = s.dns_ip
+    AND b.test_type = s.test_type AND b.bin = s.bin)
+WHEN MATCHED THEN UPDATE SET b.bin_count = b.bin_count + s.bin_count
+WHEN NOT MATCHED THEN INSERT (bucket_start, domain, dns_ip, test_type, bin, bin_count)
+VALUES (s.bucket_start, s.domain, s.dns_ip, s.test_type, s.bin, s.bin_count)
+"""
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def local_naive(moment: Optional[datetime]) -> Optional[datetime]:
+    """Express a client-supplied time as naive server-local time, like the stored timestamps"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+def latency_samples(parsed_data: Dict[str, Any]) -> List[float]:
+    """Latencies in ms from a parsed probe: dig's query time or every ping RTT"""
+    if parsed_data.get("query_time") is not None:
+        return [float(parsed_data["query_time"])]
+    return [float(rtt) for rtt in parsed_data.get("individual_pings") or []]
+
+def build_rollup_rows(sessions: List[TestSession], now: datetime):
+    """Aggregate a batch of sessions into one rollup row per key plus its sketch bins"""
+    totals = {}
+    for session in sessions:
+        bucket_start = hour_bucket(session.tested_at or now)
+        for test_type, item in session.processed.items():
+            key = (bucket_start, session.input_data.domain, session.input_data.dns_ip, test_type)
+            entry = totals.setdefault(key, {"runs": 0, "successes": 0, "samples": []})
+            entry["runs"] += 1
+            entry["successes"] += 1 if item.result.success else 0
+            entry["samples"].extend(latency_samples(item.parsed_data))
+
+    rollup_rows = []
+    bin_rows = []
+    for (bucket_start, domain, dns_ip, test_type), entry in totals.items():
+        samples = entry["samples"]
+        key_binds = {"bucket_start": bucket_start, "domain": domain, "dns_ip": dns_ip, "test_type": test_type}
+        rollup_rows.append({
+            **key_binds,
+            "run_count": entry["runs"],
+            "success_count": entry["successes"],
+            "latency_count": len(samples),
+            "latency_sum": sum(samples),
+            "latency_min": min(samples) if samples else None,
+            "latency_max": max(samples) if samples else None
         })
-        
-        # Get the session ID
-        # cursor.execute("SELECT dns_test_sessions_seq.CURRVAL FROM DUAL")
-        cursor.execute("SELECT MAX(session_id) FROM dns_test_sessions")
+        for index, count in latency_sketch.add_values({}, samples).items():
+            bin_rows.append({**key_binds, "bin": index, "bin_count": count})
+    return rollup_rows, bin_rows
 
-        session_id = cursor.fetchone()[0]
-        
-        # Insert individual test results
-        for test_type, test_result in results.test_results.items():
-            # Parse the output based on test type
-            if test_type.startswith(('dig_', 'reverse_lookup')):
-                parsed_data = parse_dig_output(test_result.stdout)
-            elif test_type.startswith('ping_'):
-                parsed_data = parse_ping_output(test_result.stdout)
-            else:
-                parsed_data = {}
-            
-            # Generate rich paragraph
-            rich_summary = generate_rich_paragraph(test_type, test_result, parsed_data)
-            
-            result_query = """
-            INSERT INTO dns_test_results 
-            (session_id, test_type, command_executed, return_code, stdout_raw, 
-             stderr_output, success, parsed_summary)
-            VALUES (:session_id, :test_type, :command, :return_code, :stdout, 
-                    :stderr, :success, :summary)
+def merge_rollup_rows(cursor, statement: str, rows: List[Dict[str, Any]], **input_sizes):
+    """Array MERGE that replays rows whose insert lost a race with another writer
+
+    Two transactions can both miss the same new key and try to insert it;
+    the loser gets ORA-00001 once the winner commits, and the replayed row
+    then takes the update branch.
+    """
+    for _ in range(3):
+        if not rows:
+            return
+        if input_sizes:
+            cursor.setinputsizes(**input_sizes)
+        cursor.executemany(statement, rows, batcherrors=True)
+        replay = []
+        for error in cursor.getbatcherrors():
+            if "ORA-00001" not in error.message:
+                raise oracledb.DatabaseError(error)
+            replay.append(rows[error.offset])
+        rows = replay
+    if rows:
+        raise oracledb.DatabaseError(f"Rollup merge still conflicting after retries for {len(rows)} rows")
+
+def update_latency_rollups(cursor, sessions: List[TestSession]):
+    with stage("rollups"):
+        rollup_rows, bin_rows = build_rollup_rows(sessions, datetime.now())
+        # Keys without latency samples bind NULL min/max; declare the type for the whole batch
+        merge_rollup_rows(
+            cursor, ROLLUP_MERGE, rollup_rows,
+            latency_sum=oracledb.DB_TYPE_NUMBER,
+            latency_min=oracledb.DB_TYPE_NUMBER,
+            latency_max=oracledb.DB_TYPE_NUMBER
+        )
+        merge_rollup_rows(cursor, ROLLUP_BIN_MERGE, bin_rows)
+
+def write_dns_test_sessions(connection, sessions: List[TestSession]) -> List[int]:
+    """Insert test sessions and their results on the given connection
+
+    All session rows go out in one array bind that returns their identities,
+    followed by one array bind for every result row, and a single commit.
+    Sessions that already carry a pre-allocated session_id are inserted with
+    it and their own test time.
+    """
+    cursor = connection.cursor()
+    
+    try:
+        session_rows = [
+            {
+                'dns_ip': session.input_data.dns_ip,
+                'host_ip': session.input_data.host_ip,
+                'domain': session.input_data.domain,
+                'host1_prefix': session.input_data.host1_prefix,
+                'host2_prefix': session.input_data.host2_prefix,
+                'success': 1 if session.results.success else 0
+            }
+            for session in sessions
+        ]
+        if all(session.session_id is not None for session in sessions):
+            for row, session in zip(session_rows, sessions):
+                row['session_id'] = session.session_id
+                row['tested_at'] = session.tested_at
+            cursor.setinputsizes(tested_at=oracledb.DB_TYPE_TIMESTAMP)
+            cursor.executemany("""
+            INSERT INTO dns_test_sessions 
+            (session_id, dns_ip, host_ip, domain, host1_prefix, host2_prefix, test_timestamp, success)
+            VALUES (:session_id, :dns_ip, :host_ip, :domain, :host1_prefix, :host2_prefix,
+                    NVL(:tested_at, CURRENT_TIMESTAMP), :success)
+            """, session_rows)
+            session_ids = [session.session_id for session in sessions]
+        else:
+            # Insert session records and capture their identities in the same round trip
+            session_query = """
+            INSERT INTO dns_test_sessions 
+            (dns_ip, host_ip, domain, host1_prefix, host2_prefix, success)
+            VALUES (:dns_ip, :host_ip, :domain, :host1_prefix, :host2_prefix, :success)
+            RETURNING session_id INTO :session_id
             """
             
-            cursor.execute(result_query, {
-                'session_id': session_id,
-                'test_type': test_type,
-                'command': test_result.command,
-                'return_code': test_result.returncode,
-                'stdout': test_result.stdout,
-                'stderr': test_result.stderr,
-                'success': 1 if test_result.success else 0,
-                'summary': rich_summary
-            })
+            session_id_var = cursor.var(int, arraysize=len(sessions))
+            cursor.setinputsizes(session_id=session_id_var)
+            cursor.executemany(session_query, session_rows)
+            session_ids = [session_id_var.getvalue(i)[0] for i in range(len(sessions))]
         
-        db_manager.connection.commit()
-        return session_id
+        # Build all result rows, then insert them with one array bind
+        codec = RESULT_OUTPUT_CODEC
+        result_rows = []
+        for session_id, session in zip(session_ids, sessions):
+            for test_type, item in session.processed.items():
+                test_result = item.result
+                stdout = test_result.stdout
+                stderr = test_result.stderr or test_result.error or ''
+                result_rows.append({
+                    'session_id': session_id,
+                    'test_type': test_type,
+                    'command': test_result.command,
+                    'return_code': test_result.returncode,
+                    'stdout': None if codec else stdout,
+                    'stderr': None if codec else stderr,
+                    'stdout_blob': compress_output(stdout, codec) if codec else None,
+                    'stderr_blob': compress_output(stderr, codec) if codec else None,
+                    'output_codec': codec,
+                    'success': 1 if test_result.success else 0,
+                    'summary': item.rich_summary,
+                    'parsed_json': json.dumps(item.parsed_data)
+                })
+        
+        result_query = """
+        INSERT INTO dns_test_results 
+        (session_id, test_type, command_executed, return_code, stdout_raw, 
+         stderr_output, stdout_blob, stderr_blob, output_codec, success, parsed_summary, parsed_json)
+        VALUES (:session_id, :test_type, :command, :return_code, :stdout, 
+                :stderr, :stdout_blob, :stderr_blob, :output_codec, :success, :summary, :parsed_json)
+        """
+        
+        if result_rows:
+            # Declare the text and binary binds up front so executemany never re-binds mid-batch.
+            # LONG/LONG_RAW binds go into the CLOB/BLOB columns without a temporary LOB per value.
+            cursor.setinputsizes(
+                command=oracledb.DB_TYPE_LONG,
+                stdout=oracledb.DB_TYPE_LONG,
+                stderr=oracledb.DB_TYPE_LONG,
+                stdout_blob=oracledb.DB_TYPE_LONG_RAW,
+                stderr_blob=oracledb.DB_TYPE_LONG_RAW,
+                output_codec=oracledb.DB_TYPE_VARCHAR,
+                summary=oracledb.DB_TYPE_LONG,
+                parsed_json=oracledb.DB_TYPE_LONG
+            )
+            cursor.executemany(result_query, result_rows)
+        
+        if LATENCY_ROLLUPS:
+            update_latency_rollups(cursor, sessions)
+        
+        connection.commit()
+        return session_ids
     
     except Exception as e:
-        db_manager.connection.rollback()
+        connection.rollback()
         logger.error(f"Error saving DNS test results: {e}")
         raise
     finally:
         cursor.close()
 
+def dns_test_key(input_data: DNSTestInput) -> tuple:
+    """Normalized identity of a test target, used to coalesce duplicate runs"""
+    return (
+        input_data.dns_ip.strip(),
+        input_data.host_ip.strip(),
+        input_data.domain.strip().rstrip(".").lower(),
+        input_data.host1_prefix.strip().lower(),
+        input_data.host2_prefix.strip().lower()
+    )
+
 @app.post("/test-dns")
 async def test_dns(input_data: DNSTestInput):
-    """Test DNS configuration and save results to database"""
+    """Test DNS configuration and save results to database
+
+    Concurrent requests for the same target share one probe run and session;
+    `shared` is true in the responses that did not start the run.
+    """
+    if not TEST_DNS_COALESCE:
+        return {**await run_dns_test(input_data), "shared": False}
+    result, shared = await test_dns_flight.run(dns_test_key(input_data), lambda: run_dns_test(input_data))
+    return {**result, "input_parameters": input_data.dict(), "shared": shared}
+
+async def run_dns_test(input_data: DNSTestInput) -> Dict[str, Any]:
+    """Run the probes on the backend, then parse, summarize and save them as one session"""
     try:
-        # Here you would call your existing backend API
-        # For now, I'll simulate the response structure based on your document
-        
-        # Simulate calling the backend API (replace with actual HTTP call)
-        import httpx
-        async with httpx.AsyncClient() as client:
-            try:
-                response = requests.post(
-                    "http://10.42.0.1:5000/test-dns", json=input_data.dict())
-                backend_results = response.json()
-                logger.debug(backend_results)
-                backend_results = response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Backend API error: {e}, Response: {e.response.text}")
-                raise HTTPException(status_code=500, detail=f"Backend API error: {e}, Response: {e.response.text}")
-            except httpx.RequestError as e:
-                logger.error(f"Error connecting to backend API: {e}")
-                raise HTTPException(status_code=500, detail=f"Error connecting to backend API: {e}")
+        try:
+            backend_results = await backend_client.post("/test-dns", input_data.dict())
+            logger.debug(backend_results)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Backend API error: {e}, Response: {e.response.text}")
+            raise HTTPException(status_code=500, detail=f"Backend API error: {e}, Response: {e.response.text}")
+        except httpx.RequestError as e:
+            logger.error(f"Error connecting to backend API: {e}")
+            raise HTTPException(status_code=500, detail=f"Error connecting to backend API: {e}")
 
         
         # Convert to our model
-        test_results = DNSTestResults(**backend_results)
+        with stage("validate"):
+            test_results = DNSTestResults(**backend_results)
         
-        # Save to database
-        session_id = await save_dns_test_results(input_data, test_results)
+        # Parse and summarize once; the same objects feed the DB write and the response
+        processed = process_test_results(test_results)
         
-        # Generate formatted output with rich paragraphs
-        formatted_results = {}
+        # Save to database
+        with stage("save"):
+            session_id = await save_dns_test_results(input_data, test_results, processed)
         
-        for test_type, test_result in test_results.test_results.items():
-            # Parse the output
-            if test_type.startswith(('dig_', 'reverse_lookup')):
-                parsed_data = parse_dig_output(test_result.stdout)
-            elif test_type.startswith('ping_'):
-                parsed_data = parse_ping_output(test_result.stdout)
-            else:
-                parsed_data = {}
-            
-            # Generate rich paragraph
-            rich_summary = generate_rich_paragraph(test_type, test_result, parsed_data)
-            
-            formatted_results[test_type] = {
-                "command": test_result.command,
-                "success": test_result.success,
-                "return_code": test_result.returncode,
-                "rich_summary": rich_summary,
-                "parsed_data": parsed_data,
-                "raw_stdout": test_result.stdout,
-                "stderr": test_result.stderr
-            }
-        logger.info(json.dumps(formatted_results, indent=4))
+        formatted_results = {
+            test_type: item.to_response() for test_type, item in processed.items()
+        }
+        with stage("log"):
+            logger.info(json.dumps(formatted_results, indent=4))
         return {
             "success": test_results.success,
             "session_id": session_id,
@@ -483,61 +1655,925 @@ async def test_dns(input_data: DNSTestInput):
         logger.error(f"Error in test-dns endpoint: {type(e)}, {e}") # Log the exception type
         raise HTTPException(status_code=500, detail=f"{type(e)}: {e}") # Include the type in the detail 
 
+def write_dns_configuration(connection, input_data: DNSConfigInput, configurations: Dict[str, Any]):
+    """Insert a generated configuration on the given connection"""
+    write_dns_configurations(connection, [(input_data, configurations)])
+
+CONFIG_TEXT_COLUMNS = ("forward_zone", "reverse_zone", "named_conf_zones", "options_config")
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+# Hash lookups bind fixed-size IN lists padded with NULLs: every lookup shares one
+# statement, and no list comes near Oracle's 1000-expression limit (ORA-01795)
+HASH_LOOKUP_CHUNK = 100
+HASH_IN_LIST = ", ".join(f":h{i}" for i in range(HASH_LOOKUP_CHUNK))
+
+def hash_lookup_binds(hashes: List[str]):
+    for offset in range(0, len(hashes), HASH_LOOKUP_CHUNK):
+        chunk = hashes[offset:offset + HASH_LOOKUP_CHUNK]
+        chunk += [None] * (HASH_LOOKUP_CHUNK - len(chunk))
+        yield {f"h{i}": h for i, h in enumerate(chunk)}
+
+def store_config_blobs(cursor, blobs: Dict[str, str]) -> Dict[str, str]:
+    """Insert the blobs that are not stored yet; known hashes cost no LOB I/O
+
+    Returns the blobs the cache did not know yet. The caller adds them to
+    the cache with cache_config_blobs() once its transaction has committed.
+    """
+    unknown = [h for h in blobs if config_blob_cache.peek(h) is None]
+    if unknown:
+        existing = set()
+        for binds in hash_lookup_binds(unknown):
+            cursor.execute(f"SELECT content_hash FROM dns_config_blobs WHERE content_hash IN ({HASH_IN_LIST})", binds)
+            existing.update(row[0] for row in cursor.fetchall())
+        missing = [h for h in unknown if h not in existing]
+        if missing:
+            cursor.setinputsizes(content=oracledb.DB_TYPE_LONG)
+            # A concurrent writer may insert the same blob first; that duplicate is harmless
+            cursor.executemany("""
+            INSERT INTO dns_config_blobs (content_hash, content, byte_length)
+            VALUES (:content_hash, :content, :byte_length)
+            """, [
+                {"content_hash": h, "content": blobs[h], "byte_length": len(blobs[h].encode("utf-8"))}
+                for h in missing
+            ], batcherrors=True)
+            for error in cursor.getbatcherrors():
+                if "ORA-00001" not in error.message:
+                    raise oracledb.DatabaseError(error)
+    return {h: blobs[h] for h in unknown}
+
+def cache_config_blobs(blobs: Dict[str, str]):
+    """Remember committed blobs so later writes and reads skip them"""
+    for h, text in blobs.items():
+        config_blob_cache.set(h, text, size=len(text))
+
+def insert_dns_configurations(cursor, items: List[Any], returning: bool = False):
+    """Insert (DNSConfigInput, configurations) pairs, storing file contents as deduplicated blobs
+
+    The dns_configurations rows only carry the content hashes. Returns the
+    new config_ids (when `returning` is set) and the newly stored blobs,
+    which the caller caches after committing.
+    """
+    rows = []
+    blobs = {}
+    for input_data, configurations in items:
+        row = {
+            'dns_ip': input_data.dns_ip,
+            'dns_interface': input_data.dns_interface,
+            'host_ip': input_data.host_ip,
+            'host_interface': input_data.host_interface,
+            'domain': input_data.domain
+        }
+        for column in CONFIG_TEXT_COLUMNS:
+            text = configurations.get(column)
+            if text is None:
+                row[f"{column}_hash"] = None
+                continue
+            digest = content_hash(text)
+            blobs[digest] = text
+            row[f"{column}_hash"] = digest
+        rows.append(row)
+    
+    stored = store_config_blobs(cursor, blobs) if blobs else {}
+    
+    config_query = """
+    INSERT INTO dns_configurations 
+    (dns_ip, dns_interface, host_ip, host_interface, domain, 
+     forward_zone_hash, reverse_zone_hash, named_conf_zones_hash, options_config_hash)
+    VALUES (:dns_ip, :dns_interface, :host_ip, :host_interface, :domain,
+            :forward_zone_hash, :reverse_zone_hash, :named_conf_zones_hash, :options_config_hash)
+    """
+    if not returning:
+        cursor.executemany(config_query, rows)
+        return [], stored
+    config_id_var = cursor.var(int, arraysize=len(rows))
+    cursor.setinputsizes(config_id=config_id_var)
+    cursor.executemany(config_query + " RETURNING config_id INTO :config_id", rows)
+    return [config_id_var.getvalue(i)[0] for i in range(len(rows))], stored
+
+def write_dns_configurations(connection, items: List[Any]):
+    """Insert (DNSConfigInput, configurations) pairs in one transaction"""
+    cursor = connection.cursor()
+    try:
+        _, stored = insert_dns_configurations(cursor, items)
+        connection.commit()
+        cache_config_blobs(stored)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_test_events(input_data: DNSTestInput):
+    """Yield a `result` event per probe as it finishes, then `complete` once the session is saved"""
+    test_results = {}
+    processed = {}
+    try:
+        async for line in backend_client.stream_lines("/test-dns/stream", input_data.dict()):
+            message = json.loads(line)
+            if message.get("done"):
+                if not message.get("success"):
+                    raise RuntimeError(message.get("error", "Backend stream failed"))
+                break
+            test_type = message["test_type"]
+            test_result = TestResult(**message["result"])
+            test_results[test_type] = test_result
+            processed[test_type] = process_test_result(test_type, test_result)
+            yield sse_event("result", {"test_type": test_type, **processed[test_type].to_response()})
+        
+        results = DNSTestResults(success=True, test_results=test_results)
+        session_id = await save_dns_test_results(input_data, results, processed)
+        yield sse_event("complete", {
+            "success": results.success,
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "input_parameters": input_data.dict()
+        })
+    except Exception as e:
+        # Headers are already sent, so report failures in-band
+        logger.error(f"Error in test-dns/stream endpoint: {type(e)}, {e}")
+        yield sse_event("error", {"detail": f"{type(e)}: {e}"})
+
+@app.post("/test-dns/stream")
+async def test_dns_stream(input_data: DNSTestInput):
+    """Test DNS configuration, streaming each probe result as a Server-Sent Event"""
+    return StreamingResponse(
+        stream_test_events(input_data),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/test-dns/batch")
+async def test_dns_batch(input_data: DNSTestBatchInput):
+    """Test many DNS targets in one call and save every session in one transaction"""
+    try:
+        try:
+            backend_results = await backend_client.post(
+                "/test-dns/batch", input_data.dict(), timeout=backend_client.batch_timeout
+            )
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Backend API error: {e}, Response: {e.response.text}")
+            raise HTTPException(status_code=500, detail=f"Backend API error: {e}, Response: {e.response.text}")
+        except httpx.RequestError as e:
+            logger.error(f"Error connecting to backend API: {e}")
+            raise HTTPException(status_code=500, detail=f"Error connecting to backend API: {e}")
+        
+        results = backend_results.get("results", [])
+        if len(results) != len(input_data.targets):
+            # Results are matched to targets by position, so a short or long list can't be attributed
+            logger.error(f"Backend returned {len(results)} batch results for {len(input_data.targets)} targets")
+            raise HTTPException(
+                status_code=502,
+                detail=f"Backend returned {len(results)} results for {len(input_data.targets)} targets"
+            )
+        
+        sessions = []
+        outcomes = []
+        for target, entry in zip(input_data.targets, results):
+            if "test_results" not in entry:
+                outcomes.append({"target": target.dict(), "session_id": None,
+                                 "success": False, "error": entry.get("error")})
+                continue
+            test_results = DNSTestResults(success=entry["success"], test_results=entry["test_results"])
+            processed = process_test_results(test_results)
+            sessions.append(TestSession(input_data=target, results=test_results, processed=processed))
+            outcomes.append({
+                "target": target.dict(),
+                "success": all(item.result.success for item in processed.values()),
+                "failed_tests": [t for t, item in processed.items() if not item.result.success]
+            })
+        
+        session_ids = await save_dns_test_sessions(sessions) if sessions else []
+        ids = iter(session_ids)
+        for outcome in outcomes:
+            if "error" not in outcome:
+                outcome["session_id"] = next(ids)
+        
+        return {
+            "success": all(outcome["success"] for outcome in outcomes),
+            "timestamp": datetime.now().isoformat(),
+            "sessions": outcomes
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in test-dns/batch endpoint: {type(e)}, {e}")
+        raise HTTPException(status_code=500, detail=f"{type(e)}: {e}")
+
+# Continuous monitoring of registered targets. Run the scheduler in one process
+# only (MONITOR_ENABLED=1); the registry endpoints work in every process.
+MONITOR_ENABLED = os.getenv("MONITOR_ENABLED", "0") == "1"
+MONITOR_MIN_INTERVAL = int(os.getenv("MONITOR_MIN_INTERVAL", "30"))
+MONITOR_INPUT_FIELDS = ("dns_ip", "host_ip", "domain", "host1_prefix", "host2_prefix")
+
+class MonitorTarget:
+    """Scheduling state of one registered target"""
+
+    def __init__(self, target_id: int, input_data: DNSTestInput, interval: float, failures: int = 0):
+        self.target_id = target_id
+        self.input_data = input_data
+        self.interval = interval
+        self.failures = failures
+        self.slot = None
+        self.due_at = None
+
+class MonitorScheduler:
+    """Probes registered targets on their own intervals
+
+    Targets wait in a hashed timing wheel of `slots` slots, one per `tick`
+    seconds; a target due further out than one revolution carries the number
+    of remaining rounds. First runs land at a random point of the target's
+    interval and every later delay is jittered by +/- `jitter`, so targets
+    registered together do not fire in the same tick. Probes run under a
+    global and a per-DNS-server limit, their sessions are buffered and saved
+    in batches, and a target that keeps failing backs off exponentially up
+    to `max_backoff` seconds.
+    """
+
+    def __init__(self):
+        self.tick = float(os.getenv("MONITOR_TICK_SECONDS", "1"))
+        self.slots = int(os.getenv("MONITOR_WHEEL_SLOTS", "600"))
+        self.jitter = float(os.getenv("MONITOR_JITTER", "0.1"))
+        self.max_concurrency = int(os.getenv("MONITOR_MAX_CONCURRENCY", "8"))
+        self.per_server_concurrency = int(os.getenv("MONITOR_PER_SERVER_CONCURRENCY", "2"))
+        self.max_backoff = float(os.getenv("MONITOR_MAX_BACKOFF", "3600"))
+        self.batch_size = int(os.getenv("MONITOR_BATCH_SIZE", "50"))
+        self.flush_interval = float(os.getenv("MONITOR_FLUSH_SECONDS", "5"))
+        self.max_pending = int(os.getenv("MONITOR_MAX_PENDING", "1000"))
+        self.stop_timeout = float(os.getenv("MONITOR_STOP_TIMEOUT", "10"))
+        self.targets: Dict[int, MonitorTarget] = {}
+        self.wheel: List[Dict[int, int]] = [{} for _ in range(self.slots)]  # target_id -> rounds left
+        self.position = 0
+        self.pending: List[Dict[str, Any]] = []
+        self.running = False
+        self.probes: set = set()
+        self._loops: List[asyncio.Task] = []
+        self._semaphore = None
+        self._server_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._flush_lock = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._rng = random.Random()
+        self.started_probes = 0
+        self.outcomes = {"ok": 0, "failed": 0, "error": 0}
+        self.dropped_results = 0
+
+    async def start(self):
+        """Load the registry and start the wheel; a no-op unless MONITOR_ENABLED"""
+        if not MONITOR_ENABLED:
+            return
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._flush_lock = asyncio.Lock()
+        self.running = True
+        try:
+            rows = await db_manager.run(fetch_monitor_targets)
+        except Exception as e:
+            logger.error(f"Could not load monitor targets: {e}")
+            rows = []
+        for row in rows:
+            self.register(row)
+        self._loops = [asyncio.ensure_future(self._tick_loop()), asyncio.ensure_future(self._flush_loop())]
+        logger.info(f"Monitor scheduler started with {len(self.targets)} targets")
+
+    async def stop(self):
+        """Stop scheduling, give running probes `stop_timeout` to finish, then save what is buffered"""
+        if not self.running:
+            return
+        self.running = False
+        for task in self._loops:
+            task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        if self.probes:
+            _, unfinished = await asyncio.wait(list(self.probes), timeout=self.stop_timeout)
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+        logger.info("Monitor scheduler stopped")
+
+    def register(self, row: Dict[str, Any]):
+        """(Re)schedule a registry row, replacing any earlier schedule for it"""
+        if not self.running:
+            return
+        self.unregister(row["target_id"])
+        if not row["enabled"]:
+            return
+        target = MonitorTarget(
+            row["target_id"],
+            DNSTestInput(**{field: row[field] for field in MONITOR_INPUT_FIELDS}),
+            row["interval_seconds"],
+            row["consecutive_failures"] or 0
+        )
+        self.targets[target.target_id] = target
+        self._schedule(target, self._rng.uniform(0, target.interval))
+
+    def unregister(self, target_id: int):
+        target = self.targets.pop(target_id, None)
+        if target is not None and target.slot is not None:
+            self.wheel[target.slot].pop(target_id, None)
+
+    def next_run_in(self, target_id: int) -> Optional[float]:
+        target = self.targets.get(target_id)
+        if target is None or target.due_at is None:
+            return None
+        return round(max(0.0, target.due_at - asyncio.get_running_loop().time()), 1)
+
+    def _schedule(self, target: MonitorTarget, delay: float):
+        ticks = max(1, math.ceil(delay / self.tick))
+        target.slot = (self.position + ticks) % self.slots
+        target.due_at = asyncio.get_running_loop().time() + ticks * self.tick
+        self.wheel[target.slot][target.target_id] = (ticks - 1) // self.slots
+
+    def _next_delay(self, target: MonitorTarget) -> float:
+        delay = target.interval
+        if target.failures > 1:
+            backoff = target.interval * 2 ** min(target.failures - 1, 16)
+            delay = min(backoff, max(self.max_backoff, target.interval))
+        return delay * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _advance(self):
+        self.position += 1
+        slot = self.wheel[self.position % self.slots]
+        due = []
+        for target_id, rounds in list(slot.items()):
+            if rounds:
+                slot[target_id] = rounds - 1
+            else:
+                del slot[target_id]
+                due.append(self.targets[target_id])
+        for target in due:
+            target.slot = None
+            task = asyncio.ensure_future(self._probe(target))
+            self.probes.add(task)
+            task.add_done_callback(self.probes.discard)
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # Catch up on ticks missed while the event loop was busy
+            while next_tick <= loop.time():
+                self._advance()
+                next_tick += self.tick
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.pending:
+                await self.flush()
+
+    def _server_semaphore(self, dns_ip: str) -> asyncio.Semaphore:
+        semaphore = self._server_semaphores.get(dns_ip)
+        if semaphore is None:
+            semaphore = self._server_semaphores[dns_ip] = asyncio.Semaphore(self.per_server_concurrency)
+        return semaphore
+
+    async def _probe(self, target: MonitorTarget):
+        async with self._semaphore, self._server_semaphore(target.input_data.dns_ip):
+            MONITOR_LAG_SECONDS.observe(max(0.0, asyncio.get_running_loop().time() - target.due_at))
+            self.started_probes += 1
+            run_at = datetime.now()
+            session = None
+            error = None
+            try:
+                backend_results = await backend_client.post("/test-dns", target.input_data.dict())
+                results = DNSTestResults(**backend_results)
+                processed = process_test_results(results)
+                session = TestSession(
+                    input_data=target.input_data, results=results, processed=processed, tested_at=run_at
+                )
+                success = results.success and all(item.result.success for item in processed.values())
+                outcome = "ok" if success else "failed"
+            except Exception as e:
+                success = False
+                outcome = "error"
+                error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Monitor probe of target {target.target_id} failed: {error}")
+        
+        MONITOR_RUNS.labels(outcome).inc()
+        self.outcomes[outcome] += 1
+        target.failures = 0 if success else target.failures + 1
+        self._buffer({
+            "target_id": target.target_id,
+            "session": session,
+            "run_at": run_at,
+            "success": success,
+            "error": error,
+            "failures": target.failures
+        })
+        if self.running and self.targets.get(target.target_id) is target:
+            self._schedule(target, self._next_delay(target))
+
+    def _buffer(self, entry: Dict[str, Any]):
+        self.pending.append(entry)
+        overflow = len(self.pending) - self.max_pending
+        if overflow > 0:
+            del self.pending[:overflow]
+            self.dropped_results += overflow
+            logger.warning(f"Monitor result buffer full, dropped {overflow} oldest results")
+        if len(self.pending) >= self.batch_size and not self._flush_lock.locked() and self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self.flush())
+            self._flush_task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._flush_task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Monitor flush failed: {task.exception()}")
+
+    async def flush(self):
+        """Save buffered sessions in batched transactions, then record each target's last run"""
+        async with self._flush_lock:
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                del self.pending[:len(batch)]
+                sessions = [entry["session"] for entry in batch if entry["session"] is not None]
+                try:
+                    session_ids = iter(await save_dns_test_sessions(sessions) if sessions else [])
+                except Exception as e:
+                    # Keep the batch for the next flush; the buffer limit still applies
+                    logger.error(f"Monitor flush failed, retrying {len(batch)} results later: {e}")
+                    self.pending[:0] = batch
+                    overflow = len(self.pending) - self.max_pending
+                    if overflow > 0:
+                        del self.pending[:overflow]
+                        self.dropped_results += overflow
+                    return
+                statuses = []
+                for entry in batch:
+                    statuses.append({
+                        "target_id": entry["target_id"],
+                        "last_run_at": entry["run_at"],
+                        "last_success": 1 if entry["success"] else 0,
+                        "last_session_id": next(session_ids) if entry["session"] is not None else None,
+                        "last_error": (entry["error"] or "")[:1000] or None,
+                        "consecutive_failures": entry["failures"]
+                    })
+                try:
+                    await db_manager.run(write_monitor_statuses, statuses)
+                except Exception as e:
+                    logger.error(f"Could not record monitor target status: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": MONITOR_ENABLED,
+            "running": self.running,
+            "targets": len(self.targets),
+            "backing_off": sum(1 for target in self.targets.values() if target.failures > 1),
+            "probing": len(self.probes),
+            "pending_results": len(self.pending),
+            "tick_seconds": self.tick,
+            "wheel_slots": self.slots,
+            "jitter": self.jitter,
+            "max_concurrency": self.max_concurrency,
+            "per_server_concurrency": self.per_server_concurrency,
+            "probes_started": self.started_probes,
+            "outcomes": dict(self.outcomes),
+            "dropped_results": self.dropped_results
+        }
+
+monitor_scheduler = MonitorScheduler()
+Gauge("dns_api_monitor_targets", "Targets scheduled by the monitor").set_function(
+    lambda: len(monitor_scheduler.targets)
+)
+Gauge("dns_api_monitor_pending_results", "Monitor results waiting to be saved").set_function(
+    lambda: len(monitor_scheduler.pending)
+)
+
+MONITOR_TARGET_COLUMNS = [
+    "target_id", "dns_ip", "host_ip", "domain", "host1_prefix", "host2_prefix", "interval_seconds",
+    "enabled", "consecutive_failures", "last_run_at", "last_success", "last_session_id", "last_error",
+    "created_at"
+]
+
+def fetch_monitor_targets(connection, target_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    cursor = connection.cursor()
+    cursor.arraysize = 500
+    try:
+        where = "WHERE target_id = :target_id" if target_id is not None else ""
+        cursor.execute(
+            f"SELECT {', '.join(MONITOR_TARGET_COLUMNS)} FROM dns_monitor_targets {where} ORDER BY target_id",
+            {"target_id": target_id} if target_id is not None else {}
+        )
+        return [dict(zip(MONITOR_TARGET_COLUMNS, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def insert_monitor_target(connection, target: MonitorTargetInput) -> Dict[str, Any]:
+    cursor = connection.cursor()
+    try:
+        target_id = cursor.var(int)
+        cursor.execute("""
+        INSERT INTO dns_monitor_targets
+        (dns_ip, host_ip, domain, host1_prefix, host2_prefix, interval_seconds, enabled)
+        VALUES (:dns_ip, :host_ip, :domain, :host1_prefix, :host2_prefix, :interval_seconds, :enabled)
+        RETURNING target_id INTO :target_id
+        """, {
+            **{field: getattr(target, field) for field in MONITOR_INPUT_FIELDS},
+            "interval_seconds": target.interval_seconds,
+            "enabled": 1 if target.enabled else 0,
+            "target_id": target_id
+        })
+        connection.commit()
+    finally:
+        cursor.close()
+    return fetch_monitor_targets(connection, target_id.getvalue()[0])[0]
+
+def update_monitor_target(connection, target_id: int, changes: MonitorTargetUpdate) -> Optional[Dict[str, Any]]:
+    """Apply interval/enabled changes and clear the failure streak; None if the target is unknown"""
+    assignments = ["consecutive_failures = 0"]
+    binds = {"target_id": target_id}
+    if changes.interval_seconds is not None:
+        assignments.append("interval_seconds = :interval_seconds")
+        binds["interval_seconds"] = changes.interval_seconds
+    if changes.enabled is not None:
+        assignments.append("enabled = :enabled")
+        binds["enabled"] = 1 if changes.enabled else 0
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            f"UPDATE dns_monitor_targets SET {', '.join(assignments)} WHERE target_id = :target_id", binds
+        )
+        updated = cursor.rowcount
+        connection.commit()
+    finally:
+        cursor.close()
+    if not updated:
+        return None
+    return fetch_monitor_targets(connection, target_id)[0]
+
+def delete_monitor_target(connection, target_id: int) -> bool:
+    cursor = connection.cursor()
+    try:
+        cursor.execute("DELETE FROM dns_monitor_targets WHERE target_id = :target_id", {"target_id": target_id})
+        deleted = cursor.rowcount
+        connection.commit()
+        return deleted > 0
+    finally:
+        cursor.close()
+
+def write_monitor_statuses(connection, statuses: List[Dict[str, Any]]):
+    """Record the latest run of each target in one array update"""
+    cursor = connection.cursor()
+    try:
+        cursor.setinputsizes(last_session_id=oracledb.DB_TYPE_NUMBER, last_error=oracledb.DB_TYPE_VARCHAR)
+        cursor.executemany("""
+        UPDATE dns_monitor_targets
+        SET last_run_at = :last_run_at, last_success = :last_success, last_session_id = :last_session_id,
+            last_error = :last_error, consecutive_failures = :consecutive_failures
+        WHERE target_id = :target_id
+        """, statuses)
+        connection.commit()
+    finally:
+        cursor.close()
+
+def monitor_target_response(row: Dict[str, Any]) -> Dict[str, Any]:
+    item = dict(row)
+    item["enabled"] = bool(item["enabled"])
+    if item["last_success"] is not None:
+        item["last_success"] = bool(item["last_success"])
+    for column in ("last_run_at", "created_at"):
+        if item[column] is not None:
+            item[column] = item[column].isoformat()
+    item["next_run_in"] = monitor_scheduler.next_run_in(item["target_id"])
+    return item
+
+def validate_monitor_interval(interval_seconds: Optional[int]):
+    if interval_seconds is not None and interval_seconds < MONITOR_MIN_INTERVAL:
+        raise HTTPException(
+            status_code=400, detail=f"interval_seconds must be at least {MONITOR_MIN_INTERVAL}"
+        )
+
+@app.post("/monitor/targets")
+async def create_monitor_target(target: MonitorTargetInput):
+    """Register a target for periodic testing"""
+    validate_monitor_interval(target.interval_seconds)
+    try:
+        row = await db_manager.run(insert_monitor_target, target)
+    except oracledb.IntegrityError:
+        raise HTTPException(status_code=409, detail="Target is already registered")
+    except Exception as e:
+        logger.error(f"Error registering monitor target: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    monitor_scheduler.register(row)
+    return monitor_target_response(row)
+
+@app.get("/monitor/targets")
+async def list_monitor_targets():
+    """List registered targets with their last run and, on the scheduling process, the next one"""
+    rows = await db_manager.run(fetch_monitor_targets)
+    return {"items": [monitor_target_response(row) for row in rows]}
+
+@app.get("/monitor/targets/{target_id}")
+async def get_monitor_target(target_id: int):
+    rows = await db_manager.run(fetch_monitor_targets, target_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Target not found")
+    return monitor_target_response(rows[0])
+
+@app.put("/monitor/targets/{target_id}")
+async def update_monitor_target_endpoint(target_id: int, changes: MonitorTargetUpdate):
+    """Change a target's interval or pause/resume it; also resets its backoff"""
+    validate_monitor_interval(changes.interval_seconds)
+    row = await db_manager.run(update_monitor_target, target_id, changes)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Target not found")
+    monitor_scheduler.register(row)
+    return monitor_target_response(row)
+
+@app.delete("/monitor/targets/{target_id}")
+async def delete_monitor_target_endpoint(target_id: int):
+    if not await db_manager.run(delete_monitor_target, target_id):
+        raise HTTPException(status_code=404, detail="Target not found")
+    monitor_scheduler.unregister(target_id)
+    return {"deleted": target_id}
+
+@app.get("/monitor/stats")
+async def monitor_stats():
+    """Report the scheduler's configuration, queue and probe counters"""
+    return monitor_scheduler.stats()
+
 @app.post("/generate-dns-config")
 async def generate_dns_config(input_data: DNSConfigInput):
     """Generate DNS configuration and save to database"""
     try:
-        response = requests.post(
-            "http://10.42.0.1:5000/generate-dns-config", json=input_data.dict())
-        backend_results = response.json()
+        backend_results = await backend_client.post("/generate-dns-config", input_data.dict())
         logger.debug(backend_results)
         # Save configuration to database
-        cursor = db_manager.connection.cursor()
-        config_query = """
-        INSERT INTO dns_configurations 
-        (dns_ip, dns_interface, host_ip, host_interface, domain, 
-         forward_zone, reverse_zone, named_conf_zones, options_config)
-        VALUES (:dns_ip, :dns_interface, :host_ip, :host_interface, :domain,
-                :forward_zone, :reverse_zone, :named_conf_zones, :options_config)
-        """
-        
         configurations = backend_results.get("configurations", {})
-        cursor.execute(config_query, {
-            'dns_ip': input_data.dns_ip,
-            'dns_interface': input_data.dns_interface,
-            'host_ip': input_data.host_ip,
-            'host_interface': input_data.host_interface,
+        await db_manager.run(write_dns_configuration, input_data, configurations)
+        config_search_cache.invalidate(input_data.dns_interface)
+        
+        return backend_results
+        
+    except Exception as e:
+        logger.error(f"Error in generate-dns-config endpoint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/generate-dns-config/bulk")
+async def generate_dns_config_bulk(input_data: DNSConfigBulkInput):
+    """Generate configurations for many domains and save them in one batched insert"""
+    try:
+        backend_results = await backend_client.post(
+            "/generate-dns-config/bulk", input_data.dict(), timeout=backend_client.batch_timeout
+        )
+        results = backend_results.get("results", [])
+        
+        generated = [
+            (config, result["configurations"])
+            for config, result in zip(input_data.configs, results)
+            if result.get("success")
+        ]
+        if generated:
+            await db_manager.run(write_dns_configurations, generated)
+            for dns_interface in {config.dns_interface for config, _ in generated}:
+                config_search_cache.invalidate(dns_interface)
+        
+        return backend_results
+        
+    except Exception as e:
+        logger.error(f"Error in generate-dns-config/bulk endpoint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# A full record snapshot is stored after this many deltas so replays stay short
+ZONE_SNAPSHOT_INTERVAL = int(os.getenv("ZONE_SNAPSHOT_INTERVAL", "10"))
+ZONES = ("forward", "reverse")
+# Concurrent updates of one domain (from any worker) race on the unique
+# (domain, serial) key; the loser re-reads the history and tries again
+ZONE_WRITE_ATTEMPTS = int(os.getenv("ZONE_WRITE_ATTEMPTS", "3"))
+
+def canonical_records(records: Dict[str, List[Dict[str, str]]]) -> Dict[str, List[List[str]]]:
+    """Sorted [name, type, value] triples per zone, comparable across versions"""
+    return {
+        zone: sorted([r["name"], r["type"], r["value"]] for r in records.get(zone, []))
+        for zone in ZONES
+    }
+
+def diff_zone_records(old: Dict[str, List[List[str]]], new: Dict[str, List[List[str]]]) -> Dict[str, Any]:
+    """Records removed from and added to each zone between two versions"""
+    delta = {}
+    for zone in ZONES:
+        old_set = {tuple(r) for r in old.get(zone, [])}
+        new_set = {tuple(r) for r in new.get(zone, [])}
+        delta[zone] = {
+            "removed": sorted(list(r) for r in old_set - new_set),
+            "added": sorted(list(r) for r in new_set - old_set)
+        }
+    return delta
+
+def apply_zone_delta(records: Dict[str, List[List[str]]], delta: Dict[str, Any]) -> Dict[str, List[List[str]]]:
+    applied = {}
+    for zone in ZONES:
+        current = {tuple(r) for r in records.get(zone, [])}
+        current -= {tuple(r) for r in delta[zone]["removed"]}
+        current |= {tuple(r) for r in delta[zone]["added"]}
+        applied[zone] = sorted(list(r) for r in current)
+    return applied
+
+def replay_zone_versions(versions: List[Dict[str, Any]], until_serial: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Rebuild the record set from a FULL snapshot and the deltas after it
+
+    Stops after `until_serial` when given. Returns None if there is nothing to replay.
+    """
+    state = None
+    for version in versions:
+        if until_serial is not None and version["serial"] > until_serial:
+            break
+        if version["kind"] == "FULL":
+            state = {"records": version["records"], "chain_length": 0}
+        elif state is not None:
+            state = {"records": apply_zone_delta(state["records"], version["records"]),
+                     "chain_length": state["chain_length"] + 1}
+        else:
+            continue
+        state["serial"] = version["serial"]
+        state["version_id"] = version["version_id"]
+    return state
+
+def fetch_zone_versions(connection, domain: str, snapshot_at_or_before: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Read the zone versions from the latest usable FULL snapshot onwards, in one query
+
+    With `snapshot_at_or_before`, replay starts from the newest snapshot whose
+    serial is not greater than it; otherwise from the newest snapshot.
+    """
+    cursor = history_cursor(connection)
+    try:
+        cursor.execute("""
+        SELECT version_id, serial, version_kind, records_json
+        FROM dns_zone_versions
+        WHERE domain = :domain
+          AND version_id >= NVL((
+              SELECT MAX(version_id) FROM dns_zone_versions
+              WHERE domain = :domain AND version_kind = 'FULL'
+                AND (:snapshot_serial IS NULL OR serial <= :snapshot_serial)
+          ), 0)
+        ORDER BY version_id
+        """, {'domain': domain, 'snapshot_serial': snapshot_at_or_before})
+        return [
+            {"version_id": row[0], "serial": int(row[1]), "kind": row[2], "records": json.loads(lob_text(row[3]))}
+            for row in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+
+def write_zone_version(connection, input_data: DNSConfigInput, serial: int, kind: str,
+                       records_json: str, configurations: Optional[Dict[str, Any]]) -> int:
+    """Store a zone version; FULL versions also store the rendered configuration"""
+    cursor = connection.cursor()
+    try:
+        config_id = None
+        stored = {}
+        if kind == "FULL":
+            config_ids, stored = insert_dns_configurations(cursor, [(input_data, configurations)], returning=True)
+            config_id = config_ids[0]
+        
+        version_id_var = cursor.var(int)
+        cursor.execute("""
+        INSERT INTO dns_zone_versions (domain, serial, version_kind, config_id, records_json)
+        VALUES (:domain, :serial, :kind, :config_id, :records_json)
+        RETURNING version_id INTO :version_id
+        """, {
             'domain': input_data.domain,
-            'forward_zone': configurations.get('forward_zone'),
-            'reverse_zone': configurations.get('reverse_zone'),
-            'named_conf_zones': configurations.get('named_conf_zones'),
-            'options_config': configurations.get('options_config')
+            'serial': serial,
+            'kind': kind,
+            'config_id': config_id,
+            'records_json': records_json,
+            'version_id': version_id_var
         })
-        
-        db_manager.connection.commit()
+        connection.commit()
+        cache_config_blobs(stored)
+        return version_id_var.getvalue()[0]
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
         cursor.close()
+
+def ixfr_sets(delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Render a delta as IXFR-style removed/added record lines per zone"""
+    return {
+        zone: {
+            "removed": [" ".join(r) for r in delta[zone]["removed"]],
+            "added": [" ".join(r) for r in delta[zone]["added"]]
+        }
+        for zone in ZONES
+    }
+
+@app.post("/generate-dns-config/incremental")
+async def generate_dns_config_incremental(input_data: DNSConfigInput):
+    """Generate a configuration and store only what changed since the domain's last version
+
+    The serial is bumped monotonically from the last stored one; when a
+    concurrent update stores that serial first, the request starts over from
+    the new history. A FULL
+    snapshot (records plus rendered files) is stored for the first version
+    and every ZONE_SNAPSHOT_INTERVAL deltas; otherwise only the added and
+    removed records are stored.
+    """
+    try:
+        for attempt in range(1, ZONE_WRITE_ATTEMPTS + 1):
+            versions = await db_manager.run(fetch_zone_versions, input_data.domain)
+            state = replay_zone_versions(versions)
+            previous_serial = state["serial"] if state else None
+            
+            payload = input_data.dict()
+            payload["previous_serial"] = previous_serial
+            backend_results = await backend_client.post("/generate-dns-config", payload)
+            new_records = canonical_records(backend_results["records"])
+            
+            if state and new_records == state["records"]:
+                return {
+                    "success": True,
+                    "changed": False,
+                    "domain": input_data.domain,
+                    "serial": previous_serial
+                }
+            
+            serial = int(backend_results["serial"])
+            delta = diff_zone_records(state["records"] if state else {}, new_records)
+            if state is None or state["chain_length"] + 1 >= ZONE_SNAPSHOT_INTERVAL:
+                kind, stored = "FULL", new_records
+            else:
+                kind, stored = "DELTA", delta
+            try:
+                version_id = await db_manager.run(
+                    write_zone_version, input_data, serial, kind, json.dumps(stored),
+                    backend_results.get("configurations", {})
+                )
+                break
+            except oracledb.IntegrityError as e:
+                if "ORA-00001" not in str(e):
+                    raise
+                logger.info(
+                    f"Serial {serial} of {input_data.domain} was taken by a concurrent update "
+                    f"(attempt {attempt}/{ZONE_WRITE_ATTEMPTS})"
+                )
+        else:
+            raise HTTPException(
+                status_code=409, detail=f"Concurrent updates of {input_data.domain} kept conflicting, retry later"
+            )
         
-        return backend_results
+        if kind == "FULL":
+            config_search_cache.invalidate(input_data.dns_interface)
         
+        return {
+            **backend_results,
+            "changed": True,
+            "incremental": {
+                "version_id": version_id,
+                "kind": kind,
+                "previous_serial": previous_serial,
+                "serial": serial,
+                "ixfr": ixfr_sets(delta)
+            }
+        }
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in generate-dns-config endpoint: {e}")
+        logger.error(f"Error in generate-dns-config/incremental endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/zone-changes/{domain}")
+async def zone_changes(domain: str, from_serial: int):
+    """Net IXFR-style record changes for a domain since `from_serial`"""
+    versions = await db_manager.run(fetch_zone_versions, domain, from_serial)
+    if not versions:
+        raise HTTPException(status_code=404, detail="Zone not found")
+    
+    current = replay_zone_versions(versions)
+    if not any(version["serial"] == from_serial for version in versions):
+        # Unknown serial: the client needs the whole zone (AXFR-style)
+        return {
+            "domain": domain,
+            "from_serial": from_serial,
+            "to_serial": current["serial"],
+            "full_transfer": True,
+            "records": {zone: [" ".join(r) for r in current["records"][zone]] for zone in ZONES}
+        }
+    
+    base = replay_zone_versions(versions, until_serial=from_serial)
+    return {
+        "domain": domain,
+        "from_serial": from_serial,
+        "to_serial": current["serial"],
+        "full_transfer": False,
+        "ixfr": ixfr_sets(diff_zone_records(base["records"], current["records"]))
+    }
+
 @app.post("/network-config")
 async def network_config(input_data: NetworkConfigInput):
     """Configure network settings"""
     try:
         # Call backend API
-        # import httpx
-        # async with httpx.AsyncClient() as client:
-        #     response = await client.post(
-        #         "http://10.42.0.1:5000/network-config",
-        #         json=input_data.dict()
-        #     )
-        #     backend_results = response.json()
-        response = requests.post(
-            "http://10.42.0.1:5000/network-config", json=input_data.dict())
-        backend_results = response.json()
+        backend_results = await backend_client.post("/network-config", input_data.dict())
         logger.debug(backend_results)
         
         return backend_results
@@ -587,15 +2623,73 @@ async def network_config(input_data: NetworkConfigInput):
 #     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 # )
 
-@app.get("/search-dns-server-config/{dns_interface}")
-async def search_dns_server_config(dns_interface: str):
-    """Retrieve DNS server configuration by interfaces"""
-    cursor = db_manager.connection.cursor()
+# Read paths fetch CLOBs inline as strings instead of one LOB round trip per value.
+# DB_INLINE_LOBS=0 fetches locators instead, for every read path and value alike.
+DB_INLINE_LOBS = os.getenv("DB_INLINE_LOBS", "1") == "1"
+HISTORY_ARRAYSIZE = int(os.getenv("HISTORY_ARRAYSIZE", "200"))
+
+def inline_lob_handler(cursor, name, default_type, size, precision, scale):
+    """Output type handler that fetches CLOB/BLOB columns as str/bytes"""
+    if default_type == oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+    if default_type == oracledb.DB_TYPE_BLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG_RAW, arraysize=cursor.arraysize)
+
+def history_cursor(connection, rows_expected: int = HISTORY_ARRAYSIZE):
+    """Cursor tuned for the history reads: inline LOBs and one fetch round trip"""
+    cursor = connection.cursor()
+    cursor.arraysize = rows_expected
+    cursor.prefetchrows = rows_expected + 1
+    if DB_INLINE_LOBS:
+        cursor.outputtypehandler = inline_lob_handler
+    return cursor
+
+def lob_text(value):
+    """Return a fetched CLOB value as text, reading it only if it came back as a locator"""
+    if value is None or isinstance(value, (str, bytes)):
+        return value
+    return value.read()
+
+def stored_output(text, blob, codec: Optional[str]) -> Optional[str]:
+    """Probe output from whichever column the row stored it in"""
+    if codec:
+        return decompress_output(lob_text(blob), codec)
+    return lob_text(text)
+
+def resolve_config_blobs(cursor, hashes: List[str]) -> Dict[str, str]:
+    """Map content hashes to text, from the blob cache or with chunked queries for the rest"""
+    resolved = {}
+    missing = []
+    for h in set(hashes):
+        text = config_blob_cache.get(h)
+        if text is None:
+            missing.append(h)
+        else:
+            resolved[h] = text
+    for binds in hash_lookup_binds(missing):
+        cursor.execute(
+            f"SELECT content_hash, content FROM dns_config_blobs WHERE content_hash IN ({HASH_IN_LIST})", binds
+        )
+        for h, content in cursor.fetchall():
+            text = lob_text(content)
+            resolved[h] = text
+            config_blob_cache.set(h, text, size=len(text))
+    return resolved
+
+def fetch_dns_server_configs(connection, dns_interface: str) -> List[Dict[str, Any]]:
+    """Read all configurations stored for an interface
+
+    Rows written before blob deduplication keep their text inline; newer
+    rows reference dns_config_blobs by hash.
+    """
+    cursor = history_cursor(connection)
     
     try:
         query = """
         SELECT 
-            * 
+            config_id, dns_ip, dns_interface, host_ip, host_interface, domain,
+            forward_zone, reverse_zone, named_conf_zones, options_config, created_at,
+            forward_zone_hash, reverse_zone_hash, named_conf_zones_hash, options_config_hash
         FROM dns_configurations 
         WHERE dns_interface = :dns_interface
         """
@@ -603,13 +2697,16 @@ async def search_dns_server_config(dns_interface: str):
         cursor.execute(query, {'dns_interface': dns_interface})
         rows = cursor.fetchall()
         
-        if not rows:
-            raise HTTPException(status_code=404, detail="Session not found")
+        blobs = resolve_config_blobs(cursor, [h for row in rows for h in row[11:15] if h])
         
         configs = []
         
         
         for row in rows:
+            texts = [
+                blobs.get(digest) if digest else lob_text(inline)
+                for inline, digest in zip(row[6:10], row[11:15])
+            ]
             configs.append({
                 "config_id": row[0],
                 "dns_ip": row[1],
@@ -617,10 +2714,10 @@ async def search_dns_server_config(dns_interface: str):
                 "host_ip": row[3],
                 "host_interface": row[4],
                 "domain": row[5],
-                "forward_zone": row[6].read(),
-                "reverse_zone": row[7].read(),
-                "named_conf_zones": row[8].read(),
-                "options_config": row[9].read(),
+                "forward_zone": texts[0],
+                "reverse_zone": texts[1],
+                "named_conf_zones": texts[2],
+                "options_config": texts[3],
                 "created_at": row[10]
             })
         
@@ -629,10 +2726,24 @@ async def search_dns_server_config(dns_interface: str):
     finally:
         cursor.close()
 
-@app.get("/test-results/{session_id}")
-async def get_test_results(session_id: int):
-    """Retrieve test results by session ID"""
-    cursor = db_manager.connection.cursor()
+@app.get("/search-dns-server-config/{dns_interface}")
+async def search_dns_server_config(dns_interface: str):
+    """Retrieve DNS server configuration by interfaces"""
+    configs = config_search_cache.get(dns_interface)
+    if configs is None:
+        generation = config_search_cache.generation(dns_interface)
+        configs = await db_manager.run(fetch_dns_server_configs, dns_interface)
+        if configs:
+            config_search_cache.set(dns_interface, configs, generation=generation)
+    
+    if not configs:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return configs
+
+def fetch_test_results(connection, session_id: int) -> Optional[Dict[str, Any]]:
+    """Read a stored test session with its results, or None if it does not exist"""
+    cursor = history_cursor(connection, rows_expected=16)
     
     try:
         query = """
@@ -640,7 +2751,8 @@ async def get_test_results(session_id: int):
             s.dns_ip, s.host_ip, s.domain, s.host1_prefix, s.host2_prefix,
             s.test_timestamp, s.success as session_success,
             r.test_type, r.command_executed, r.return_code, r.stdout_raw,
-            r.stderr_output, r.success as test_success, r.parsed_summary
+            r.stderr_output, r.success as test_success, r.parsed_summary,
+            r.parsed_json, r.stdout_blob, r.stderr_blob, r.output_codec
         FROM dns_test_sessions s
         JOIN dns_test_results r ON s.session_id = r.session_id
         WHERE s.session_id = :session_id
@@ -651,7 +2763,7 @@ async def get_test_results(session_id: int):
         rows = cursor.fetchall()
         
         if not rows:
-            raise HTTPException(status_code=404, detail="Session not found")
+            return None
         
         # Format results
         session_info = {
@@ -669,12 +2781,13 @@ async def get_test_results(session_id: int):
         for row in rows:
             test_type = row[7]
             test_results[test_type] = {
-                "command": row[8].read(),
+                "command": lob_text(row[8]),
                 "return_code": row[9],
-                "raw_stdout": row[10].read(),
-                "stderr": row[11],
+                "raw_stdout": stored_output(row[10], row[15], row[17]),
+                "stderr": stored_output(row[11], row[16], row[17]),
                 "success": bool(row[12]),
-                "rich_summary": row[13].read()
+                "rich_summary": lob_text(row[13]),
+                "parsed_data": json.loads(lob_text(row[14])) if row[14] is not None else None
             }
         
         return {
@@ -685,6 +2798,280 @@ async def get_test_results(session_id: int):
     finally:
         cursor.close()
 
+def unsaved_test_results(session: TestSession) -> Dict[str, Any]:
+    """The /test-results view of a write-behind session that is not in the database yet"""
+    return {
+        "session_info": {
+            "session_id": session.session_id,
+            **session.input_data.dict(),
+            "timestamp": session.tested_at.isoformat(),
+            "overall_success": session.results.success
+        },
+        "test_results": {test_type: item.to_response() for test_type, item in session.processed.items()}
+    }
+
+@app.get("/test-results/{session_id}")
+async def get_test_results(session_id: int):
+    """Retrieve test results by session ID"""
+    results = session_results_cache.get(session_id)
+    if results is None:
+        unsaved = write_behind.get(session_id)
+        if unsaved is not None:
+            return unsaved_test_results(unsaved)
+    if results is None:
+        results = await db_manager.run(fetch_test_results, session_id)
+        if results is not None:
+            session_results_cache.set(session_id, results)
+    
+    if results is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return results
+
+@app.get("/backend-stats")
+async def backend_stats():
+    """Report backend client limits and current usage"""
+    return backend_client.stats()
+
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 500
+
+def encode_page_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended on"""
+    raw = json.dumps({"t": created_at.isoformat(), "id": row_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_page_cursor(cursor: str):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw["t"]), int(raw["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def fetch_keyset_page(connection, table: str, time_column: str, id_column: str, columns: List[str],
+                      filters: Dict[str, Any], after, limit: int) -> Dict[str, Any]:
+    """Read one page ordered newest first, starting after the (time, id) of the previous page"""
+    conditions = [f"{column} = :{column}" for column in filters]
+    binds = dict(filters)
+    if after is not None:
+        conditions.append(
+            f"({time_column} < :after_time OR ({time_column} = :after_time AND {id_column} < :after_id))"
+        )
+        binds["after_time"], binds["after_id"] = after
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+    SELECT {', '.join(columns)}
+    FROM {table}
+    {where}
+    ORDER BY {time_column} DESC, {id_column} DESC
+    FETCH FIRST :page_rows ROWS ONLY
+    """
+    binds["page_rows"] = limit + 1
+    
+    cursor = history_cursor(connection, rows_expected=limit + 1)
+    try:
+        cursor.execute(query, binds)
+        names = [d[0].lower() for d in cursor.description]
+        rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_page_cursor(last[time_column], last[id_column])
+    return {"items": rows, "next_cursor": next_cursor}
+
+@app.get("/test-sessions")
+async def list_test_sessions(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    domain: Optional[str] = None,
+    dns_ip: Optional[str] = None,
+    success: Optional[bool] = None
+):
+    """List test sessions newest first, one keyset page at a time"""
+    filters = {}
+    if domain is not None:
+        filters["domain"] = domain
+    if dns_ip is not None:
+        filters["dns_ip"] = dns_ip
+    if success is not None:
+        filters["success"] = 1 if success else 0
+    after = decode_page_cursor(cursor) if cursor else None
+    
+    page = await db_manager.run(
+        fetch_keyset_page, "dns_test_sessions", "test_timestamp", "session_id",
+        ["session_id", "dns_ip", "host_ip", "domain", "host1_prefix", "host2_prefix", "test_timestamp", "success"],
+        filters, after, limit
+    )
+    for item in page["items"]:
+        item["timestamp"] = item.pop("test_timestamp").isoformat()
+        item["success"] = bool(item["success"])
+    return page
+
+@app.get("/dns-configurations")
+async def list_dns_configurations(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    domain: Optional[str] = None,
+    dns_ip: Optional[str] = None,
+    dns_interface: Optional[str] = None
+):
+    """List stored configurations newest first, without their file contents"""
+    filters = {}
+    if domain is not None:
+        filters["domain"] = domain
+    if dns_ip is not None:
+        filters["dns_ip"] = dns_ip
+    if dns_interface is not None:
+        filters["dns_interface"] = dns_interface
+    after = decode_page_cursor(cursor) if cursor else None
+    
+    page = await db_manager.run(
+        fetch_keyset_page, "dns_configurations", "created_at", "config_id",
+        ["config_id", "dns_ip", "dns_interface", "host_ip", "host_interface", "domain", "created_at"],
+        filters, after, limit
+    )
+    for item in page["items"]:
+        item["created_at"] = item["created_at"].isoformat()
+    return page
+
+TRENDS_INTERVALS = ("hour", "day")
+TRENDS_MAX_DAYS = int(os.getenv("TRENDS_MAX_DAYS", "90"))
+
+def fetch_latency_trends(connection, filters: Dict[str, Any], start: datetime, end: datetime,
+                         interval: str) -> List[Dict[str, Any]]:
+    """Read the hourly rollups and their sketch bins, merged into per-key series"""
+    conditions = ["bucket_start >= :range_start", "bucket_start < :range_end"]
+    conditions += [f"{column} = :{column}" for column in filters]
+    binds = {**filters, "range_start": start, "range_end": end}
+    where = " AND ".join(conditions)
+
+    cursor = history_cursor(connection)
+    try:
+        cursor.execute(f"""
+        SELECT bucket_start, domain, dns_ip, test_type, run_count, success_count,
+               latency_count, latency_sum, latency_min, latency_max
+        FROM dns_latency_rollups
+        WHERE {where}
+        """, binds)
+        rollups = cursor.fetchall()
+        cursor.execute(f"""
+        SELECT bucket_start, domain, dns_ip, test_type, bin, bin_count
+        FROM dns_latency_rollup_bins
+        WHERE {where}
+        """, binds)
+        bins = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    def point_key(bucket_start, domain, dns_ip, test_type):
+        if interval == "day":
+            bucket_start = bucket_start.replace(hour=0)
+        return (domain, dns_ip, test_type), bucket_start
+
+    points = {}
+    for bucket_start, domain, dns_ip, test_type, runs, successes, count, total, low, high in rollups:
+        point = points.setdefault(point_key(bucket_start, domain, dns_ip, test_type), {
+            "runs": 0, "successes": 0, "count": 0, "sum": 0.0, "min": None, "max": None, "bins": {}
+        })
+        point["runs"] += runs
+        point["successes"] += successes
+        point["count"] += count
+        point["sum"] += float(total)
+        if low is not None:
+            point["min"] = low if point["min"] is None else min(point["min"], low)
+            point["max"] = high if point["max"] is None else max(point["max"], high)
+    for bucket_start, domain, dns_ip, test_type, index, count in bins:
+        point = points.get(point_key(bucket_start, domain, dns_ip, test_type))
+        if point is not None:
+            latency_sketch.merge(point["bins"], {int(index): int(count)})
+
+    series = {}
+    for (key, bucket_start), point in sorted(points.items()):
+        p50, p90, p99 = latency_sketch.quantiles(point["bins"])
+        series.setdefault(key, []).append({
+            "bucket_start": bucket_start.isoformat(),
+            "runs": point["runs"],
+            "success_rate": round(point["successes"] / point["runs"], 4) if point["runs"] else None,
+            "latency_samples": point["count"],
+            "latency_avg_ms": round(point["sum"] / point["count"], 3) if point["count"] else None,
+            "latency_min_ms": point["min"],
+            "latency_max_ms": point["max"],
+            "latency_p50_ms": p50,
+            "latency_p90_ms": p90,
+            "latency_p99_ms": p99
+        })
+    return [
+        {"domain": domain, "dns_ip": dns_ip, "test_type": test_type, "points": buckets}
+        for (domain, dns_ip, test_type), buckets in series.items()
+    ]
+
+@app.get("/trends")
+async def latency_trends(
+    domain: Optional[str] = None,
+    dns_ip: Optional[str] = None,
+    test_type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: str = "hour"
+):
+    """Success rate and latency percentiles per hour or day, read only from the rollups"""
+    if interval not in TRENDS_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(TRENDS_INTERVALS)}")
+    end = local_naive(end) or datetime.now()
+    start = local_naive(start) or end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > timedelta(days=TRENDS_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range is limited to {TRENDS_MAX_DAYS} days")
+    filters = {}
+    if domain is not None:
+        filters["domain"] = domain
+    if dns_ip is not None:
+        filters["dns_ip"] = dns_ip
+    if test_type is not None:
+        filters["test_type"] = test_type
+
+    try:
+        series = await db_manager.run(
+            fetch_latency_trends, filters, hour_bucket(start), end, interval
+        )
+    except Exception as e:
+        logger.error(f"Error reading latency trends: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "interval": interval,
+        "start": hour_bucket(start).isoformat(),
+        "end": end.isoformat(),
+        "series": series
+    }
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Report hit, miss and eviction counters for the read caches"""
+    return {
+        **{cache.name: cache.stats() for cache in (session_results_cache, config_search_cache, config_blob_cache)},
+        "test_dns_single_flight": test_dns_flight.stats()
+    }
+
+@app.get("/write-behind-stats")
+async def write_behind_stats():
+    """Report the write-behind queue and how its sessions were persisted"""
+    return write_behind.stats()
+
+@app.get("/db-pool-stats")
+async def db_pool_stats():
+    """Report Oracle session pool sizing and usage"""
+    return db_manager.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="10.42.0.1", port=8000)
@@ -1,33 +1,90 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import subprocess
+import contextvars
 import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from itertools import zip_longest
+from functools import lru_cache, partial
 from datetime import datetime
+import io
 import ipaddress
+import multiprocessing
+import tarfile
 from flask_cors import CORS
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+import dns_query
+import icmp_ping
+import stage_timing
 
 app = Flask(__name__)
 
-CORS(app, origins=["http://10.42.0.1:8000", "http://localhost:3000"])
+CORS_ORIGINS = ["http://10.42.0.1:8000", "http://localhost:3000"]
+
+CORS(app, origins=CORS_ORIGINS)
+
+# The per-dns_ip pieces are identical for every domain on a server, so memoize them
+@lru_cache(maxsize=4096)
+def reverse_zone_for(ip_address):
+    ip = ipaddress.IPv4Address(ip_address)
+    octets = str(ip).split('.')
+    return f"{octets[2]}.{octets[1]}.{octets[0]}.in-addr.arpa"
+
+@lru_cache(maxsize=4096)
+def network_prefix_for(ip_address):
+    ip = ipaddress.IPv4Address(ip_address)
+    octets = str(ip).split('.')
+    return f"{octets[0]}.{octets[1]}.{octets[2]}.0/24"
+
+@lru_cache(maxsize=4096)
+def options_config_for(dns_ip):
+    return f'''options {{
+    directory       "/var/named";
+    recursion       yes;
+
+    allow-query     {{ {network_prefix_for(dns_ip)}; 127.0.0.1; }};
+    listen-on port 53 {{ {dns_ip}; 127.0.0.1; }};
+    listen-on-v6    {{ none; }};
+
+    dnssec-enable   no;
+    dnssec-validation no;
+
+    forwarders {{
+  		8.8.8.8;
+  		8.8.4.4;
+	}};
+
+    forward only;
+}};'''
 
 class DNSConfigGenerator:
     def __init__(self):
         pass
     
-    def generate_serial(self):
-        """Generate serial number in format YYYYMMDDnn"""
-        return datetime.now().strftime("%Y%m%d01")
+    def generate_serial(self, previous_serial=None):
+        """Generate serial number in format YYYYMMDDnn
+
+        When the zone's previous serial is known the result is always
+        greater, so a second change on the same day still reaches secondaries.
+        """
+        serial = int(datetime.now().strftime("%Y%m%d01"))
+        if previous_serial is not None and int(previous_serial) >= serial:
+            serial = int(previous_serial) + 1
+        return str(serial)
     
     def get_reverse_zone(self, ip_address):
         """Convert IP address to reverse zone format"""
-        ip = ipaddress.IPv4Address(ip_address)
-        octets = str(ip).split('.')
-        return f"{octets[2]}.{octets[1]}.{octets[0]}.in-addr.arpa"
+        return reverse_zone_for(ip_address)
     
     def get_network_prefix(self, ip_address):
         """Get network prefix for allow-query"""
-        ip = ipaddress.IPv4Address(ip_address)
-        octets = str(ip).split('.')
-        return f"{octets[0]}.{octets[1]}.{octets[2]}.0/24"
+        return network_prefix_for(ip_address)
     
     def generate_named_conf_zones(self, domain, dns_ip):
         """Generate zone configurations for named.conf"""
@@ -49,32 +106,11 @@ zone "{reverse_zone}" {{
     
     def generate_options_config(self, dns_ip):
         """Generate options configuration"""
-        network_prefix = self.get_network_prefix(dns_ip)
-        
-        options_config = f'''options {{
-    directory       "/var/named";
-    recursion       yes;
-
-    allow-query     {{ {network_prefix}; 127.0.0.1; }};
-    listen-on port 53 {{ {dns_ip}; 127.0.0.1; }};
-    listen-on-v6    {{ none; }};
-
-    dnssec-enable   no;
-    dnssec-validation no;
-
-    forwarders {{
-  		8.8.8.8;
-  		8.8.4.4;
-	}};
-
-    forward only;
-}};'''
-        
-        return options_config
+        return options_config_for(dns_ip)
     
-    def generate_forward_zone(self, domain, dns_ip, host_ip, host1_prefix, host2_prefix):
+    def generate_forward_zone(self, domain, dns_ip, host_ip, host1_prefix, host2_prefix, serial=None):
         """Generate forward zone file"""
-        serial = self.generate_serial()
+        serial = serial or self.generate_serial()
         
         forward_zone = f'''$TTL    86400
 @       IN      SOA     ns1.{domain}. admin.{domain}. (
@@ -94,9 +130,9 @@ ns1     IN      A       {dns_ip}
         
         return forward_zone
     
-    def generate_reverse_zone(self, domain, dns_ip, host_ip, host1_prefix, host2_prefix):
+    def generate_reverse_zone(self, domain, dns_ip, host_ip, host1_prefix, host2_prefix, serial=None):
         """Generate reverse zone file"""
-        serial = self.generate_serial()
+        serial = serial or self.generate_serial()
         dns_last_octet = dns_ip.split('.')[-1]
         host_last_octet = host_ip.split('.')[-1]
         
@@ -117,87 +153,747 @@ ns1     IN      A       {dns_ip}
         
         return reverse_zone
 
+    def generate_zone_records(self, domain, dns_ip, host_ip, host1_prefix, host2_prefix):
+        """Resource records of both zones (without the SOA), for incremental diffs"""
+        return {
+            'forward': [
+                {'name': '@', 'type': 'NS', 'value': f"ns1.{domain}."},
+                {'name': 'ns1', 'type': 'A', 'value': dns_ip},
+                {'name': host1_prefix, 'type': 'A', 'value': dns_ip},
+                {'name': host2_prefix, 'type': 'A', 'value': host_ip}
+            ],
+            'reverse': [
+                {'name': '@', 'type': 'NS', 'value': f"ns1.{domain}."},
+                {'name': dns_ip.split('.')[-1], 'type': 'PTR', 'value': f"{host1_prefix}.{domain}."},
+                {'name': host_ip.split('.')[-1], 'type': 'PTR', 'value': f"{host2_prefix}.{domain}."}
+            ]
+        }
+
 dns_generator = DNSConfigGenerator()
 
+# Probe execution limits (seconds)
+PROBE_TIMEOUT = 30
+TEST_DEADLINE = 35
+
+# Answer dig probes in-process instead of forking dig (set NATIVE_DNS_PROBES=0 to disable)
+NATIVE_DNS_PROBES = os.environ.get("NATIVE_DNS_PROBES", "1") == "1"
+DNS_QUERY_TRIES = 3
+DNS_QUERY_PORT = int(os.environ.get("DNS_QUERY_PORT", "53"))
+# Server for the reverse lookup probe; dig -x uses the system resolver
+REVERSE_LOOKUP_SERVER = os.environ.get("REVERSE_LOOKUP_SERVER")
+
+# Ping probes through in-process ICMP sockets (set NATIVE_ICMP_PROBES=0 to disable);
+# the forked ping fallback gets the same count and -i interval
+NATIVE_ICMP_PROBES = os.environ.get("NATIVE_ICMP_PROBES", "1") == "1"
+PING_COUNT = int(os.environ.get("PING_COUNT", "4"))
+PING_INTERVAL = float(os.environ.get("PING_INTERVAL", "0.2"))
+PING_TIMEOUT = float(os.environ.get("PING_TIMEOUT", "1.0"))
+
+# Batch limits: targets tested at once overall and per DNS server
+BATCH_MAX_TARGETS = int(os.environ.get("BATCH_MAX_TARGETS", "500"))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_PER_SERVER_CONCURRENCY = int(os.environ.get("BATCH_PER_SERVER_CONCURRENCY", "2"))
+
+TEST_FIELDS = ('dns_ip', 'host_ip', 'domain', 'host1_prefix', 'host2_prefix')
+
+# Shared pool so every probe of a test run starts at the same time; sized
+# for a full batch of concurrent targets with five probes each
+probe_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("PROBE_WORKERS", str(max(16, BATCH_MAX_CONCURRENCY * 5)))),
+    thread_name_prefix="probe"
+)
+
+# Prometheus metrics, served on /metrics; probe labels are the test_commands keys
+PROBE_SECONDS = Histogram(
+    "dns_probe_duration_seconds", "Probe run time by test_commands key and runner",
+    ["probe", "runner"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+)
+PROBE_RESULTS = Counter("dns_probe_results_total", "Finished probes by outcome", ["probe", "outcome"])
+PROBE_TIMEOUTS = Counter(
+    "dns_probe_timeouts_total", "Probes that hit their own timeout or the test deadline",
+    ["probe", "kind"]
+)
+PROBES_IN_FLIGHT = Gauge("dns_probes_in_flight", "Probes currently running")
+PROBES_WAITING = Gauge("dns_probe_queue_depth", "Probes submitted but not yet running, waiting for a worker or a slot")
+REQUEST_SECONDS = Histogram(
+    "dns_backend_request_duration_seconds", "Time to response headers per route",
+    ["method", "route", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+REQUESTS_IN_FLIGHT = Gauge("dns_backend_requests_in_flight", "Requests being handled")
+
+def probe_outcome(result):
+    if result.get('success'):
+        return 'success'
+    # dig exits with 9 when no server answered in time
+    if result.get('error') == 'Command timed out' or result.get('returncode') == 9:
+        return 'timeout'
+    if 'error' in result:
+        return 'error'
+    return 'failed'
+
+def timed_probe(key, cmd, runner, native, timeout, expires_at):
+    """Run one probe under the global probe cap and record its duration and outcome
+
+    The wait for a probe slot counts against the test deadline (`expires_at`,
+    a time.monotonic() value): a probe that cannot start before it is skipped
+    instead of running for a request that has already been answered.
+    """
+    acquired = probe_slots.acquire(timeout=max(0.0, expires_at - time.monotonic()))
+    PROBES_WAITING.dec()
+    if not acquired:
+        PROBE_TIMEOUTS.labels(key, 'slot').inc()
+        return {
+            'command': cmd,
+            'error': 'No probe slot free before the test deadline',
+            'success': False
+        }
+    try:
+        PROBES_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            with stage_timing.stage(f"probe-{key}"):
+                result = runner(max(0.1, min(timeout, expires_at - time.monotonic())))
+        finally:
+            PROBES_IN_FLIGHT.dec()
+            PROBE_SECONDS.labels(key, 'native' if native else 'subprocess').observe(time.perf_counter() - started)
+    finally:
+        probe_slots.release()
+    outcome = probe_outcome(result)
+    PROBE_RESULTS.labels(key, outcome).inc()
+    if outcome == 'timeout':
+        PROBE_TIMEOUTS.labels(key, 'probe').inc()
+    return result
+
+# Cap on probes running at once across every request, stream, batch and job;
+# each one is a dig/ping process or an in-process query
+MAX_CONCURRENT_PROBES = int(os.environ.get("MAX_CONCURRENT_PROBES", "32"))
+probe_slots = threading.BoundedSemaphore(MAX_CONCURRENT_PROBES)
+
+def run_probe(cmd, timeout):
+    """Run a single probe command and return its result entry"""
+    try:
+        result = subprocess.run(
+            cmd.split(),
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        return {
+            'command': cmd,
+            'returncode': result.returncode,
+            'stdout': result.stdout,
+            'stderr': result.stderr,
+            'success': result.returncode == 0
+        }
+    except subprocess.TimeoutExpired:
+        return {
+            'command': cmd,
+            'error': 'Command timed out',
+            'success': False
+        }
+    except Exception as e:
+        return {
+            'command': cmd,
+            'error': str(e),
+            'success': False
+        }
+
+def run_dns_probe(cmd, server, qname, qtype, timeout):
+    """Answer a dig probe with the in-process DNS client, keeping dig-style output"""
+    args = cmd.split(' ', 1)[1]
+    try:
+        response = dns_query.query(
+            server, qname, qtype, port=DNS_QUERY_PORT,
+            timeout=min(5.0, timeout / DNS_QUERY_TRIES),
+            tries=DNS_QUERY_TRIES
+        )
+        return {
+            'command': cmd,
+            'returncode': 0,
+            'stdout': dns_query.format_dig(response, args),
+            'stderr': '',
+            'success': True
+        }
+    except dns_query.DNSQueryError as e:
+        # dig exits with 9 when no reply was received
+        return {
+            'command': cmd,
+            'returncode': 9,
+            'stdout': dns_query.format_dig_error(e, args),
+            'stderr': '',
+            'success': False
+        }
+    except Exception as e:
+        return {
+            'command': cmd,
+            'error': str(e),
+            'success': False
+        }
+
+class PingBatch:
+    """Shares one multiplexed ICMP session between the ping probes of a test run
+
+    The session is bounded by the timeout of the probe that starts it, and
+    the other probes wait for it no longer than their own timeout; a probe
+    that runs out of time returns None.
+    """
+
+    def __init__(self, hosts):
+        self.hosts = hosts
+        self._lock = threading.Lock()
+        self._results = None
+
+    def result(self, host, timeout):
+        # The first probe to arrive pings every host; the others wait for it
+        if not self._lock.acquire(timeout=timeout):
+            return None
+        try:
+            if self._results is None:
+                self._results = icmp_ping.ping_many(
+                    self.hosts, count=PING_COUNT, interval=PING_INTERVAL, timeout=PING_TIMEOUT, deadline=timeout
+                )
+        finally:
+            self._lock.release()
+        return self._results[host]
+
+def run_ping_probe(cmd, batch, host, timeout):
+    """Answer a ping probe from the shared ICMP session, keeping ping-style output"""
+    try:
+        result = batch.result(host, timeout)
+    except icmp_ping.ICMPUnavailable:
+        # No ping socket permission: fork ping as before
+        return run_probe(cmd, timeout)
+    except Exception as e:
+        return {
+            'command': cmd,
+            'error': str(e),
+            'success': False
+        }
+    if result is None:
+        return {
+            'command': cmd,
+            'error': 'Command timed out',
+            'success': False
+        }
+    returncode = icmp_ping.ping_returncode(result)
+    return {
+        'command': cmd,
+        'returncode': returncode,
+        'stdout': icmp_ping.format_ping(host, result) if 'error' not in result else '',
+        'stderr': result.get('error', ''),
+        'success': returncode == 0
+    }
+
+def native_probe_runners(test_commands, dns_ip, host_ip, domain, host1_prefix, host2_prefix):
+    """Build in-process runners for the probes; probes without a runner fall back to subprocess"""
+    runners = {}
+    if NATIVE_DNS_PROBES:
+        runners["dig_host1"] = partial(run_dns_probe, test_commands["dig_host1"], dns_ip, f"{host1_prefix}.{domain}", "A")
+        runners["dig_host2"] = partial(run_dns_probe, test_commands["dig_host2"], dns_ip, f"{host2_prefix}.{domain}", "A")
+        try:
+            runners["reverse_lookup"] = partial(
+                run_dns_probe, test_commands["reverse_lookup"],
+                REVERSE_LOOKUP_SERVER or dns_query.system_nameserver(), dns_query.reverse_name(host_ip), "PTR"
+            )
+        except ValueError:
+            pass
+    if NATIVE_ICMP_PROBES:
+        host1 = f"{host1_prefix}.{domain}"
+        host2 = f"{host2_prefix}.{domain}"
+        batch = PingBatch([host1, host2])
+        runners["ping_host1"] = partial(run_ping_probe, test_commands["ping_host1"], batch, host1)
+        runners["ping_host2"] = partial(run_ping_probe, test_commands["ping_host2"], batch, host2)
+    return runners
+
+def iter_probes(test_commands, runners=None, probe_timeout=PROBE_TIMEOUT, deadline=TEST_DEADLINE):
+    """Start all probes concurrently and yield (key, result) as each one finishes
+
+    `runners` maps a probe key to a callable taking the probe timeout; keys
+    without a runner execute their command through subprocess. Probes still
+    running at the overall deadline are reported as timed out.
+    """
+    runners = runners or {}
+    started = time.monotonic()
+    # Each probe gets its own copy of the request context so it can record its stage
+    futures = {}
+    for key, cmd in test_commands.items():
+        PROBES_WAITING.inc()
+        futures[probe_executor.submit(
+            contextvars.copy_context().run, timed_probe, key, cmd, runners.get(key) or partial(run_probe, cmd),
+            key in runners, min(probe_timeout, deadline), started + deadline
+        )] = key
+    pending = dict(futures)
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            yield pending.pop(future), future.result()
+    except FuturesTimeout:
+        for future, key in pending.items():
+            if future.done():
+                yield key, future.result()
+                continue
+            # A started probe is still bounded by its own timeout; one still
+            # waiting for a slot gives up at the deadline by itself
+            if future.cancel():
+                PROBES_WAITING.dec()
+            PROBE_TIMEOUTS.labels(key, 'deadline').inc()
+            yield key, {
+                'command': test_commands[key],
+                'error': 'Test deadline exceeded after %.1fs' % (time.monotonic() - started),
+                'success': False
+            }
+
+def run_probes(test_commands, runners=None, probe_timeout=PROBE_TIMEOUT, deadline=TEST_DEADLINE):
+    """Run all probes concurrently under a per-probe timeout and an overall deadline"""
+    results = dict(iter_probes(test_commands, runners, probe_timeout, deadline))
+    return {key: results[key] for key in test_commands}
+
+# Bulk generation limits
+BULK_MAX_DOMAINS = int(os.environ.get("BULK_MAX_DOMAINS", "2000"))
+BULK_WORKERS = int(os.environ.get("BULK_WORKERS", str(os.cpu_count() or 2)))
+BULK_CHUNK_SIZE = 50
+
+CONFIG_REQUIRED_FIELDS = ('dns_ip', 'host_ip', 'domain', 'host1_prefix', 'host2_prefix')
+
+# Created on first use so the Flask reloader does not fork workers at import.
+# Workers come from a forkserver: forking this threaded process directly could
+# hand a child a lock some other thread was holding.
+config_executor = None
+
+def render_dns_config(data):
+    """Render every configuration file and command for one domain spec"""
+    # Extract parameters
+    dns_ip = data.get('dns_ip')
+    dns_interface = data.get('dns_interface')
+    dns_username = data.get('dns_username')
+    
+    host_ip = data.get('host_ip')
+    host_interface = data.get('host_interface')
+    host_username = data.get('host_username')
+    
+    domain = data.get('domain')
+    host1_prefix = data.get('host1_prefix')
+    host2_prefix = data.get('host2_prefix')
+    
+    # Callers that track zone history pass the zone's last serial so it only moves forward
+    serial = dns_generator.generate_serial(data.get('previous_serial'))
+    
+    # Generate configurations
+    named_conf_zones = dns_generator.generate_named_conf_zones(domain, dns_ip)
+    options_config = dns_generator.generate_options_config(dns_ip)
+    forward_zone = dns_generator.generate_forward_zone(domain, dns_ip, host_ip, host1_prefix, host2_prefix, serial)
+    reverse_zone = dns_generator.generate_reverse_zone(domain, dns_ip, host_ip, host1_prefix, host2_prefix, serial)
+    
+    # Generate file names
+    forward_zone_file = f"db.{domain}"
+    reverse_zone_file = f"db.{'.'.join(dns_ip.split('.')[:-1])}"
+    
+    # Generate commands (without executing them)
+    permission_commands = [
+        f"sudo chown root:named /var/named/{forward_zone_file}",
+        f"sudo chmod 640 /var/named/{forward_zone_file}",
+        f"sudo chown root:named /var/named/{reverse_zone_file}",
+        f"sudo chmod 640 /var/named/{reverse_zone_file}",
+        "sudo named-checkconf",
+        f"sudo named-checkzone {domain} /var/named/{forward_zone_file}",
+        f"sudo named-checkzone {dns_generator.get_reverse_zone(dns_ip)} /var/named/{reverse_zone_file}",
+        "sudo systemctl enable --now named"
+    ]
+    
+    return {
+        'success': True,
+        'serial': serial,
+        'configurations': {
+            'named_conf_zones': named_conf_zones,
+            'options_config': options_config,
+            'forward_zone': forward_zone,
+            'reverse_zone': reverse_zone
+        },
+        'records': dns_generator.generate_zone_records(domain, dns_ip, host_ip, host1_prefix, host2_prefix),
+        'file_names': {
+            'forward_zone_file': forward_zone_file,
+            'reverse_zone_file': reverse_zone_file
+        },
+        'permission_commands': permission_commands,
+        'connection_info': {
+            'dns_server': {
+                'ip': dns_ip,
+                'interface': dns_interface,
+                'username': dns_username
+            },
+            'host_server': {
+                'ip': host_ip,
+                'interface': host_interface,
+                'username': host_username
+            }
+        }
+    }
+
+def render_dns_configs(specs):
+    """Render a chunk of domain specs; runs in a worker process"""
+    results = []
+    for spec in specs:
+        try:
+            results.append(render_dns_config(spec))
+        except Exception as e:
+            results.append({'success': False, 'error': str(e)})
+    return results
+
+def render_bulk(specs):
+    """Render many domain specs across worker processes, keeping input order
+
+    Specs are grouped by dns_ip before chunking so each worker reuses its
+    memoized per-server pieces.
+    """
+    global config_executor
+    if config_executor is None:
+        config_executor = ProcessPoolExecutor(
+            max_workers=BULK_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+        )
+
+    order = sorted(range(len(specs)), key=lambda index: specs[index]['dns_ip'])
+    chunks = [order[i:i + BULK_CHUNK_SIZE] for i in range(0, len(order), BULK_CHUNK_SIZE)]
+    if len(chunks) == 1:
+        rendered = [render_dns_configs([specs[index] for index in chunks[0]])]
+    else:
+        rendered = config_executor.map(render_dns_configs, [[specs[index] for index in chunk] for chunk in chunks])
+
+    results = [None] * len(specs)
+    for chunk, chunk_results in zip(chunks, rendered):
+        for index, result in zip(chunk, chunk_results):
+            results[index] = result
+    return results
+
+def bulk_archive(results):
+    """Pack rendered configurations into a gzipped tarball, one directory per domain"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for result in results:
+            if not result.get('success'):
+                continue
+            domain = result['file_names']['forward_zone_file'][len('db.'):]
+            files = {
+                f"{domain}/named.conf.zones": result['configurations']['named_conf_zones'],
+                f"{domain}/named.conf.options": result['configurations']['options_config'],
+                f"{domain}/{result['file_names']['forward_zone_file']}": result['configurations']['forward_zone'],
+                f"{domain}/{result['file_names']['reverse_zone_file']}": result['configurations']['reverse_zone'],
+                f"{domain}/permissions.sh": "\n".join(result['permission_commands']) + "\n"
+            }
+            for name, content in files.items():
+                encoded = content.encode()
+                info = tarfile.TarInfo(name)
+                info.size = len(encoded)
+                info.mtime = int(time.time())
+                archive.addfile(info, io.BytesIO(encoded))
+    return buffer.getvalue()
+
 @app.route('/generate-dns-config', methods=['POST'])
 def generate_dns_config():
     """Generate DNS configuration files based on user input"""
     try:
         data = request.get_json()
         
-        # Extract parameters
-        dns_ip = data.get('dns_ip')
-        dns_interface = data.get('dns_interface')
-        dns_username = data.get('dns_username')
-        dns_password = data.get('dns_password')
+        # Validate required fields
+        if not all(data.get(field) for field in CONFIG_REQUIRED_FIELDS):
+            return jsonify({'error': 'Missing required fields'}), 400
         
-        host_ip = data.get('host_ip')
-        host_interface = data.get('host_interface')
-        host_username = data.get('host_username')
-        host_password = data.get('host_password')
+        return jsonify(render_dns_config(data))
         
-        domain = data.get('domain')
-        host1_prefix = data.get('host1_prefix')
-        host2_prefix = data.get('host2_prefix')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/generate-dns-config/bulk', methods=['POST'])
+def generate_dns_config_bulk():
+    """Generate configuration files for many domains in parallel
+
+    Returns JSON by default; with ?format=tar the files are returned as a
+    gzipped tarball with one directory per domain.
+    """
+    try:
+        data = request.get_json()
         
-        # Validate required fields
-        required_fields = [dns_ip, host_ip, domain, host1_prefix, host2_prefix]
-        if not all(required_fields):
+        specs = data.get('configs') or []
+        if not specs:
             return jsonify({'error': 'Missing required fields'}), 400
+        if len(specs) > BULK_MAX_DOMAINS:
+            return jsonify({'error': f'At most {BULK_MAX_DOMAINS} domains per request'}), 400
+        for spec in specs:
+            if not all(spec.get(field) for field in CONFIG_REQUIRED_FIELDS):
+                return jsonify({'error': 'Missing required fields'}), 400
         
-        # Generate configurations
-        named_conf_zones = dns_generator.generate_named_conf_zones(domain, dns_ip)
-        options_config = dns_generator.generate_options_config(dns_ip)
-        forward_zone = dns_generator.generate_forward_zone(domain, dns_ip, host_ip, host1_prefix, host2_prefix)
-        reverse_zone = dns_generator.generate_reverse_zone(domain, dns_ip, host_ip, host1_prefix, host2_prefix)
+        as_tar = request.args.get('format') == 'tar'
+        if as_tar:
+            # Archive members are named after the domain, so each may appear only once
+            seen, duplicates = set(), set()
+            for spec in specs:
+                if spec['domain'] in seen:
+                    duplicates.add(spec['domain'])
+                seen.add(spec['domain'])
+            if duplicates:
+                return jsonify({'error': f"Duplicate domains in tar request: {', '.join(sorted(duplicates))}"}), 400
         
-        # Generate file names
-        forward_zone_file = f"db.{domain}"
-        reverse_zone_file = f"db.{'.'.join(dns_ip.split('.')[:-1])}"
+        results = render_bulk(specs)
         
-        # Generate commands (without executing them)
-        permission_commands = [
-            f"sudo chown root:named /var/named/{forward_zone_file}",
-            f"sudo chmod 640 /var/named/{forward_zone_file}",
-            f"sudo chown root:named /var/named/{reverse_zone_file}",
-            f"sudo chmod 640 /var/named/{reverse_zone_file}",
-            "sudo named-checkconf",
-            f"sudo named-checkzone {domain} /var/named/{forward_zone_file}",
-            f"sudo named-checkzone {dns_generator.get_reverse_zone(dns_ip)} /var/named/{reverse_zone_file}",
-            "sudo systemctl enable --now named"
-        ]
+        if as_tar:
+            return Response(
+                bulk_archive(results),
+                mimetype='application/gzip',
+                headers={'Content-Disposition': 'attachment; filename="dns-configs.tar.gz"'}
+            )
+        return jsonify({
+            'success': all(result.get('success') for result in results),
+            'results': results
+        })
         
-        response = {
-            'success': True,
-            'configurations': {
-                'named_conf_zones': named_conf_zones,
-                'options_config': options_config,
-                'forward_zone': forward_zone,
-                'reverse_zone': reverse_zone
-            },
-            'file_names': {
-                'forward_zone_file': forward_zone_file,
-                'reverse_zone_file': reverse_zone_file
-            },
-            'permission_commands': permission_commands,
-            'connection_info': {
-                'dns_server': {
-                    'ip': dns_ip,
-                    'interface': dns_interface,
-                    'username': dns_username
-                },
-                'host_server': {
-                    'ip': host_ip,
-                    'interface': host_interface,
-                    'username': host_username
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def build_test_commands(dns_ip, host_ip, domain, host1_prefix, host2_prefix):
+    """Define known commands with fixed keys"""
+    return {
+        "dig_host1": f"dig @{dns_ip} {host1_prefix}.{domain}",
+        "dig_host2": f"dig @{dns_ip} {host2_prefix}.{domain}",
+        "reverse_lookup": f"dig -x {host_ip}",
+        "ping_host1": f"ping -c {PING_COUNT} -i {PING_INTERVAL:g} {host1_prefix}.{domain}",
+        "ping_host2": f"ping -c {PING_COUNT} -i {PING_INTERVAL:g} {host2_prefix}.{domain}"
+    }
+
+def run_dns_tests(dns_ip, host_ip, domain, host1_prefix, host2_prefix):
+    """Run every probe for one target and return the test_results mapping"""
+    test_commands = build_test_commands(dns_ip, host_ip, domain, host1_prefix, host2_prefix)
+    runners = native_probe_runners(test_commands, dns_ip, host_ip, domain, host1_prefix, host2_prefix)
+    return run_probes(test_commands, runners)
+
+def stream_dns_tests(dns_ip, host_ip, domain, host1_prefix, host2_prefix):
+    """Yield (test_type, result) for one target as each probe finishes"""
+    test_commands = build_test_commands(dns_ip, host_ip, domain, host1_prefix, host2_prefix)
+    runners = native_probe_runners(test_commands, dns_ip, host_ip, domain, host1_prefix, host2_prefix)
+    return iter_probes(test_commands, runners)
+
+def run_batch(targets, max_concurrency, per_server_concurrency):
+    """Test many targets with a global and a per-DNS-server concurrency cap
+
+    Results are returned in input order.
+    """
+    server_slots = defaultdict(lambda: threading.BoundedSemaphore(per_server_concurrency))
+
+    def run_target(target):
+        with server_slots[target['dns_ip']]:
+            return run_dns_tests(*(target[field] for field in TEST_FIELDS))
+
+    # Interleave targets by server so workers are not all parked on one server's slots
+    by_server = defaultdict(list)
+    for index, target in enumerate(targets):
+        by_server[target['dns_ip']].append(index)
+    order = [index for group in zip_longest(*by_server.values()) for index in group if index is not None]
+
+    results = [None] * len(targets)
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch") as executor:
+        futures = {index: executor.submit(run_target, targets[index]) for index in order}
+        for index, future in futures.items():
+            try:
+                test_results = future.result()
+                results[index] = {
+                    'target': targets[index],
+                    'success': True,
+                    'test_results': test_results
                 }
+            except Exception as e:
+                results[index] = {
+                    'target': targets[index],
+                    'success': False,
+                    'error': str(e)
+                }
+    return results
+
+def batch_params(data):
+    """Validate a batch payload; returns (targets, max_concurrency, per_server_concurrency)"""
+    targets = data.get('targets') or []
+    if not targets:
+        raise ValueError('Missing required fields')
+    if len(targets) > BATCH_MAX_TARGETS:
+        raise ValueError(f'At most {BATCH_MAX_TARGETS} targets per batch')
+    for target in targets:
+        if not all(target.get(field) for field in TEST_FIELDS):
+            raise ValueError('Missing required fields')
+
+    targets = [{field: target[field] for field in TEST_FIELDS} for target in targets]
+    max_concurrency = min(int(data.get('max_concurrency') or BATCH_MAX_CONCURRENCY), BATCH_MAX_CONCURRENCY)
+    per_server_concurrency = min(
+        int(data.get('per_server_concurrency') or BATCH_PER_SERVER_CONCURRENCY), max_concurrency
+    )
+    return targets, max(1, max_concurrency), max(1, per_server_concurrency)
+
+# Job queue limits
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "100"))
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", "600"))
+JOB_MAX_WAIT = float(os.environ.get("JOB_MAX_WAIT", "30"))
+
+JOB_WAIT_SECONDS = Histogram(
+    "dns_job_queue_wait_seconds", "Time jobs spend queued before a worker picks them up",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+JOBS_REJECTED = Counter("dns_jobs_rejected_total", "Job submissions refused because the queue was full")
+
+JOB_RUNNERS = {
+    'test-dns': lambda payload: {
+        'success': True,
+        'test_results': run_dns_tests(*(payload[field] for field in TEST_FIELDS))
+    },
+    'batch': lambda payload: {
+        'success': True,
+        'results': run_batch(*batch_params(payload))
+    },
+}
+
+class ProbeJob:
+    """A queued test run and, once finished, its result"""
+
+    def __init__(self, kind, payload):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        job = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'submitted_at': datetime.fromtimestamp(self.submitted_at).isoformat(),
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            'finished_at': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None
+        }
+        if self.status == 'done':
+            job['result'] = self.result
+        elif self.status == 'failed':
+            job['error'] = self.error
+        return job
+
+class ProbeJobQueue:
+    """Bounded queue of probe jobs served by a fixed pool of worker threads
+
+    submit() returns None instead of queueing when the queue is full.
+    Finished jobs are kept for `retention` seconds.
+    """
+
+    def __init__(self, workers, capacity, retention):
+        self.workers = workers
+        self.capacity = capacity
+        self.retention = retention
+        self.queue = queue.Queue(maxsize=capacity)
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.threads = []
+        self.busy = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_times = deque(maxlen=1000)
+
+    def _ensure_workers(self):
+        # Started on first use so the Flask reloader does not start them twice
+        with self.lock:
+            if self.threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-{number}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, kind, payload):
+        self._ensure_workers()
+        self._purge()
+        job = ProbeJob(kind, payload)
+        with self.lock:
+            self.jobs[job.id] = job
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job.id]
+                self.rejected += 1
+            JOBS_REJECTED.inc()
+            return None
+        with self.lock:
+            self.submitted += 1
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _purge(self):
+        cutoff = time.time() - self.retention
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items() if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            job.started_at = time.time()
+            waited = job.started_at - job.submitted_at
+            JOB_WAIT_SECONDS.observe(waited)
+            with self.lock:
+                self.wait_times.append(waited)
+                self.busy += 1
+            job.status = 'running'
+            try:
+                job.result = JOB_RUNNERS[job.kind](job.payload)
+                job.status = 'done'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished_at = time.time()
+                with self.lock:
+                    self.busy -= 1
+                    if job.status == 'done':
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                job.done.set()
+                self.queue.task_done()
+
+    def stats(self):
+        with self.lock:
+            waits = sorted(self.wait_times)
+            stats = {
+                'workers': self.workers,
+                'busy_workers': self.busy,
+                'queue_depth': self.queue.qsize(),
+                'queue_capacity': self.capacity,
+                'jobs_tracked': len(self.jobs),
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'completed': self.completed,
+                'failed': self.failed,
+                'max_concurrent_probes': MAX_CONCURRENT_PROBES
             }
+        stats['wait_seconds'] = {
+            'samples': len(waits),
+            'avg': round(sum(waits) / len(waits), 4) if waits else None,
+            'p50': round(waits[len(waits) // 2], 4) if waits else None,
+            'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else None,
+            'max': round(waits[-1], 4) if waits else None
         }
-        
-        return jsonify(response)
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return stats
+
+job_queue = ProbeJobQueue(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_RETENTION)
+
+Gauge("dns_job_queue_depth", "Jobs waiting for a worker").set_function(lambda: job_queue.queue.qsize())
+Gauge("dns_job_workers_busy", "Job workers running a job").set_function(lambda: job_queue.busy)
 
 @app.route('/test-dns', methods=['POST'])
 def test_dns():
@@ -214,53 +910,103 @@ def test_dns():
         if not all([dns_ip, host_ip, domain, host1_prefix, host2_prefix]):
             return jsonify({'error': 'Missing required fields'}), 400
 
-        # Define known commands with fixed keys
-        test_commands = {
-            "dig_host1": f"dig @{dns_ip} {host1_prefix}.{domain}",
-            "dig_host2": f"dig @{dns_ip} {host2_prefix}.{domain}",
-            "reverse_lookup": f"dig -x {host_ip}",
-            "ping_host1": f"ping -c 4 {host1_prefix}.{domain}",
-            "ping_host2": f"ping -c 4 {host2_prefix}.{domain}"
-        }
+        results = run_dns_tests(dns_ip, host_ip, domain, host1_prefix, host2_prefix)
 
-        results = {}
+        return jsonify({
+            'success': True,
+            'test_results': results
+        })
 
-        for key, cmd in test_commands.items():
-            try:
-                result = subprocess.run(
-                    cmd.split(),
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                results[key] = {
-                    'command': cmd,
-                    'returncode': result.returncode,
-                    'stdout': result.stdout,
-                    'stderr': result.stderr,
-                    'success': result.returncode == 0
-                }
-            except subprocess.TimeoutExpired:
-                results[key] = {
-                    'command': cmd,
-                    'error': 'Command timed out',
-                    'success': False
-                }
-            except Exception as e:
-                results[key] = {
-                    'command': cmd,
-                    'error': str(e),
-                    'success': False
-                }
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/test-dns/stream', methods=['POST'])
+def test_dns_stream():
+    """Execute DNS tests and stream each result as NDJSON as soon as it finishes"""
+    data = request.get_json()
+    fields = [data.get(field) for field in TEST_FIELDS]
+    if not all(fields):
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    def generate():
+        try:
+            for test_type, result in stream_dns_tests(*fields):
+                yield json.dumps({'test_type': test_type, 'result': result}) + '\n'
+            yield json.dumps({'done': True, 'success': True}) + '\n'
+        except Exception as e:
+            yield json.dumps({'done': True, 'success': False, 'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/test-dns/batch', methods=['POST'])
+def test_dns_batch():
+    """Execute DNS tests for a list of targets with bounded concurrency"""
+    try:
+        data = request.get_json()
+
+        try:
+            params = batch_params(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        results = run_batch(*params)
 
         return jsonify({
             'success': True,
-            'test_results': results
+            'results': results
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def submit_job(kind, payload):
+    job = job_queue.submit(kind, payload)
+    if job is None:
+        response = jsonify({'error': 'Job queue is full', 'queue_capacity': job_queue.capacity})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({'job_id': job.id, 'status': job.status}), 202
+
+@app.route('/jobs/test-dns', methods=['POST'])
+def submit_test_dns_job():
+    """Queue a DNS test and return its job ID immediately"""
+    data = request.get_json()
+    if not all(data.get(field) for field in TEST_FIELDS):
+        return jsonify({'error': 'Missing required fields'}), 400
+    return submit_job('test-dns', {field: data[field] for field in TEST_FIELDS})
+
+@app.route('/jobs/test-dns/batch', methods=['POST'])
+def submit_test_dns_batch_job():
+    """Queue a batch of DNS tests and return its job ID immediately"""
+    data = request.get_json()
+    try:
+        targets, max_concurrency, per_server_concurrency = batch_params(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return submit_job('batch', {
+        'targets': targets,
+        'max_concurrency': max_concurrency,
+        'per_server_concurrency': per_server_concurrency
+    })
+
+@app.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    """Queue depth, worker usage and queue wait times"""
+    return jsonify(job_queue.stats())
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status and result; ?wait=N long-polls up to N seconds for it to finish"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    try:
+        wait = min(float(request.args.get('wait', 0)), JOB_MAX_WAIT)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    if wait > 0:
+        job.done.wait(wait)
+    return jsonify(job.to_dict())
 
 @app.route('/network-config', methods=['POST'])
 def generate_network_config():
@@ -298,6 +1044,44 @@ def generate_network_config():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_timing = stage_timing.start_request(f"{request.method} {request.path}")
+    REQUESTS_IN_FLIGHT.inc()
+
+@app.teardown_request
+def stop_request_timer(exc):
+    REQUESTS_IN_FLIGHT.dec()
+    timing = g.pop('request_timing', None)
+    if timing is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        stage_timing.finish_request(timing, f"{request.method} {route}", g.get('response_status'))
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe per-route latency and report stage timings in a Server-Timing header
+
+    Streamed responses are timed to their headers.
+    """
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+    g.response_status = response.status_code
+    timing = g.get('request_timing')
+    if timing is not None and stage_timing.SERVER_TIMING:
+        response.headers['Server-Timing'] = timing[0].header()
+        response.headers['Timing-Allow-Origin'] = ', '.join(CORS_ORIGINS)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
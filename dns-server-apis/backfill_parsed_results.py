@@ -0,0 +1,113 @@
+"""Re-parse stored probe output and write the structured results back
+
+Streams dns_test_results rows in result_id order, re-parses stdout_raw across
+a process pool with the current parsers, and updates parsed_json and
+parsed_summary in batches. After a parser fix, re-parse every row with --all:
+
+    python backfill_parsed_results.py --all --batch-size 2000 --workers 8
+
+Without --all only rows that have no parsed_json yet are parsed.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import oracledb
+
+from app_db import TestResult, db_manager, generate_rich_paragraph, parse_test_output
+from output_codec import decompress_output
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("backfill_parsed_results")
+
+# Stream CLOBs and BLOBs as str/bytes so a batch is fetched in one round trip
+oracledb.defaults.fetch_lobs = False
+
+SELECT_BATCH = """
+SELECT result_id, test_type, command_executed, return_code, success, stdout_raw,
+       stdout_blob, output_codec
+FROM dns_test_results
+WHERE result_id > :last_id {only_missing}
+ORDER BY result_id
+FETCH FIRST :batch_size ROWS ONLY
+"""
+
+UPDATE_BATCH = """
+UPDATE dns_test_results
+SET parsed_json = :parsed_json, parsed_summary = :summary
+WHERE result_id = :result_id
+"""
+
+
+def reparse_row(row):
+    """Parse one stored row; runs in a worker process"""
+    result_id, test_type, command, return_code, success, stdout, stdout_blob, codec = row
+    if codec:
+        stdout = decompress_output(stdout_blob, codec)
+    stdout = stdout or ""
+    test_result = TestResult(
+        command=command or "",
+        returncode=return_code if return_code is not None else -1,
+        stdout=stdout,
+        success=bool(success)
+    )
+    parsed_data = parse_test_output(test_type, stdout)
+    return {
+        "result_id": result_id,
+        "parsed_json": json.dumps(parsed_data),
+        "summary": generate_rich_paragraph(test_type, test_result, parsed_data)
+    }
+
+
+def backfill(batch_size: int, workers: int, only_missing: bool, start_after: int):
+    connection = db_manager.standalone_connection()
+    read_cursor = connection.cursor()
+    read_cursor.arraysize = batch_size
+    read_cursor.prefetchrows = batch_size + 1
+    write_cursor = connection.cursor()
+    workers = workers or os.cpu_count()
+
+    query = SELECT_BATCH.format(only_missing="AND parsed_json IS NULL" if only_missing else "")
+    last_id = start_after
+    total = 0
+    started = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                read_cursor.execute(query, {"last_id": last_id, "batch_size": batch_size})
+                rows = read_cursor.fetchall()
+                if not rows:
+                    break
+                chunksize = max(1, len(rows) // (workers * 4))
+                updates = list(pool.map(reparse_row, rows, chunksize=chunksize))
+                write_cursor.setinputsizes(parsed_json=oracledb.DB_TYPE_LONG, summary=oracledb.DB_TYPE_LONG)
+                write_cursor.executemany(UPDATE_BATCH, updates)
+                connection.commit()
+                last_id = rows[-1][0]
+                total += len(rows)
+                elapsed = time.monotonic() - started
+                logger.info(f"Re-parsed {total} rows up to result_id {last_id} ({total / elapsed:.0f} rows/s)")
+    finally:
+        read_cursor.close()
+        write_cursor.close()
+        connection.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows fetched and updated per transaction")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--all", action="store_true", help="re-parse every row, not only rows without parsed_json")
+    parser.add_argument("--start-after", type=int, default=0, help="resume after this result_id")
+    args = parser.parse_args()
+
+    total = backfill(args.batch_size, args.workers, not args.all, args.start_after)
+    logger.info(f"Backfill complete: {total} rows updated")
+
+
+if __name__ == "__main__":
+    main()
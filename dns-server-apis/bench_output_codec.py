@@ -0,0 +1,234 @@
+"""Benchmark compression of stored probe output
+
+Reports compression ratio and per-row compress/decompress latency for every
+available codec. The corpus is either synthetic dig/ping transcripts rendered
+by the native probes' formatters or the latest rows from dns_test_results:
+
+    python bench_output_codec.py --rows 5000
+    python bench_output_codec.py --from-db 5000 --db-roundtrip
+
+--db-roundtrip also times array inserts and reads of the corpus as CLOBs and
+as compressed BLOBs in a scratch table, which is dropped afterwards.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from dns_query import format_dig
+from icmp_ping import format_ping
+from output_codec import available_codecs, compress_output, decompress_output
+
+RECORD_TYPES = ("A", "AAAA", "PTR", "MX", "SOA")
+
+
+def synthetic_dig(rng: random.Random, index: int) -> str:
+    domain = f"zone{index % 50}.example.com."
+    qtype = rng.choice(RECORD_TYPES)
+    answers = [
+        {"name": f"host{n}.{domain}", "ttl": 3600, "class": "IN", "type": "A",
+         "value": f"10.{index % 250}.{n}.{rng.randint(1, 254)}"}
+        for n in range(rng.randint(0, 4))
+    ]
+    response = {
+        "id": rng.randint(0, 0xFFFF),
+        "opcode": "QUERY",
+        "status": "NOERROR" if answers else rng.choice(["NXDOMAIN", "SERVFAIL"]),
+        "flags": ["qr", "aa", "rd", "ra"],
+        "question": [{"name": domain, "class": "IN", "type": qtype}],
+        "answer": answers,
+        "authority": [{"name": domain, "ttl": 86400, "class": "IN", "type": "NS", "value": f"ns1.{domain}"}],
+        "additional": [],
+        "query_time": rng.randint(0, 40),
+        "server": {"ip": f"192.0.2.{index % 20 + 1}", "port": "53"},
+        "protocol": "UDP",
+        "when": datetime.now().astimezone(),
+        "message_size": rng.randint(60, 400)
+    }
+    return format_dig(response, f"@{response['server']['ip']} {domain} {qtype}")
+
+
+def synthetic_ping(rng: random.Random, index: int) -> str:
+    address = f"10.{index % 250}.0.{index % 200 + 1}"
+    count = 4
+    replies = [
+        {"icmp_seq": seq, "ttl": 64, "time": round(rng.uniform(0.05, 3.0), 3)}
+        for seq in range(1, count + 1) if rng.random() > 0.05
+    ]
+    rtts = [reply["time"] for reply in replies]
+    result = {
+        "target_ip": address,
+        "packets_transmitted": count,
+        "packets_received": len(replies),
+        "packet_loss": 100.0 * (count - len(replies)) / count,
+        "replies": replies,
+        "time": 3000 + rng.randint(0, 10),
+        "rtt_stats": {
+            "min": min(rtts), "avg": sum(rtts) / len(rtts), "max": max(rtts), "mdev": 0.1
+        } if rtts else None
+    }
+    return format_ping(f"host{index % 100}.example.com", result)
+
+
+def synthetic_corpus(rows: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    # A test session runs four dig probes for every two pings
+    return [
+        synthetic_ping(rng, i) if i % 3 == 2 else synthetic_dig(rng, i)
+        for i in range(rows)
+    ]
+
+
+def database_corpus(rows: int) -> List[str]:
+    import oracledb
+    from app_db import db_manager
+    oracledb.defaults.fetch_lobs = False
+    connection = db_manager.standalone_connection()
+    cursor = connection.cursor()
+    cursor.arraysize = 1000
+    try:
+        cursor.execute("""
+        SELECT stdout_raw, stdout_blob, output_codec FROM dns_test_results
+        ORDER BY result_id DESC
+        FETCH FIRST :rows ROWS ONLY
+        """, {"rows": rows})
+        return [
+            decompress_output(blob, codec) if codec else (text or "")
+            for text, blob, codec in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_codec(corpus: List[str], codec: str) -> Dict[str, Any]:
+    compress_us = []
+    decompress_us = []
+    stored = 0
+    for text in corpus:
+        started = time.perf_counter()
+        data = compress_output(text, codec)
+        compress_us.append((time.perf_counter() - started) * 1e6)
+        stored += len(data)
+        started = time.perf_counter()
+        decompress_output(data, codec)
+        decompress_us.append((time.perf_counter() - started) * 1e6)
+    raw = sum(len(text.encode("utf-8")) for text in corpus)
+    return {
+        "codec": codec,
+        "raw_bytes": raw,
+        "stored_bytes": stored,
+        "ratio": raw / stored if stored else 0.0,
+        "compress_p50_us": statistics.median(compress_us),
+        "compress_p99_us": percentile(compress_us, 0.99),
+        "decompress_p50_us": statistics.median(decompress_us),
+        "decompress_p99_us": percentile(decompress_us, 0.99)
+    }
+
+
+def bench_database(corpus: List[str], codec: Optional[str], batch_size: int) -> Dict[str, float]:
+    """Time array inserts and a full read of the corpus in a scratch table"""
+    import oracledb
+    from app_db import db_manager
+    connection = db_manager.standalone_connection()
+    cursor = connection.cursor()
+    table = "dns_output_codec_bench"
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {table} PURGE")
+        cursor.execute(f"""
+        CREATE TABLE {table} (
+            id NUMBER PRIMARY KEY, stdout_raw CLOB, stdout_blob BLOB, output_codec VARCHAR2(10)
+        )""")
+        rows = [
+            {
+                "id": i,
+                "stdout": None if codec else text,
+                "stdout_blob": compress_output(text, codec) if codec else None,
+                "output_codec": codec
+            }
+            for i, text in enumerate(corpus)
+        ]
+        started = time.perf_counter()
+        for offset in range(0, len(rows), batch_size):
+            cursor.setinputsizes(
+                stdout=oracledb.DB_TYPE_LONG,
+                stdout_blob=oracledb.DB_TYPE_LONG_RAW,
+                output_codec=oracledb.DB_TYPE_VARCHAR
+            )
+            cursor.executemany(
+                f"INSERT INTO {table} VALUES (:id, :stdout, :stdout_blob, :output_codec)",
+                rows[offset:offset + batch_size]
+            )
+        connection.commit()
+        write_s = time.perf_counter() - started
+
+        read_cursor = connection.cursor()
+        read_cursor.arraysize = batch_size
+        read_cursor.outputtypehandler = lambda cur, name, default_type, size, precision, scale: (
+            cur.var(oracledb.DB_TYPE_LONG_RAW if default_type == oracledb.DB_TYPE_BLOB else oracledb.DB_TYPE_LONG,
+                    arraysize=cur.arraysize)
+            if default_type in (oracledb.DB_TYPE_BLOB, oracledb.DB_TYPE_CLOB) else None
+        )
+        started = time.perf_counter()
+        read_cursor.execute(f"SELECT stdout_raw, stdout_blob, output_codec FROM {table} ORDER BY id")
+        for text, blob, row_codec in read_cursor:
+            if row_codec:
+                decompress_output(blob, row_codec)
+        read_s = time.perf_counter() - started
+        read_cursor.close()
+
+        cursor.execute(f"""
+        SELECT NVL(SUM(DBMS_LOB.GETLENGTH(stdout_raw)), 0) + NVL(SUM(DBMS_LOB.GETLENGTH(stdout_blob)), 0)
+        FROM {table}
+        """)
+        lob_length = cursor.fetchone()[0]
+        return {
+            "write_ms_per_row": write_s * 1000 / len(corpus),
+            "read_ms_per_row": read_s * 1000 / len(corpus),
+            "lob_length": lob_length
+        }
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS {table} PURGE")
+        cursor.close()
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic transcripts to generate")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the synthetic corpus")
+    parser.add_argument("--from-db", type=int, default=0, metavar="N",
+                        help="use the latest N stored stdout values instead of a synthetic corpus")
+    parser.add_argument("--db-roundtrip", action="store_true",
+                        help="also time inserts and reads through a scratch table")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per array insert for --db-roundtrip")
+    args = parser.parse_args()
+
+    corpus = database_corpus(args.from_db) if args.from_db else synthetic_corpus(args.rows, args.seed)
+    if not corpus:
+        parser.error("corpus is empty")
+    raw = sum(len(text.encode("utf-8")) for text in corpus)
+    print(f"corpus: {len(corpus)} transcripts, {raw} bytes, {raw / len(corpus):.0f} bytes/row")
+
+    print(f"{'codec':<6} {'stored':>10} {'ratio':>7} {'comp p50':>9} {'comp p99':>9} {'dec p50':>9} {'dec p99':>9}  (us)")
+    for codec in available_codecs():
+        r = bench_codec(corpus, codec)
+        print(f"{codec:<6} {r['stored_bytes']:>10} {r['ratio']:>6.1f}x {r['compress_p50_us']:>9.1f} "
+              f"{r['compress_p99_us']:>9.1f} {r['decompress_p50_us']:>9.1f} {r['decompress_p99_us']:>9.1f}")
+
+    if args.db_roundtrip:
+        print(f"\n{'storage':<7} {'write ms/row':>12} {'read ms/row':>12} {'lob length':>12}")
+        for codec in [None] + available_codecs():
+            r = bench_database(corpus, codec, args.batch_size)
+            print(f"{codec or 'clob':<7} {r['write_ms_per_row']:>12.3f} {r['read_ms_per_row']:>12.3f} {r['lob_length']:>12}")
+
+
+if __name__ == "__main__":
+    main()
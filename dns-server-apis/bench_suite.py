@@ -0,0 +1,686 @@
+"""Load, latency and micro-benchmarks for the DNS APIs
+
+`load` serves app_db on a loopback port against local stand-ins, drives
+concurrent requests at each endpoint in turn and reports p50/p95/p99
+latency and requests per second:
+
+    python bench_suite.py load --concurrency 32 --requests 2000 --output load.json
+    python bench_suite.py load --backend app_v1 --endpoints backend-test-dns,test-dns
+
+Stand-ins:
+  - the fake probe backend (default) answers app_v1's routes with canned
+    dig/ping transcripts and configurations after --backend-latency ms
+  - `--backend app_v1` serves the real Flask app instead; its native dig
+    probes are answered by a loopback DNS responder
+  - the fake database (default) replaces db_manager with an in-memory store
+    that answers the data-access functions after --db-latency ms
+  - `--db oracle` keeps the database configured by DB_USER/DB_PASSWORD/DB_DSN
+
+`micro` times the parsers, summary generation and DNSConfigGenerator methods:
+
+    python bench_suite.py micro --output micro.json
+
+Both write JSON reports; `compare` prints the change between two of them:
+
+    python bench_suite.py compare baseline.json load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from bench_output_codec import synthetic_dig, synthetic_ping
+
+PROBE_KEYS = ("dig_host1", "dig_host2", "reverse_lookup", "ping_host1", "ping_host2")
+DNS_INTERFACES = ("eth0", "eth1", "ens3", "ens4")
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report_meta(kind: str, args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ""
+    return {
+        "kind": kind,
+        "revision": revision,
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("func", "output")}
+    }
+
+
+def write_report(report: Dict[str, Any], path: Optional[str]):
+    if path:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nreport written to {path}")
+
+
+# --- Stand-ins ---------------------------------------------------------------
+
+class LoopbackDNSResponder:
+    """UDP responder on 127.0.0.1 that answers every A query with 127.0.0.1 and every PTR with a fixed name"""
+
+    PTR_NAME = "bench.loopback."
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, name="dns-responder", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                data, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            response = self.answer(data)
+            if response:
+                self.sock.sendto(response, client)
+
+    def answer(self, data: bytes) -> Optional[bytes]:
+        if len(data) < 12:
+            return None
+        query_id = struct.unpack_from("!H", data, 0)[0]
+        offset = 12
+        while offset < len(data) and data[offset]:
+            offset += data[offset] + 1
+        question_end = offset + 5
+        if question_end > len(data):
+            return None
+        qtype = struct.unpack_from("!H", data, offset + 1)[0]
+        question = data[12:question_end]
+        if qtype == 1:
+            rdata = socket.inet_aton("127.0.0.1")
+        elif qtype == 12:
+            rdata = b"".join(
+                struct.pack("!B", len(label)) + label.encode() for label in self.PTR_NAME.rstrip(".").split(".")
+            ) + b"\x00"
+        else:
+            rdata = None
+        header = struct.pack("!HHHHHH", query_id, 0x8580, 1, 1 if rdata else 0, 0, 0)
+        if rdata is None:
+            return header + question
+        # Answer owner name is a pointer to the question name at offset 12
+        record = struct.pack("!HHHIH", 0xC00C, qtype, 1, 300, len(rdata)) + rdata
+        return header + question + record
+
+    def close(self):
+        self.sock.close()
+
+
+def canned_test_results(index: int) -> Dict[str, Any]:
+    rng = random.Random(index)
+    results = {}
+    for key in PROBE_KEYS:
+        stdout = synthetic_ping(rng, index) if key.startswith("ping") else synthetic_dig(rng, index)
+        results[key] = {
+            "command": f"{key.split('_')[0]} bench-{index}",
+            "returncode": 0,
+            "stdout": stdout,
+            "stderr": "",
+            "success": True
+        }
+    return results
+
+
+def canned_configuration(spec: Dict[str, Any]) -> Dict[str, Any]:
+    domain = spec.get("domain", "example.com")
+    dns_ip = spec.get("dns_ip", "127.0.0.1")
+    serial = datetime.now().strftime("%Y%m%d01")
+    soa = (f"$TTL    86400\n@       IN      SOA     ns1.{domain}. admin.{domain}. (\n"
+           f"                        {serial} ; Serial\n                        3600\n"
+           f"                        1800\n                        1209600\n                        86400 )\n")
+    return {
+        "success": True,
+        "serial": serial,
+        "configurations": {
+            "forward_zone": soa + f"@ IN NS ns1.{domain}.\nns1 IN A {dns_ip}\n"
+                                  f"{spec.get('host1_prefix', 'ns1')} IN A {dns_ip}\n"
+                                  f"{spec.get('host2_prefix', 'client1')} IN A {spec.get('host_ip', dns_ip)}",
+            "reverse_zone": soa + f"@ IN NS ns1.{domain}.\n1 IN PTR ns1.{domain}.",
+            "named_conf_zones": f'zone "{domain}" IN {{\n    type master;\n    file "/etc/bind/db.{domain}";\n}};',
+            "options_config": f"options {{\n    directory \"/var/cache/bind\";\n    listen-on {{ {dns_ip}; }};\n}};"
+        }
+    }
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    """Answers the app_v1 routes app_db calls, after a fixed delay"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body leave in separate writes; with Nagle on, loopback
+    # delayed ACKs add ~40 ms to every response
+    disable_nagle_algorithm = True
+    latency = 0.0
+    variants = 64
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload: Any, status: int = 200):
+        self._send(json.dumps(payload).encode(), "application/json", status)
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._json({"status": "healthy", "service": "fake probe backend"})
+        self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.latency:
+            time.sleep(self.latency)
+        index = random.randrange(self.variants)
+        if self.path == "/test-dns":
+            return self._json({"success": True, "test_results": canned_test_results(index)})
+        if self.path == "/test-dns/batch":
+            return self._json({"success": True, "results": [
+                {"target": target, "success": True, "test_results": canned_test_results(i)}
+                for i, target in enumerate(body.get("targets", []))
+            ]})
+        if self.path == "/test-dns/stream":
+            lines = [
+                json.dumps({"test_type": key, "result": result})
+                for key, result in canned_test_results(index).items()
+            ] + [json.dumps({"done": True, "success": True})]
+            return self._send(("\n".join(lines) + "\n").encode(), "application/x-ndjson")
+        if self.path == "/generate-dns-config":
+            return self._json(canned_configuration(body))
+        if self.path == "/generate-dns-config/bulk":
+            return self._json({"success": True, "results": [canned_configuration(c) for c in body.get("configs", [])]})
+        self._json({"error": "not found"}, 404)
+
+
+class FakeDatabase:
+    """In-memory stand-in for DatabaseManager
+
+    Answers the data-access functions passed to run() by name, after a fixed
+    delay per call; functions without a fake raise NotImplementedError.
+    """
+
+    def __init__(self, latency: float, workers: int = 10):
+        self.pool = None
+        self.latency = latency
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fake-db")
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.sessions: Dict[int, Dict[str, Any]] = {}
+        self.configs: List[Dict[str, Any]] = []
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        self.executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connected": True, "fake": True, "sessions": len(self.sessions), "configs": len(self.configs)}
+
+    async def run(self, func, *args, **kwargs):
+        handler = getattr(self, func.__name__, None)
+        if handler is None:
+            raise NotImplementedError(f"{func.__name__} has no fake implementation")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: self._call(handler, args, kwargs))
+
+    def _call(self, handler, args, kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            return handler(*args, **kwargs)
+
+    def session_id_column_state(self):
+        return False, True
+
+    def allocate_session_ids(self, count: int) -> List[int]:
+        return [next(self.ids) for _ in range(count)]
+
+    def write_pending_sessions(self, sessions) -> List[int]:
+        return self.write_dns_test_sessions([s for s in sessions if s.session_id not in self.sessions])
+
+    def write_dns_test_sessions(self, sessions) -> List[int]:
+        ids = []
+        for session in sessions:
+            session_id = session.session_id or next(self.ids)
+            self.sessions[session_id] = {
+                "session_id": session_id,
+                "test_timestamp": session.tested_at or datetime.now(),
+                "success": 1 if session.results.success else 0,
+                **session.input_data.dict(),
+                "processed": session.processed
+            }
+            ids.append(session_id)
+        return ids
+
+    def fetch_test_results(self, session_id: int) -> Optional[Dict[str, Any]]:
+        row = self.sessions.get(session_id)
+        if row is None:
+            return None
+        return {
+            "session_info": {
+                "session_id": session_id,
+                "dns_ip": row["dns_ip"],
+                "host_ip": row["host_ip"],
+                "domain": row["domain"],
+                "host1_prefix": row["host1_prefix"],
+                "host2_prefix": row["host2_prefix"],
+                "timestamp": row["test_timestamp"].isoformat(),
+                "overall_success": bool(row["success"])
+            },
+            "test_results": {
+                test_type: {
+                    "command": item.result.command,
+                    "return_code": item.result.returncode,
+                    "raw_stdout": item.result.stdout,
+                    "stderr": item.result.stderr,
+                    "success": item.result.success,
+                    "rich_summary": item.rich_summary,
+                    "parsed_data": item.parsed_data
+                }
+                for test_type, item in row["processed"].items()
+            }
+        }
+
+    def write_dns_configuration(self, input_data, configurations):
+        self.write_dns_configurations([(input_data, configurations)])
+
+    def write_dns_configurations(self, items):
+        for input_data, configurations in items:
+            self.configs.append({
+                "config_id": next(self.ids),
+                "created_at": datetime.now(),
+                **{key: getattr(input_data, key) for key in
+                   ("dns_ip", "dns_interface", "host_ip", "host_interface", "domain")},
+                **{key: configurations.get(key) for key in
+                   ("forward_zone", "reverse_zone", "named_conf_zones", "options_config")}
+            })
+
+    def fetch_dns_server_configs(self, dns_interface: str) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.configs if row["dns_interface"] == dns_interface]
+
+    def fetch_keyset_page(self, table, time_column, id_column, columns, filters, after, limit):
+        from app_db import encode_page_cursor
+        rows = self.sessions.values() if table == "dns_test_sessions" else self.configs
+        matches = [
+            row for row in rows
+            if all(row.get(key) == value for key, value in filters.items())
+            and (after is None or (row[time_column], row[id_column]) < after)
+        ]
+        matches.sort(key=lambda row: (row[time_column], row[id_column]), reverse=True)
+        page = [{column: row[column] for column in columns} for row in matches[:limit + 1]]
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_page_cursor(page[-1][time_column], page[-1][id_column])
+        return {"items": page, "next_cursor": next_cursor}
+
+
+def serve_in_thread(server_run: Callable, name: str) -> threading.Thread:
+    thread = threading.Thread(target=server_run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+def start_stand_ins(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the backend, the database stand-in and app_db; return their URLs and handles"""
+    env = {"backend_port": free_port(), "db_port": free_port(), "closers": []}
+
+    if args.backend == "fake":
+        FakeBackendHandler.latency = args.backend_latency / 1000
+        backend = ThreadingHTTPServer(("127.0.0.1", env["backend_port"]), FakeBackendHandler)
+        backend.daemon_threads = True
+        serve_in_thread(backend.serve_forever, "fake-backend")
+        env["closers"].append(backend.shutdown)
+    else:
+        responder = LoopbackDNSResponder()
+        responder.start()
+        env["closers"].append(responder.close)
+        # app_v1 reads these at import
+        os.environ["DNS_QUERY_PORT"] = str(responder.port)
+        os.environ["REVERSE_LOOKUP_SERVER"] = "127.0.0.1"
+        from werkzeug.serving import make_server
+        import app_v1
+        backend = make_server("127.0.0.1", env["backend_port"], app_v1.app, threaded=True)
+        serve_in_thread(backend.serve_forever, "app-v1")
+        env["closers"].append(backend.shutdown)
+
+    os.environ["BACKEND_URL"] = f"http://127.0.0.1:{env['backend_port']}"
+    import uvicorn
+    import app_db
+    if args.db == "fake":
+        app_db.db_manager = FakeDatabase(args.db_latency / 1000)
+    server = uvicorn.Server(uvicorn.Config(
+        app_db.app, host="127.0.0.1", port=env["db_port"], log_level="warning", access_log=False
+    ))
+    serve_in_thread(server.run, "app-db")
+    env["closers"].insert(0, lambda: setattr(server, "should_exit", True))
+
+    wait_for_port(env["backend_port"])
+    wait_for_port(env["db_port"])
+    env["app_db"] = f"http://127.0.0.1:{env['db_port']}"
+    env["backend"] = f"http://127.0.0.1:{env['backend_port']}"
+    return env
+
+
+# --- Load driver -------------------------------------------------------------
+
+def test_input(i: int) -> Dict[str, Any]:
+    return {
+        "dns_ip": "127.0.0.1",
+        "host_ip": f"127.0.{i % 250}.{i % 200 + 1}",
+        "domain": f"bench{i % 20}.test",
+        "host1_prefix": "ns1",
+        "host2_prefix": "client1"
+    }
+
+
+def config_input(i: int) -> Dict[str, Any]:
+    return {
+        **test_input(i),
+        "dns_interface": DNS_INTERFACES[i % len(DNS_INTERFACES)],
+        "dns_username": "bench",
+        "dns_password": "bench",
+        "host_interface": "eth0",
+        "host_username": "bench",
+        "host_password": "bench"
+    }
+
+
+def endpoint_table(session_ids: List[int]) -> Dict[str, tuple]:
+    """name -> (service, method, path for request i, JSON body for request i)"""
+    return {
+        "test-dns": ("app_db", "POST", lambda i: "/test-dns", test_input),
+        "test-dns-stream": ("app_db", "POST", lambda i: "/test-dns/stream", test_input),
+        "generate-dns-config": ("app_db", "POST", lambda i: "/generate-dns-config", config_input),
+        "test-results": ("app_db", "GET", lambda i: f"/test-results/{session_ids[i % len(session_ids)]}", None),
+        "test-sessions": ("app_db", "GET", lambda i: "/test-sessions?limit=50", None),
+        "dns-configurations": ("app_db", "GET", lambda i: "/dns-configurations?limit=50", None),
+        "search-config": (
+            "app_db", "GET", lambda i: f"/search-dns-server-config/{DNS_INTERFACES[i % len(DNS_INTERFACES)]}", None
+        ),
+        "backend-test-dns": ("backend", "POST", lambda i: "/test-dns", test_input),
+        "backend-generate-dns-config": ("backend", "POST", lambda i: "/generate-dns-config", config_input),
+    }
+
+
+DEFAULT_ENDPOINTS = (
+    "test-dns,generate-dns-config,test-results,test-sessions,dns-configurations,search-config,backend-test-dns"
+)
+
+
+async def drive_endpoint(client, base_url: str, method: str, path: Callable, body: Optional[Callable],
+                         concurrency: int, requests: int, duration: float, warmup: int) -> Dict[str, Any]:
+    async def send(i: int) -> bool:
+        async with client.stream(method, base_url + path(i), json=body(i) if body else None) as response:
+            await response.aread()
+            return response.status_code < 400
+
+    for i in range(warmup):
+        await send(i)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+    started = time.perf_counter()
+    stop_at = started + duration if duration else None
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if (not stop_at and i >= requests) or (stop_at and time.perf_counter() >= stop_at):
+                return
+            sent = time.perf_counter()
+            try:
+                ok = await send(warmup + i)
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - sent) * 1000)
+            if not ok:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if not latencies:
+        return {"requests": 0, "errors": 0}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(max(latencies), 3)
+    }
+
+
+async def run_load(args: argparse.Namespace, env: Dict[str, Any]) -> Dict[str, Any]:
+    import httpx
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        # Seed sessions and configurations for the read endpoints
+        session_ids = []
+        for i in range(args.seed_sessions):
+            response = await client.post(env["app_db"] + "/test-dns", json=test_input(i))
+            if response.status_code < 400:
+                session_ids.append(response.json()["session_id"])
+        for i in range(len(DNS_INTERFACES)):
+            await client.post(env["app_db"] + "/generate-dns-config", json=config_input(i))
+
+        table = endpoint_table(session_ids or [1])
+        results = {}
+        for name in args.endpoints.split(","):
+            service, method, path, body = table[name]
+            results[name] = await drive_endpoint(
+                client, env[service], method, path, body,
+                args.concurrency, args.requests, args.duration, args.warmup
+            )
+            r = results[name]
+            if r["requests"]:
+                print(f"{name:<28} {r['requests']:>7} {r['errors']:>6} {r['rps']:>9.1f} "
+                      f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+        return results
+
+
+def load_command(args: argparse.Namespace):
+    table = endpoint_table([1])
+    unknown = [name for name in args.endpoints.split(",") if name not in table]
+    if unknown:
+        sys.exit(f"unknown endpoints: {', '.join(unknown)}; choose from {', '.join(table)}")
+    env = start_stand_ins(args)
+    print(f"app_db {env['app_db']}  backend {env['backend']} ({args.backend})  database {args.db}")
+    print(f"{'endpoint':<28} {'reqs':>7} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    try:
+        results = asyncio.run(run_load(args, env))
+    finally:
+        for close in env["closers"]:
+            close()
+    write_report({"meta": report_meta("load", args), "results": results}, args.output)
+
+
+# --- Micro-benchmarks --------------------------------------------------------
+
+def micro_cases() -> Dict[str, Callable]:
+    from app_db import TestResult, generate_rich_paragraph, parse_dig_output, parse_ping_output
+    from app_v1 import DNSConfigGenerator, network_prefix_for, options_config_for, reverse_zone_for
+
+    rng = random.Random(7)
+    dig_stdout = next(
+        text for text in (synthetic_dig(rng, i) for i in itertools.count()) if "ANSWER SECTION" in text
+    )
+    ping_stdout = synthetic_ping(rng, 1)
+    dig_parsed = parse_dig_output(dig_stdout)
+    ping_parsed = parse_ping_output(ping_stdout)
+    dig_result = TestResult(command="dig @127.0.0.1 ns1.example.com", returncode=0, stdout=dig_stdout, success=True)
+    ping_result = TestResult(command="ping -c 4 ns1.example.com", returncode=0, stdout=ping_stdout, success=True)
+
+    generator = DNSConfigGenerator()
+    zone_args = ("example.com", "10.0.0.1", "10.0.0.2", "ns1", "client1")
+
+    def cold(cached, method, *method_args):
+        def call():
+            cached.cache_clear()
+            return method(*method_args)
+        return call
+
+    return {
+        "parse_dig_output": lambda: parse_dig_output(dig_stdout),
+        "parse_ping_output": lambda: parse_ping_output(ping_stdout),
+        "generate_rich_paragraph[dig]": lambda: generate_rich_paragraph("dig_host1", dig_result, dig_parsed),
+        "generate_rich_paragraph[ping]": lambda: generate_rich_paragraph("ping_host1", ping_result, ping_parsed),
+        "DNSConfigGenerator.generate_serial": generator.generate_serial,
+        "DNSConfigGenerator.get_reverse_zone": lambda: generator.get_reverse_zone("10.0.0.1"),
+        "DNSConfigGenerator.get_reverse_zone[cold]": cold(reverse_zone_for, generator.get_reverse_zone, "10.0.0.1"),
+        "DNSConfigGenerator.get_network_prefix": lambda: generator.get_network_prefix("10.0.0.1"),
+        "DNSConfigGenerator.get_network_prefix[cold]": cold(network_prefix_for, generator.get_network_prefix, "10.0.0.1"),
+        "DNSConfigGenerator.generate_named_conf_zones": lambda: generator.generate_named_conf_zones(*zone_args[:2]),
+        "DNSConfigGenerator.generate_options_config": lambda: generator.generate_options_config("10.0.0.1"),
+        "DNSConfigGenerator.generate_options_config[cold]": cold(options_config_for, generator.generate_options_config, "10.0.0.1"),
+        "DNSConfigGenerator.generate_forward_zone": lambda: generator.generate_forward_zone(*zone_args),
+        "DNSConfigGenerator.generate_reverse_zone": lambda: generator.generate_reverse_zone(*zone_args),
+        "DNSConfigGenerator.generate_zone_records": lambda: generator.generate_zone_records(*zone_args),
+    }
+
+
+def micro_command(args: argparse.Namespace):
+    cases = micro_cases()
+    selected = [name for name in cases if not args.filter or args.filter in name]
+    results = {}
+    print(f"{'benchmark':<50} {'best ns/op':>12} {'median ns/op':>13}")
+    for name in selected:
+        timer = timeit.Timer(cases[name])
+        number, _ = timer.autorange()
+        runs = [t / number * 1e9 for t in timer.repeat(repeat=args.repeat, number=number)]
+        runs.sort()
+        results[name] = {
+            "loops": number,
+            "best_ns": round(runs[0], 1),
+            "median_ns": round(runs[len(runs) // 2], 1)
+        }
+        print(f"{name:<50} {results[name]['best_ns']:>12.1f} {results[name]['median_ns']:>13.1f}")
+    write_report({"meta": report_meta("micro", args), "results": results}, args.output)
+
+
+# --- Comparison --------------------------------------------------------------
+
+COMPARE_METRICS = {
+    "load": ("rps", "p50_ms", "p95_ms", "p99_ms"),
+    "micro": ("best_ns", "median_ns"),
+}
+
+
+def compare_command(args: argparse.Namespace):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    kind = current["meta"]["kind"]
+    if baseline["meta"]["kind"] != kind:
+        sys.exit("reports are of different kinds")
+    print(f"baseline {baseline['meta']['revision'] or '?'} ({baseline['meta']['timestamp']})")
+    print(f"current  {current['meta']['revision'] or '?'} ({current['meta']['timestamp']})\n")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name}: new")
+            continue
+        changes = []
+        for metric in COMPARE_METRICS[kind]:
+            if metric not in result or not before.get(metric):
+                continue
+            change = (result[metric] - before[metric]) / before[metric] * 100
+            changes.append(f"{metric} {before[metric]:g} -> {result[metric]:g} ({change:+.1f}%)")
+        print(f"{name}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="drive concurrent load at the endpoints")
+    load.add_argument("--endpoints", default=DEFAULT_ENDPOINTS,
+                      help="comma-separated endpoints to drive, one after another")
+    load.add_argument("--concurrency", type=int, default=16, help="concurrent requests")
+    load.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    load.add_argument("--duration", type=float, default=0,
+                      help="seconds per endpoint instead of a request count")
+    load.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint")
+    load.add_argument("--timeout", type=float, default=60, help="client timeout per request")
+    load.add_argument("--seed-sessions", type=int, default=50,
+                      help="test sessions created up front for the read endpoints")
+    load.add_argument("--backend", choices=("fake", "app_v1"), default="fake")
+    load.add_argument("--backend-latency", type=float, default=5, help="fake backend delay per call (ms)")
+    load.add_argument("--db", choices=("fake", "oracle"), default="fake")
+    load.add_argument("--db-latency", type=float, default=2, help="fake database delay per call (ms)")
+    load.add_argument("--output", help="write the JSON report here")
+    load.set_defaults(func=load_command)
+
+    micro = commands.add_parser("micro", help="time parsers, summaries and config generation")
+    micro.add_argument("--repeat", type=int, default=5, help="timing runs per benchmark")
+    micro.add_argument("--filter", help="only benchmarks whose name contains this")
+    micro.add_argument("--output", help="write the JSON report here")
+    micro.set_defaults(func=micro_command)
+
+    compare = commands.add_parser("compare", help="compare two JSON reports")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.set_defaults(func=compare_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
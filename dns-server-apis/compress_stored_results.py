@@ -0,0 +1,146 @@
+"""Rewrite stored probe output into the compressed storage format
+
+Streams dns_test_results rows whose output_codec differs from the target in
+result_id order, compresses stdout/stderr across a process pool and moves
+them into the BLOB columns, clearing the CLOB copies. `--codec none` moves
+rows back to uncompressed CLOBs.
+
+    python compress_stored_results.py --codec zlib --batch-size 2000 --workers 8
+
+The freed LOB segments are only returned to the tablespace after a
+`ALTER TABLE dns_test_results MOVE LOB (stdout_raw, stderr_output) STORE AS (...)`
+or `SHRINK SPACE CASCADE`.
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import oracledb
+
+from app_db import db_manager
+from output_codec import CodecUnavailable, compress_output, decompress_output, resolve_codec
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("compress_stored_results")
+
+# Stream CLOBs and BLOBs as str/bytes so a batch is fetched in one round trip
+oracledb.defaults.fetch_lobs = False
+
+SELECT_BATCH = """
+SELECT result_id, stdout_raw, stderr_output, stdout_blob, stderr_blob, output_codec
+FROM dns_test_results
+WHERE result_id > :last_id
+  AND NVL(output_codec, 'none') != :target
+ORDER BY result_id
+FETCH FIRST :batch_size ROWS ONLY
+"""
+
+UPDATE_BATCH = """
+UPDATE dns_test_results
+SET stdout_raw = :stdout, stderr_output = :stderr,
+    stdout_blob = :stdout_blob, stderr_blob = :stderr_blob,
+    output_codec = :output_codec
+WHERE result_id = :result_id
+"""
+
+
+def recode_row(row, codec):
+    """Convert one row to the target codec; runs in a worker process"""
+    result_id, stdout, stderr, stdout_blob, stderr_blob, current = row
+    if current:
+        stdout = decompress_output(stdout_blob, current)
+        stderr = decompress_output(stderr_blob, current)
+    raw_bytes = len((stdout or "").encode("utf-8")) + len((stderr or "").encode("utf-8"))
+    update = {
+        "result_id": result_id,
+        "stdout": None if codec else stdout,
+        "stderr": None if codec else stderr,
+        "stdout_blob": compress_output(stdout, codec) if codec else None,
+        "stderr_blob": compress_output(stderr, codec) if codec else None,
+        "output_codec": codec
+    }
+    stored_bytes = raw_bytes if not codec else sum(
+        len(update[key]) for key in ("stdout_blob", "stderr_blob") if update[key] is not None
+    )
+    return update, raw_bytes, stored_bytes
+
+
+def recode_batch(rows, codec):
+    return [recode_row(row, codec) for row in rows]
+
+
+def migrate(codec, batch_size: int, workers: int, start_after: int):
+    connection = db_manager.standalone_connection()
+    read_cursor = connection.cursor()
+    read_cursor.arraysize = batch_size
+    read_cursor.prefetchrows = batch_size + 1
+    write_cursor = connection.cursor()
+    workers = workers or os.cpu_count()
+
+    last_id = start_after
+    total = 0
+    raw_total = 0
+    stored_total = 0
+    started = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                read_cursor.execute(SELECT_BATCH, {
+                    "last_id": last_id, "target": codec or "none", "batch_size": batch_size
+                })
+                rows = read_cursor.fetchall()
+                if not rows:
+                    break
+                chunk = max(1, len(rows) // (workers * 4))
+                chunks = [rows[i:i + chunk] for i in range(0, len(rows), chunk)]
+                updates = []
+                for recoded in pool.map(recode_batch, chunks, [codec] * len(chunks)):
+                    for update, raw_bytes, stored_bytes in recoded:
+                        updates.append(update)
+                        raw_total += raw_bytes
+                        stored_total += stored_bytes
+                write_cursor.setinputsizes(
+                    stdout=oracledb.DB_TYPE_LONG,
+                    stderr=oracledb.DB_TYPE_LONG,
+                    stdout_blob=oracledb.DB_TYPE_LONG_RAW,
+                    stderr_blob=oracledb.DB_TYPE_LONG_RAW,
+                    output_codec=oracledb.DB_TYPE_VARCHAR
+                )
+                write_cursor.executemany(UPDATE_BATCH, updates)
+                connection.commit()
+                last_id = rows[-1][0]
+                total += len(rows)
+                elapsed = time.monotonic() - started
+                ratio = raw_total / stored_total if stored_total else 0.0
+                logger.info(
+                    f"Rewrote {total} rows up to result_id {last_id} "
+                    f"({total / elapsed:.0f} rows/s, {raw_total} -> {stored_total} bytes, ratio {ratio:.1f}x)"
+                )
+    finally:
+        read_cursor.close()
+        write_cursor.close()
+        connection.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--codec", default=os.getenv("RESULT_OUTPUT_CODEC", "zlib"),
+                        help="target codec: zlib, zstd or none (default: RESULT_OUTPUT_CODEC, else zlib)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows fetched and updated per transaction")
+    parser.add_argument("--workers", type=int, default=None, help="compression processes (default: CPU count)")
+    parser.add_argument("--start-after", type=int, default=0, help="resume after this result_id")
+    args = parser.parse_args()
+
+    try:
+        codec = resolve_codec(args.codec)
+    except CodecUnavailable as e:
+        parser.error(str(e))
+    total = migrate(codec, args.batch_size, args.workers, args.start_after)
+    logger.info(f"Migration complete: {total} rows stored as {codec or 'uncompressed CLOBs'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""In-process DNS client used by the probe API instead of forking dig"""
+import ipaddress
+import random
+import socket
+import struct
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+RECORD_TYPES = {
+    1: "A",
+    2: "NS",
+    5: "CNAME",
+    6: "SOA",
+    12: "PTR",
+    15: "MX",
+    16: "TXT",
+    28: "AAAA",
+}
+RECORD_TYPE_CODES = {name: code for code, name in RECORD_TYPES.items()}
+
+RCODES = {
+    0: "NOERROR",
+    1: "FORMERR",
+    2: "SERVFAIL",
+    3: "NXDOMAIN",
+    4: "NOTIMP",
+    5: "REFUSED",
+}
+
+# Header flag bits in the order dig prints them
+HEADER_FLAGS = [
+    ("qr", 0x8000),
+    ("aa", 0x0400),
+    ("tc", 0x0200),
+    ("rd", 0x0100),
+    ("ra", 0x0080),
+    ("ad", 0x0020),
+    ("cd", 0x0010),
+]
+
+CLASS_IN = 1
+MAX_UDP_SIZE = 4096
+
+
+class DNSQueryError(Exception):
+    """Raised when no usable response could be obtained from the server"""
+
+
+class DNSTimeout(DNSQueryError):
+    """No reply arrived within the timeout on any try"""
+
+
+class DNSBadPacket(DNSQueryError):
+    """A reply arrived but could not be decoded"""
+
+
+def system_nameserver(resolv_conf: str = "/etc/resolv.conf") -> str:
+    """Return the first nameserver from resolv.conf, as dig does without @server"""
+    try:
+        with open(resolv_conf) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    return parts[1]
+    except OSError:
+        pass
+    return "127.0.0.1"
+
+
+def reverse_name(ip_address: str) -> str:
+    """Convert an IP address to its in-addr.arpa / ip6.arpa name"""
+    return ipaddress.ip_address(ip_address).reverse_pointer
+
+
+def build_query(qname: str, qtype: str, query_id: int, recursion_desired: bool = True) -> bytes:
+    """Build a wire-format query message for a single question"""
+    flags = 0x0100 if recursion_desired else 0
+    header = struct.pack("!HHHHHH", query_id, flags, 1, 0, 0, 0)
+    question = b""
+    for label in qname.rstrip(".").split("."):
+        if label:
+            encoded = label.encode("idna")
+            question += struct.pack("!B", len(encoded)) + encoded
+    question += b"\x00" + struct.pack("!HH", RECORD_TYPE_CODES[qtype], CLASS_IN)
+    return header + question
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Read a possibly compressed domain name, returning it with a trailing dot"""
+    labels = []
+    end_offset = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DNSBadPacket("truncated name")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if jumps > 64:
+                raise DNSBadPacket("compression loop")
+            pointer = struct.unpack_from("!H", data, offset)[0] & 0x3FFF
+            if end_offset is None:
+                end_offset = offset + 2
+            offset = pointer
+            jumps += 1
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode("ascii", errors="replace"))
+        offset += length
+    return ".".join(labels) + ".", end_offset if end_offset is not None else offset
+
+
+def _read_rdata(data: bytes, rtype: int, offset: int, rdlength: int) -> str:
+    """Render record data the way dig shows it"""
+    rdata = data[offset:offset + rdlength]
+    if rtype == 1 and rdlength == 4:
+        return socket.inet_ntop(socket.AF_INET, rdata)
+    if rtype == 28 and rdlength == 16:
+        return socket.inet_ntop(socket.AF_INET6, rdata)
+    if rtype in (2, 5, 12):
+        return _read_name(data, offset)[0]
+    if rtype == 15:
+        preference = struct.unpack_from("!H", data, offset)[0]
+        return f"{preference} {_read_name(data, offset + 2)[0]}"
+    if rtype == 6:
+        mname, pos = _read_name(data, offset)
+        rname, pos = _read_name(data, pos)
+        numbers = struct.unpack_from("!IIIII", data, pos)
+        return " ".join([mname, rname] + [str(n) for n in numbers])
+    if rtype == 16:
+        strings, pos = [], 0
+        while pos < len(rdata):
+            length = rdata[pos]
+            strings.append('"' + rdata[pos + 1:pos + 1 + length].decode("utf-8", errors="replace") + '"')
+            pos += 1 + length
+        return " ".join(strings)
+    return "\\# %d %s" % (rdlength, rdata.hex())
+
+
+def _read_records(data: bytes, offset: int, count: int) -> Tuple[List[Dict[str, Any]], int]:
+    records = []
+    for _ in range(count):
+        name, offset = _read_name(data, offset)
+        rtype, rclass, ttl, rdlength = struct.unpack_from("!HHIH", data, offset)
+        offset += 10
+        if offset + rdlength > len(data):
+            raise DNSBadPacket("truncated record")
+        records.append({
+            "name": name,
+            "ttl": ttl,
+            "class": "IN" if rclass == CLASS_IN else f"CLASS{rclass}",
+            "type": RECORD_TYPES.get(rtype, f"TYPE{rtype}"),
+            "value": _read_rdata(data, rtype, offset, rdlength)
+        })
+        offset += rdlength
+    return records, offset
+
+
+def parse_response(data: bytes) -> Dict[str, Any]:
+    """Decode a wire-format DNS response
+
+    Truncated or malformed messages raise DNSBadPacket.
+    """
+    if len(data) < 12:
+        raise DNSBadPacket("unexpected end of input")
+    try:
+        return _parse_message(data)
+    except (struct.error, IndexError) as e:
+        raise DNSBadPacket("unexpected end of input") from e
+    except ValueError as e:
+        raise DNSBadPacket(str(e)) from e
+
+
+def _parse_message(data: bytes) -> Dict[str, Any]:
+    query_id, flags, qdcount, ancount, nscount, arcount = struct.unpack_from("!HHHHHH", data, 0)
+    offset = 12
+    questions = []
+    for _ in range(qdcount):
+        qname, offset = _read_name(data, offset)
+        qtype, qclass = struct.unpack_from("!HH", data, offset)
+        offset += 4
+        questions.append({
+            "name": qname,
+            "class": "IN" if qclass == CLASS_IN else f"CLASS{qclass}",
+            "type": RECORD_TYPES.get(qtype, f"TYPE{qtype}")
+        })
+    answers, offset = _read_records(data, offset, ancount)
+    authority, offset = _read_records(data, offset, nscount)
+    additional, offset = _read_records(data, offset, arcount)
+
+    rcode = flags & 0x000F
+    return {
+        "id": query_id,
+        "opcode": "QUERY" if (flags >> 11) & 0xF == 0 else str((flags >> 11) & 0xF),
+        "status": RCODES.get(rcode, f"RCODE{rcode}"),
+        "flags": [name for name, bit in HEADER_FLAGS if flags & bit],
+        "truncated": bool(flags & 0x0200),
+        "question": questions,
+        "answer": answers,
+        "authority": authority,
+        "additional": additional,
+        "message_size": len(data)
+    }
+
+
+def _recv_exact(sock: socket.socket, length: int) -> bytes:
+    data = b""
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed by server")
+        data += chunk
+    return data
+
+
+def _exchange_udp(message: bytes, server: str, port: int, query_id: int, timeout: float) -> bytes:
+    family = socket.AF_INET6 if ":" in server else socket.AF_INET
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect((server, port))
+        sock.send(message)
+        deadline = time.monotonic() + timeout
+        while True:
+            data = sock.recv(MAX_UDP_SIZE)
+            # Ignore stray datagrams that do not answer our query
+            if len(data) >= 2 and struct.unpack_from("!H", data, 0)[0] == query_id:
+                return data
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("timed out")
+            sock.settimeout(remaining)
+
+
+def _exchange_tcp(message: bytes, server: str, port: int, timeout: float) -> bytes:
+    with socket.create_connection((server, port), timeout=timeout) as sock:
+        sock.sendall(struct.pack("!H", len(message)) + message)
+        length = struct.unpack("!H", _recv_exact(sock, 2))[0]
+        return _recv_exact(sock, length)
+
+
+def query(server: str, qname: str, qtype: str = "A", port: int = 53,
+          timeout: float = 5.0, tries: int = 3, tcp: bool = False) -> Dict[str, Any]:
+    """Send a query to server and return the decoded response with timing information
+
+    Retries over UDP up to `tries` times and falls back to TCP when the
+    response is truncated, as dig does.
+    """
+    query_id = random.randint(0, 0xFFFF)
+    message = build_query(qname, qtype, query_id)
+    protocol = "TCP" if tcp else "UDP"
+    last_error: Optional[Exception] = None
+
+    for _ in range(1 if tcp else tries):
+        started = time.monotonic()
+        try:
+            if tcp:
+                data = _exchange_tcp(message, server, port, timeout)
+            else:
+                data = _exchange_udp(message, server, port, query_id, timeout)
+                if parse_response(data)["truncated"]:
+                    protocol = "TCP"
+                    started = time.monotonic()
+                    data = _exchange_tcp(message, server, port, timeout)
+            elapsed_ms = int((time.monotonic() - started) * 1000)
+            response = parse_response(data)
+            response.update({
+                "query_time": elapsed_ms,
+                "server": {"ip": server, "port": str(port)},
+                "protocol": protocol,
+                "when": datetime.now().astimezone()
+            })
+            return response
+        except (socket.timeout, OSError) as e:
+            last_error = e
+
+    if isinstance(last_error, socket.timeout):
+        raise DNSTimeout(f"communications error to {server}#{port}: timed out")
+    reason = getattr(last_error, "strerror", None) or last_error
+    raise DNSQueryError(f"communications error to {server}#{port}: {reason}")
+
+
+def to_parsed_data(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a decoded response into the structure parse_dig_output returns"""
+    return {
+        "query_time": response["query_time"],
+        "server": response["server"],
+        "answer_section": [
+            {
+                "name": record["name"].rstrip("."),
+                "ttl": str(record["ttl"]),
+                "class": record["class"],
+                "type": record["type"],
+                "value": record["value"]
+            }
+            for record in response["answer"]
+        ],
+        "status": response["status"],
+        "flags": " ".join(response["flags"]),
+        "message_size": response["message_size"]
+    }
+
+
+def _format_records(title: str, records: List[Dict[str, Any]]) -> List[str]:
+    if not records:
+        return []
+    lines = [f";; {title} SECTION:"]
+    for record in records:
+        lines.append(f"{record['name']}\t\t{record['ttl']}\t{record['class']}\t{record['type']}\t{record['value']}")
+    lines.append("")
+    return lines
+
+
+def format_dig(response: Dict[str, Any], args: str) -> str:
+    """Render a decoded response as dig-compatible stdout"""
+    server = response["server"]
+    lines = [
+        "",
+        f"; <<>> DiG native <<>> {args}",
+        ";; global options: +cmd",
+        ";; Got answer:",
+        f";; ->>HEADER<<- opcode: {response['opcode']}, status: {response['status']}, id: {response['id']}",
+        f";; flags: {' '.join(response['flags'])}; QUERY: {len(response['question'])}, "
+        f"ANSWER: {len(response['answer'])}, AUTHORITY: {len(response['authority'])}, "
+        f"ADDITIONAL: {len(response['additional'])}",
+        "",
+        ";; QUESTION SECTION:"
+    ]
+    for question in response["question"]:
+        lines.append(f";{question['name']}\t\t\t{question['class']}\t{question['type']}")
+    lines.append("")
+    lines += _format_records("ANSWER", response["answer"])
+    lines += _format_records("AUTHORITY", response["authority"])
+    lines += _format_records("ADDITIONAL", response["additional"])
+    lines += [
+        f";; Query time: {response['query_time']} msec",
+        f";; SERVER: {server['ip']}#{server['port']}({server['ip']}) ({response['protocol']})",
+        f";; WHEN: {response['when'].strftime('%a %b %d %H:%M:%S %Z %Y')}",
+        f";; MSG SIZE  rcvd: {response['message_size']}",
+        "",
+        ""
+    ]
+    return "\n".join(lines)
+
+
+def format_dig_error(error: Exception, args: str) -> str:
+    """Render a failed query the way dig reports it: a bad packet, a timeout or a communications error"""
+    if isinstance(error, DNSBadPacket):
+        detail = [f";; Got bad packet: {error}"]
+    elif isinstance(error, DNSTimeout):
+        detail = [f";; {error}", ";; connection timed out; no servers could be reached"]
+    else:
+        detail = [f";; {error}", ";; no servers could be reached"]
+    return "\n".join([
+        "",
+        f"; <<>> DiG native <<>> {args}",
+        ";; global options: +cmd",
+        *detail,
+        ""
+    ])
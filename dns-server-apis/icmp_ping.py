@@ -0,0 +1,268 @@
+"""In-process ICMP echo probe used by the probe API instead of forking ping
+
+Uses unprivileged Linux ping sockets (SOCK_DGRAM/IPPROTO_ICMP), which are
+allowed for groups listed in /proc/sys/net/ipv4/ping_group_range, and falls
+back to a raw socket when the process is privileged. Several targets share one
+socket; replies are matched by identifier and sequence number.
+
+A raw socket sees every echo reply the host receives, so each raw session
+takes its own identifier from a process-wide counter; concurrent pings in
+the same process then never accept each other's replies.
+"""
+import itertools
+import math
+import os
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+PAYLOAD_SIZE = 56
+PING_GROUP_RANGE = "/proc/sys/net/ipv4/ping_group_range"
+
+# Raw-socket identifiers; the random start keeps other processes' ids apart
+_raw_identifiers = itertools.count(random.randrange(0x10000))
+_raw_identifiers_lock = threading.Lock()
+
+
+class ICMPUnavailable(Exception):
+    """Raised when neither a ping socket nor a raw socket can be opened"""
+
+
+def ping_group_allowed(path: str = PING_GROUP_RANGE) -> bool:
+    """Check whether any of our groups falls inside ping_group_range"""
+    try:
+        with open(path) as f:
+            low, high = (int(value) for value in f.read().split())
+    except (OSError, ValueError):
+        return False
+    groups = set(os.getgroups()) | {os.getgid(), os.getegid()}
+    return any(low <= gid <= high for gid in groups)
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack("!%dH" % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(identifier: int, sequence: int) -> bytes:
+    payload = bytes(i & 0xFF for i in range(PAYLOAD_SIZE))
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+class _ICMPSocket:
+    """Wraps a ping or raw ICMP socket and hides the differences between them"""
+
+    def __init__(self):
+        self.raw = False
+        if ping_group_allowed():
+            try:
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            except OSError:
+                self.sock = None
+        else:
+            self.sock = None
+        if self.sock is None:
+            try:
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+                self.raw = True
+            except OSError as e:
+                raise ICMPUnavailable(
+                    f"Cannot open ICMP socket ({e}); add the service group to {PING_GROUP_RANGE}"
+                ) from e
+        self.sock.setblocking(False)
+        if not self.raw:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_RECVTTL, 1)
+            # The kernel rewrites the identifier to the socket's local port
+            self.sock.bind(("", 0))
+            self.identifier = self.sock.getsockname()[1]
+        else:
+            with _raw_identifiers_lock:
+                self.identifier = next(_raw_identifiers) & 0xFFFF
+
+    def send(self, address: str, sequence: int):
+        self.sock.sendto(_echo_request(self.identifier, sequence), (address, 0))
+
+    def receive(self):
+        """Return (address, sequence, ttl) for an echo reply addressed to us, else None"""
+        data, ancdata, _, sender = self.sock.recvmsg(2048, socket.CMSG_SPACE(4))
+        ttl = None
+        if self.raw:
+            header_length = (data[0] & 0x0F) * 4
+            ttl = data[8]
+            data = data[header_length:]
+        else:
+            for level, kind, value in ancdata:
+                if level == socket.IPPROTO_IP and kind == socket.IP_TTL:
+                    ttl = struct.unpack("i", value[:4])[0]
+        if len(data) < 8:
+            return None
+        icmp_type, _, _, identifier, sequence = struct.unpack("!BBHHH", data[:8])
+        if icmp_type != ICMP_ECHO_REPLY or identifier != self.identifier:
+            return None
+        return sender[0], sequence, ttl
+
+    def close(self):
+        self.sock.close()
+
+
+def _summarize(target: Dict[str, Any], count: int, elapsed_ms: int) -> Dict[str, Any]:
+    """Build the result for one host; `count` is the number of requests actually sent"""
+    target["replies"].sort(key=lambda reply: reply["icmp_seq"])
+    rtts = [reply["time"] for reply in target["replies"]]
+    received = len(rtts)
+    result = {
+        "target_ip": target["address"],
+        "packets_transmitted": count,
+        "packets_received": received,
+        "packet_loss": round(100.0 * (count - received) / count, 4) if count else 0.0,
+        "rtt_stats": None,
+        "individual_pings": rtts,
+        "replies": target["replies"],
+        "time": elapsed_ms
+    }
+    if rtts:
+        avg = sum(rtts) / received
+        mdev = math.sqrt(max(sum(r * r for r in rtts) / received - avg * avg, 0.0))
+        result["rtt_stats"] = {
+            "min": round(min(rtts), 3),
+            "avg": round(avg, 3),
+            "max": round(max(rtts), 3),
+            "mdev": round(mdev, 3)
+        }
+    return result
+
+
+def ping_many(hosts: List[str], count: int = 4, interval: float = 1.0,
+              timeout: float = 1.0, deadline: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """Ping every host over one ICMP socket
+
+    Sends `count` echo requests to each host, one round every `interval`
+    seconds, and waits up to `timeout` seconds for each reply. With
+    `deadline`, stops sending and waiting that many seconds after the start,
+    like ping -w; only the rounds sent by then are counted. Returns the
+    parse_ping_output structure per host; unresolvable hosts get an "error".
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    targets: Dict[str, Dict[str, Any]] = {}
+    for host in dict.fromkeys(hosts):
+        try:
+            address = socket.gethostbyname(host)
+        except OSError as e:
+            results[host] = {"error": f"ping: {host}: {e.strerror or e}"}
+            continue
+        targets[host] = {"address": address, "replies": []}
+    if not targets:
+        return results
+
+    icmp = _ICMPSocket()
+    # sequence -> (host, send time, icmp_seq)
+    outstanding: Dict[int, tuple] = {}
+    sequence = 0
+    rounds_sent = 0
+    started = time.monotonic()
+    stop_at = started + deadline if deadline is not None else None
+    try:
+        for round_number in range(count):
+            round_started = time.monotonic()
+            if stop_at is not None and round_started >= stop_at:
+                break
+            rounds_sent += 1
+            for host, target in targets.items():
+                sequence = (sequence + 1) & 0xFFFF
+                outstanding[sequence] = (host, time.monotonic(), round_number + 1)
+                try:
+                    icmp.send(target["address"], sequence)
+                except OSError:
+                    outstanding.pop(sequence)
+            if round_number < count - 1:
+                wait_until = round_started + interval
+            else:
+                wait_until = time.monotonic() + timeout
+            if stop_at is not None:
+                wait_until = min(wait_until, stop_at)
+            last_round = round_number == count - 1
+            while True:
+                remaining = wait_until - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not outstanding:
+                    if not last_round:
+                        time.sleep(remaining)
+                    break
+                readable, _, _ = select.select([icmp.sock], [], [], remaining)
+                if not readable:
+                    break
+                try:
+                    reply = icmp.receive()
+                except (BlockingIOError, InterruptedError):
+                    continue
+                if reply is None or reply[1] not in outstanding:
+                    continue
+                sender, reply_sequence, ttl = reply
+                host, sent_at, icmp_seq = outstanding[reply_sequence]
+                rtt_ms = (time.monotonic() - sent_at) * 1000
+                if sender != targets[host]["address"] or rtt_ms > timeout * 1000:
+                    continue
+                del outstanding[reply_sequence]
+                targets[host]["replies"].append({"icmp_seq": icmp_seq, "ttl": ttl, "time": round(rtt_ms, 3)})
+            # Requests older than the per-packet timeout are lost
+            now = time.monotonic()
+            for seq in [s for s, (_, sent_at, _) in outstanding.items() if now - sent_at > timeout]:
+                del outstanding[seq]
+    finally:
+        icmp.close()
+
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+    for host, target in targets.items():
+        results[host] = _summarize(target, rounds_sent, elapsed_ms)
+    return results
+
+
+def format_ping(host: str, result: Dict[str, Any]) -> str:
+    """Render a ping_many result as ping-compatible stdout"""
+    address = result["target_ip"]
+    lines = [f"PING {host} ({address}) {PAYLOAD_SIZE}({PAYLOAD_SIZE + 28}) bytes of data."]
+    for reply in result["replies"]:
+        ttl = f" ttl={reply['ttl']}" if reply["ttl"] is not None else ""
+        lines.append(
+            f"{PAYLOAD_SIZE + 8} bytes from {address} ({address}): "
+            f"icmp_seq={reply['icmp_seq']}{ttl} time={reply['time']} ms"
+        )
+    lines += [
+        "",
+        f"--- {host} ping statistics ---",
+        f"{result['packets_transmitted']} packets transmitted, {result['packets_received']} received, "
+        f"{result['packet_loss']:g}% packet loss, time {result['time']}ms"
+    ]
+    rtt = result["rtt_stats"]
+    if rtt:
+        lines.append(f"rtt min/avg/max/mdev = {rtt['min']:.3f}/{rtt['avg']:.3f}/{rtt['max']:.3f}/{rtt['mdev']:.3f} ms")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def to_parsed_data(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a ping_many result to the structure parse_ping_output returns"""
+    return {key: result.get(key) for key in (
+        "target_ip", "packets_transmitted", "packets_received",
+        "packet_loss", "rtt_stats", "individual_pings"
+    )}
+
+
+def ping_returncode(result: Optional[Dict[str, Any]]) -> int:
+    """Exit status ping would have returned for this result"""
+    if not result or "error" in result:
+        return 2
+    return 0 if result["packets_received"] else 1
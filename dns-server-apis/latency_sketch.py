@@ -0,0 +1,65 @@
+"""Mergeable latency sketch for the hourly rollups
+
+Latencies are counted in logarithmic bins whose width is a fixed fraction
+of their value (the DDSketch layout), so any quantile read back from the
+bins is within RELATIVE_ACCURACY of the true sample value. Two sketches
+merge by adding bin counts, which lets the database keep one row per bin
+and update it with plain increments.
+
+Bin 0 holds every value at or below MIN_VALUE_MS, which covers dig's
+"Query time: 0 msec".
+"""
+import math
+from typing import Dict, Iterable, List, Optional
+
+RELATIVE_ACCURACY = 0.02
+MIN_VALUE_MS = 0.01
+
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def bin_index(value_ms: float) -> int:
+    if value_ms <= MIN_VALUE_MS:
+        return 0
+    return max(1, math.ceil(math.log(value_ms / MIN_VALUE_MS) / _LOG_GAMMA))
+
+
+def bin_value(index: int) -> float:
+    """Representative value of a bin, within RELATIVE_ACCURACY of anything counted in it"""
+    if index <= 0:
+        return 0.0
+    return 2 * MIN_VALUE_MS * GAMMA ** index / (GAMMA + 1)
+
+
+def add_values(bins: Dict[int, int], values: Iterable[float]) -> Dict[int, int]:
+    for value in values:
+        index = bin_index(value)
+        bins[index] = bins.get(index, 0) + 1
+    return bins
+
+
+def merge(target: Dict[int, int], other: Dict[int, int]) -> Dict[int, int]:
+    for index, count in other.items():
+        target[index] = target.get(index, 0) + count
+    return target
+
+
+def quantiles(bins: Dict[int, int], fractions=DEFAULT_QUANTILES) -> List[Optional[float]]:
+    """Estimate each quantile from bin counts; None when the sketch is empty"""
+    total = sum(bins.values())
+    if not total:
+        return [None] * len(fractions)
+    ordered = sorted(bins.items())
+    estimates = []
+    for fraction in fractions:
+        rank = fraction * (total - 1)
+        seen = 0
+        for index, count in ordered:
+            seen += count
+            if seen > rank:
+                estimates.append(round(bin_value(index), 3))
+                break
+    return estimates
@@ -0,0 +1,68 @@
+"""Switch dns_test_sessions.session_id from an identity column to DNS_TEST_SESSIONS_SEQ
+
+Write-behind persistence (WRITE_BEHIND=1) hands out session ids before the
+row is inserted, so the ids must come from a sequence the application can
+read. This one-off migration drops the identity from session_id, makes the
+sequence its DEFAULT ON NULL so direct inserts keep working, caches 100
+values and moves the sequence past the highest existing id:
+
+    python migrate_session_ids.py
+
+Run it once, before enabling WRITE_BEHIND. It checks the column first, so
+running it again on a migrated schema changes nothing.
+"""
+import logging
+
+from app_db import db_manager, session_id_column_state
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("migrate_session_ids")
+
+SYNC_SEQUENCE = """
+DECLARE
+    max_id NUMBER;
+    next_id NUMBER;
+BEGIN
+    SELECT NVL(MAX(session_id), 0) INTO max_id FROM dns_test_sessions;
+    SELECT DNS_TEST_SESSIONS_SEQ.NEXTVAL INTO next_id FROM dual;
+    IF next_id <= max_id THEN
+        EXECUTE IMMEDIATE 'ALTER SEQUENCE DNS_TEST_SESSIONS_SEQ RESTART START WITH ' || (max_id + 1);
+    END IF;
+END;
+"""
+
+
+def migrate(connection) -> bool:
+    """Apply whichever steps are still missing; returns False if there was nothing to do"""
+    cursor = connection.cursor()
+    try:
+        identity, default_on_null = session_id_column_state(connection)
+        if not identity and default_on_null:
+            return False
+        if identity:
+            logger.info("Dropping the identity from dns_test_sessions.session_id")
+            cursor.execute("ALTER TABLE dns_test_sessions MODIFY session_id DROP IDENTITY")
+        logger.info("Defaulting session_id to DNS_TEST_SESSIONS_SEQ.NEXTVAL")
+        cursor.execute(
+            "ALTER TABLE dns_test_sessions MODIFY session_id DEFAULT ON NULL DNS_TEST_SESSIONS_SEQ.NEXTVAL"
+        )
+        cursor.execute("ALTER SEQUENCE DNS_TEST_SESSIONS_SEQ CACHE 100")
+        cursor.execute(SYNC_SEQUENCE)
+        return True
+    finally:
+        cursor.close()
+
+
+def main():
+    connection = db_manager.standalone_connection()
+    try:
+        if migrate(connection):
+            logger.info("Migration complete: session ids now come from DNS_TEST_SESSIONS_SEQ")
+        else:
+            logger.info("Nothing to do: session ids already come from DNS_TEST_SESSIONS_SEQ")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
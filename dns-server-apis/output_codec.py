@@ -0,0 +1,75 @@
+"""Compression codecs for stored probe output
+
+dig and ping transcripts repeat the same headers and record layouts on every
+run, so they compress well. Rows written with a codec keep the compressed
+bytes in a BLOB column and name the codec next to it; rows without a codec
+keep the text in the original CLOB column.
+
+zlib is always available; zstd needs the optional `zstandard` package.
+"""
+import threading
+import zlib
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ("zlib", "zstd")
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_local = threading.local()
+
+
+class CodecUnavailable(Exception):
+    """Raised when a codec is unknown or its library is not installed"""
+
+
+def available_codecs() -> List[str]:
+    return [codec for codec in CODECS if codec != "zstd" or zstandard is not None]
+
+
+def resolve_codec(name: Optional[str]) -> Optional[str]:
+    """Normalize a configured codec name; None and "none" mean uncompressed"""
+    if name is None or name.strip().lower() in ("", "none"):
+        return None
+    codec = name.strip().lower()
+    if codec not in CODECS:
+        raise CodecUnavailable(f"Unknown output codec {name!r}; expected one of none, {', '.join(CODECS)}")
+    if codec == "zstd" and zstandard is None:
+        raise CodecUnavailable("Output codec 'zstd' needs the zstandard package")
+    return codec
+
+
+def _zstd():
+    # zstandard contexts are not safe to share between threads
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.compressor, _local.decompressor
+
+
+def compress_output(text: Optional[str], codec: str) -> Optional[bytes]:
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == "zstd":
+        return _zstd()[0].compress(data)
+    raise CodecUnavailable(f"Unknown output codec {codec!r}")
+
+
+def decompress_output(data: Optional[bytes], codec: str) -> Optional[str]:
+    if data is None:
+        return None
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise CodecUnavailable("Stored output uses zstd but the zstandard package is not installed")
+        # Frames written by compress() carry their content size
+        return _zstd()[1].decompress(data).decode("utf-8")
+    raise CodecUnavailable(f"Unknown output codec {codec!r}")
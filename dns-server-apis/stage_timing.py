@@ -0,0 +1,118 @@
+"""Per-request stage timing for Server-Timing headers and optional trace spans
+
+A request handler calls start_request() once; code on the request's path
+wraps its work in `with stage("name"):`. Durations of repeated stages add
+up, and header() renders them as a Server-Timing value that browser
+devtools show next to the request. Worker threads see the request's
+timings when their work is submitted through contextvars.copy_context().
+
+With TRACE_SPANS=1 and the opentelemetry API installed, the request and
+every stage also become spans; exporting them is left to the
+OpenTelemetry SDK the deployment configures (e.g. opentelemetry-instrument).
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+TRACE_SPANS = os.getenv("TRACE_SPANS", "0") == "1" and trace is not None
+
+_tracer = trace.get_tracer("dns-server-apis") if TRACE_SPANS else None
+_current: contextvars.ContextVar = contextvars.ContextVar("stage_timings", default=None)
+
+
+class StageTimings:
+    """Accumulated stage durations of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[Any]] = {}  # name -> [seconds, count], in first-seen order
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, count: int = 1):
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += count
+
+    def merge_header(self, header: Optional[str], prefix: str):
+        """Fold another service's Server-Timing entries in under a name prefix"""
+        for entry in (header or "").split(","):
+            parts = [part.strip() for part in entry.split(";")]
+            if not parts[0]:
+                continue
+            for part in parts[1:]:
+                if part.startswith("dur="):
+                    try:
+                        self.add(prefix + parts[0], float(part[4:]) / 1000)
+                    except ValueError:
+                        pass
+
+    def header(self) -> str:
+        with self._lock:
+            entries = [
+                f'{name};dur={seconds * 1000:.2f}' + (f';desc="{count}x"' if count > 1 else "")
+                for name, (seconds, count) in self.stages.items()
+            ]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def current() -> Optional[StageTimings]:
+    return _current.get()
+
+
+def start_request(name: str):
+    """Begin timing a request in the current context; pass the result to finish_request"""
+    timings = StageTimings()
+    token = _current.set(timings)
+    span = span_token = None
+    if _tracer:
+        span = _tracer.start_span(name)
+        span_token = otel_context.attach(trace.set_span_in_context(span))
+    return timings, token, span, span_token
+
+
+def finish_request(handle, route: Optional[str] = None, status: Optional[int] = None):
+    timings, token, span, span_token = handle
+    if span is not None:
+        if route:
+            span.update_name(route)
+            span.set_attribute("http.route", route)
+        if status is not None:
+            span.set_attribute("http.status_code", status)
+        span.end()
+        otel_context.detach(span_token)
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Finished from another context, e.g. after a streamed response
+        _current.set(None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as a stage of the current request, and as a span when tracing"""
+    timings = _current.get()
+    if timings is None and _tracer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        if _tracer:
+            with _tracer.start_as_current_span(name):
+                yield
+        else:
+            yield
+    finally:
+        if timings is not None:
+            timings.add(name, time.perf_counter() - started)
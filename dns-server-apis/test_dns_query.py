@@ -0,0 +1,137 @@
+"""dns_query against a local UDP responder"""
+import socket
+import struct
+import threading
+
+import pytest
+
+import dns_query
+
+
+class UDPResponder:
+    """Answers A queries with 192.0.2.1 and PTR queries with host.example.
+
+    `mangle` can rewrite each response before it is sent, and with
+    `silent` set nothing is sent at all.
+    """
+
+    def __init__(self, mangle=None, silent=False):
+        self.mangle = mangle
+        self.silent = silent
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                data, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            if self.silent:
+                continue
+            response = self.answer(data)
+            if self.mangle:
+                response = self.mangle(response)
+            self.sock.sendto(response, client)
+
+    def answer(self, data: bytes) -> bytes:
+        query_id = struct.unpack_from("!H", data, 0)[0]
+        offset = 12
+        while data[offset]:
+            offset += data[offset] + 1
+        qtype = struct.unpack_from("!H", data, offset + 1)[0]
+        question = data[12:offset + 5]
+        if qtype == 1:
+            rdata = socket.inet_aton("192.0.2.1")
+        else:
+            rdata = b"\x04host\x07example\x00"
+        header = struct.pack("!HHHHHH", query_id, 0x8580, 1, 1, 0, 0)
+        record = struct.pack("!HHHIH", 0xC00C, qtype, 1, 300, len(rdata)) + rdata
+        return header + question + record
+
+
+@pytest.fixture
+def responder():
+    server = UDPResponder()
+    yield server
+    server.close()
+
+
+def query(server, qname="www.example.com", qtype="A"):
+    return dns_query.query("127.0.0.1", qname, qtype, port=server.port, timeout=0.5, tries=1)
+
+
+def test_a_query(responder):
+    response = query(responder)
+    assert response["status"] == "NOERROR"
+    assert response["flags"] == ["qr", "aa", "rd", "ra"]
+    assert response["question"] == [{"name": "www.example.com.", "class": "IN", "type": "A"}]
+    assert response["protocol"] == "UDP"
+
+    parsed = dns_query.to_parsed_data(response)
+    assert parsed["answer_section"] == [
+        {"name": "www.example.com", "ttl": "300", "class": "IN", "type": "A", "value": "192.0.2.1"}
+    ]
+    assert parsed["server"] == {"ip": "127.0.0.1", "port": str(responder.port)}
+    assert parsed["message_size"] == response["message_size"]
+
+
+def test_ptr_query(responder):
+    response = query(responder, dns_query.reverse_name("192.0.2.1"), "PTR")
+    assert response["answer"][0]["name"] == "1.2.0.192.in-addr.arpa."
+    assert response["answer"][0]["value"] == "host.example."
+
+
+def test_format_dig(responder):
+    stdout = dns_query.format_dig(query(responder), "@127.0.0.1 www.example.com")
+    assert ";; ->>HEADER<<- opcode: QUERY, status: NOERROR" in stdout
+    assert "www.example.com.\t\t300\tIN\tA\t192.0.2.1" in stdout
+    assert ";; MSG SIZE  rcvd:" in stdout
+
+
+@pytest.mark.parametrize("mangle", [
+    pytest.param(lambda response: response[:-6], id="truncated-rdata"),
+    pytest.param(lambda response: response[:-12], id="truncated-record-header"),
+    pytest.param(lambda response: response[:20], id="truncated-question"),
+    pytest.param(lambda response: response[:10], id="short-header"),
+])
+def test_malformed_response(mangle):
+    server = UDPResponder(mangle=mangle)
+    try:
+        with pytest.raises(dns_query.DNSBadPacket) as error:
+            query(server)
+    finally:
+        server.close()
+    stdout = dns_query.format_dig_error(error.value, "@127.0.0.1 www.example.com")
+    assert ";; Got bad packet: " in stdout
+    assert "timed out" not in stdout
+
+
+def test_no_response():
+    server = UDPResponder(silent=True)
+    try:
+        with pytest.raises(dns_query.DNSTimeout, match="communications error") as error:
+            query(server)
+    finally:
+        server.close()
+    stdout = dns_query.format_dig_error(error.value, "@127.0.0.1 www.example.com")
+    assert f";; communications error to 127.0.0.1#{server.port}: timed out" in stdout
+    assert ";; connection timed out; no servers could be reached" in stdout
+
+
+def test_connection_refused():
+    server = UDPResponder()
+    server.close()
+    with pytest.raises(dns_query.DNSQueryError) as error:
+        query(server)
+    assert not isinstance(error.value, (dns_query.DNSTimeout, dns_query.DNSBadPacket))
+    stdout = dns_query.format_dig_error(error.value, "@127.0.0.1 www.example.com")
+    assert f";; communications error to 127.0.0.1#{server.port}: Connection refused" in stdout
+    assert ";; no servers could be reached" in stdout
+    assert "timed out" not in stdout
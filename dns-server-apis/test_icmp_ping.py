@@ -0,0 +1,112 @@
+"""icmp_ping: loopback probing and the ping-compatible renderings"""
+import threading
+
+import pytest
+
+import icmp_ping
+
+
+@pytest.fixture
+def icmp_allowed():
+    try:
+        icmp_ping._ICMPSocket().close()
+    except icmp_ping.ICMPUnavailable as e:
+        pytest.skip(str(e))
+
+
+def result(replies, transmitted=3):
+    """A ping_many result for 127.0.0.1 with the given (icmp_seq, time) replies"""
+    return icmp_ping._summarize(
+        {"address": "127.0.0.1", "replies": [{"icmp_seq": seq, "ttl": 64, "time": rtt} for seq, rtt in replies]},
+        transmitted, 2004
+    )
+
+
+def test_ping_loopback(icmp_allowed):
+    ping = icmp_ping.ping_many(["127.0.0.1"], count=3, interval=0.05, timeout=1.0)["127.0.0.1"]
+    assert ping["target_ip"] == "127.0.0.1"
+    assert ping["packets_transmitted"] == 3
+    assert ping["packets_received"] == 3
+    assert ping["packet_loss"] == 0.0
+    assert [reply["icmp_seq"] for reply in ping["replies"]] == [1, 2, 3]
+    assert len(ping["individual_pings"]) == 3
+    assert icmp_ping.ping_returncode(ping) == 0
+
+
+def test_concurrent_sessions_keep_their_own_replies(icmp_allowed):
+    sockets = [icmp_ping._ICMPSocket() for _ in range(2)]
+    try:
+        assert sockets[0].identifier != sockets[1].identifier
+    finally:
+        for sock in sockets:
+            sock.close()
+
+    results = [None] * 4
+
+    def run(index):
+        results[index] = icmp_ping.ping_many(["127.0.0.1"], count=5, interval=0.02, timeout=1.0)["127.0.0.1"]
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for ping in results:
+        assert ping["packets_received"] == 5
+        assert [reply["icmp_seq"] for reply in ping["replies"]] == [1, 2, 3, 4, 5]
+
+
+def test_deadline_limits_rounds(icmp_allowed):
+    ping = icmp_ping.ping_many(["127.0.0.1"], count=20, interval=0.2, timeout=1.0, deadline=0.3)["127.0.0.1"]
+    assert ping["packets_transmitted"] == 2
+    assert ping["packets_received"] == 2
+
+
+def test_unresolvable_host():
+    results = icmp_ping.ping_many(["nonexistent.invalid"], count=1)
+    assert "error" in results["nonexistent.invalid"]
+    assert icmp_ping.ping_returncode(results["nonexistent.invalid"]) == 2
+
+
+def test_format_ping():
+    assert icmp_ping.format_ping("localhost", result([(1, 0.05), (2, 0.07), (3, 0.06)])) == "\n".join([
+        "PING localhost (127.0.0.1) 56(84) bytes of data.",
+        "64 bytes from 127.0.0.1 (127.0.0.1): icmp_seq=1 ttl=64 time=0.05 ms",
+        "64 bytes from 127.0.0.1 (127.0.0.1): icmp_seq=2 ttl=64 time=0.07 ms",
+        "64 bytes from 127.0.0.1 (127.0.0.1): icmp_seq=3 ttl=64 time=0.06 ms",
+        "",
+        "--- localhost ping statistics ---",
+        "3 packets transmitted, 3 received, 0% packet loss, time 2004ms",
+        "rtt min/avg/max/mdev = 0.050/0.060/0.070/0.008 ms",
+        ""
+    ])
+
+
+def test_lost_reply():
+    ping = result([(3, 0.2), (1, 0.4)], transmitted=4)
+    assert icmp_ping.to_parsed_data(ping) == {
+        "target_ip": "127.0.0.1",
+        "packets_transmitted": 4,
+        "packets_received": 2,
+        "packet_loss": 50.0,
+        "rtt_stats": {"min": 0.2, "avg": 0.3, "max": 0.4, "mdev": 0.1},
+        "individual_pings": [0.4, 0.2]
+    }
+    stdout = icmp_ping.format_ping("127.0.0.1", ping)
+    assert "icmp_seq=2" not in stdout
+    assert "4 packets transmitted, 2 received, 50% packet loss, time 2004ms" in stdout
+    assert icmp_ping.ping_returncode(ping) == 0
+
+
+def test_all_replies_lost():
+    ping = result([], transmitted=3)
+    assert icmp_ping.to_parsed_data(ping)["rtt_stats"] is None
+    assert icmp_ping.to_parsed_data(ping)["packet_loss"] == 100.0
+    stdout = icmp_ping.format_ping("127.0.0.1", ping)
+    assert "3 packets transmitted, 0 received, 100% packet loss" in stdout
+    assert "rtt min/avg/max/mdev" not in stdout
+    assert icmp_ping.ping_returncode(ping) == 1
+
+
+def test_returncode_without_result():
+    assert icmp_ping.ping_returncode(None) == 2
@@ -0,0 +1,185 @@
+"""parse_dig_output and parse_ping_output on real probe transcripts"""
+import pytest
+
+app_db = pytest.importorskip("app_db")
+
+# dig 9.16 pads the record columns with runs of tabs
+DIG_TAB_PADDED = """
+; <<>> DiG 9.16.23-RH <<>> @10.42.0.1 ns1.example.com
+; (1 server found)
+;; global options: +cmd
+;; Got answer:
+;; ->>HEADER<<- opcode: QUERY, status: NOERROR, id: 40125
+;; flags: qr aa rd ra; QUERY: 1, ANSWER: 1, AUTHORITY: 0, ADDITIONAL: 1
+
+;; OPT PSEUDOSECTION:
+; EDNS: version: 0, flags:; udp: 1232
+; COOKIE: 5d1c2a3b4e5f6071 (good)
+;; QUESTION SECTION:
+;ns1.example.com.\t\t\tIN\tA
+
+;; ANSWER SECTION:
+ns1.example.com.\t\t86400\tIN\tA\t10.42.0.1
+
+;; Query time: 3 msec
+;; SERVER: 10.42.0.1#53(10.42.0.1)
+;; WHEN: Fri Oct 16 10:12:01 UTC 2026
+;; MSG SIZE  rcvd: 88
+
+"""
+
+# Records in the AUTHORITY and ADDITIONAL sections are not answers
+DIG_MULTI_SECTION = """
+; <<>> DiG 9.18.18 <<>> @10.42.0.1 www.example.com
+;; global options: +cmd
+;; Got answer:
+;; ->>HEADER<<- opcode: QUERY, status: NOERROR, id: 1203
+;; flags: qr aa rd; QUERY: 1, ANSWER: 2, AUTHORITY: 1, ADDITIONAL: 1
+
+;; QUESTION SECTION:
+;www.example.com.\t\tIN\tA
+
+;; ANSWER SECTION:
+www.example.com.\t300\tIN\tCNAME\tweb.example.com.
+web.example.com.\t300     IN\tA\t10.42.0.20
+
+;; AUTHORITY SECTION:
+example.com.\t\t86400\tIN\tNS\tns1.example.com.
+
+;; ADDITIONAL SECTION:
+ns1.example.com.\t\t86400\tIN\tA\t10.42.0.1
+
+;; Query time: 0 msec
+;; SERVER: 10.42.0.1#53(10.42.0.1) (UDP)
+;; WHEN: Fri Oct 16 10:12:01 UTC 2026
+;; MSG SIZE  rcvd: 131
+
+"""
+
+DIG_NXDOMAIN = """
+; <<>> DiG 9.18.18 <<>> @10.42.0.1 missing.example.com
+;; global options: +cmd
+;; Got answer:
+;; ->>HEADER<<- opcode: QUERY, status: NXDOMAIN, id: 5521
+;; flags: qr aa rd; QUERY: 1, ANSWER: 0, AUTHORITY: 1, ADDITIONAL: 1
+
+;; QUESTION SECTION:
+;missing.example.com.\t\tIN\tA
+
+;; AUTHORITY SECTION:
+example.com.\t\t86400\tIN\tSOA\tns1.example.com. admin.example.com. 2026101601 3600 1800 604800 86400
+
+;; Query time: 1 msec
+;; SERVER: 10.42.0.1#53(10.42.0.1) (UDP)
+;; WHEN: Fri Oct 16 10:12:01 UTC 2026
+;; MSG SIZE  rcvd: 104
+
+"""
+
+PING_LINUX = """PING ns1.example.com (10.42.0.1) 56(84) bytes of data.
+64 bytes from 10.42.0.1 (10.42.0.1): icmp_seq=1 ttl=64 time=0.412 ms
+64 bytes from 10.42.0.1 (10.42.0.1): icmp_seq=2 ttl=64 time=0.389 ms
+
+--- ns1.example.com ping statistics ---
+2 packets transmitted, 2 received, 0% packet loss, time 1001ms
+rtt min/avg/max/mdev = 0.389/0.400/0.412/0.011 ms
+"""
+
+PING_ERRORS = """PING client1.example.com (10.42.0.30) 56(84) bytes of data.
+From 10.42.0.1 icmp_seq=1 Destination Host Unreachable
+From 10.42.0.1 icmp_seq=2 Destination Host Unreachable
+
+--- client1.example.com ping statistics ---
+4 packets transmitted, 0 received, +2 errors, 100% packet loss, time 3065ms
+"""
+
+PING_PARTIAL_LOSS = """PING client1.example.com (10.42.0.30) 56(84) bytes of data.
+64 bytes from 10.42.0.30 (10.42.0.30): icmp_seq=1 ttl=64 time=1.25 ms
+64 bytes from 10.42.0.30 (10.42.0.30): icmp_seq=3 ttl=64 time=1.75 ms
+
+--- client1.example.com ping statistics ---
+4 packets transmitted, 2 received, 50% packet loss, time 3004ms
+rtt min/avg/max/mdev = 1.250/1.500/1.750/0.250 ms
+"""
+
+# BSD/macOS ping: "packets received", "round-trip" and "stddev"
+PING_BSD = """PING ns1.example.com (10.42.0.1): 56 data bytes
+64 bytes from 10.42.0.1: icmp_seq=0 ttl=64 time=0.512 ms
+64 bytes from 10.42.0.1: icmp_seq=1 ttl=64 time=0.488 ms
+
+--- ns1.example.com ping statistics ---
+2 packets transmitted, 2 packets received, 0.0% packet loss
+round-trip min/avg/max/stddev = 0.488/0.500/0.512/0.012 ms
+"""
+
+
+def test_dig_tab_padded_answer():
+    assert app_db.parse_dig_output(DIG_TAB_PADDED) == {
+        "query_time": 3,
+        "server": {"ip": "10.42.0.1", "port": "53"},
+        "answer_section": [
+            {"name": "ns1.example.com", "ttl": "86400", "class": "IN", "type": "A", "value": "10.42.0.1"}
+        ],
+        "status": "NOERROR",
+        "flags": "qr aa rd ra",
+        "message_size": 88
+    }
+
+
+def test_dig_reads_only_the_answer_section():
+    parsed = app_db.parse_dig_output(DIG_MULTI_SECTION)
+    assert parsed["answer_section"] == [
+        {"name": "www.example.com", "ttl": "300", "class": "IN", "type": "CNAME", "value": "web.example.com."},
+        {"name": "web.example.com", "ttl": "300", "class": "IN", "type": "A", "value": "10.42.0.20"}
+    ]
+    assert parsed["query_time"] == 0
+    assert parsed["message_size"] == 131
+
+
+def test_dig_without_answer_section():
+    parsed = app_db.parse_dig_output(DIG_NXDOMAIN)
+    assert parsed["status"] == "NXDOMAIN"
+    assert parsed["flags"] == "qr aa rd"
+    assert parsed["answer_section"] == []
+
+
+def test_ping_linux_summary():
+    assert app_db.parse_ping_output(PING_LINUX) == {
+        "target_ip": "10.42.0.1",
+        "packets_transmitted": 2,
+        "packets_received": 2,
+        "packet_loss": 0.0,
+        "rtt_stats": {"min": 0.389, "avg": 0.4, "max": 0.412, "mdev": 0.011},
+        "individual_pings": [0.412, 0.389]
+    }
+
+
+def test_ping_summary_with_error_count():
+    assert app_db.parse_ping_output(PING_ERRORS) == {
+        "target_ip": "10.42.0.30",
+        "packets_transmitted": 4,
+        "packets_received": 0,
+        "packet_loss": 100.0,
+        "rtt_stats": None,
+        "individual_pings": []
+    }
+
+
+def test_ping_partial_loss():
+    parsed = app_db.parse_ping_output(PING_PARTIAL_LOSS)
+    assert parsed["packets_transmitted"] == 4
+    assert parsed["packets_received"] == 2
+    assert parsed["packet_loss"] == 50.0
+    assert parsed["individual_pings"] == [1.25, 1.75]
+    assert parsed["rtt_stats"] == {"min": 1.25, "avg": 1.5, "max": 1.75, "mdev": 0.25}
+
+
+def test_ping_bsd_round_trip_stddev():
+    assert app_db.parse_ping_output(PING_BSD) == {
+        "target_ip": "10.42.0.1",
+        "packets_transmitted": 2,
+        "packets_received": 2,
+        "packet_loss": 0.0,
+        "rtt_stats": {"min": 0.488, "avg": 0.5, "max": 0.512, "mdev": 0.012},
+        "individual_pings": [0.512, 0.488]
+    }